@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Query
-from app.services.events_service import fetch_local_events
+from app.services.events_service import fetch_local_events, cache_stats
 
 router = APIRouter()
 
@@ -12,3 +12,6 @@ async def get_events(
     return await fetch_local_events(query=query, date_iso=date_iso)
 
 
+@router.get("/cache")
+async def get_events_cache_stats():
+    return cache_stats()
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import List
+from app.core.config import settings
 from app.services.foot_traffic_service import fetch_popular_times
+from app.services.tiles import get_tile, valid_tile
 
 router = APIRouter()
 
@@ -15,6 +17,8 @@ async def get_foot_traffic(
     types: List[str] | None = Query(None, description="Place categories for bounds search"),
     dow: int | None = Query(None, ge=0, le=6, description="Day of week (0=Sun..6=Sat) for historical slot"),
     hour: int | None = Query(None, ge=0, le=23, description="Hour of day (0..23) for historical slot"),
+    zoom: float | None = Query(None, ge=0, le=24, description="Map zoom; thins dense bounds results to one place per cell"),
+    limit: int | None = Query(None, ge=1, le=5000, description="Maximum places returned in bounds mode"),
 ):
     return await fetch_popular_times(
         place_query=place_query,
@@ -25,6 +29,34 @@ async def get_foot_traffic(
         types=types,
         dow=dow,
         hour=hour,
+        zoom=zoom,
+        limit=limit,
     )
 
 
+@router.get("/tiles/{z}/{x}/{y}.bin")
+async def get_foot_traffic_tile(
+    request: Request,
+    z: int,
+    x: int,
+    y: int,
+    dow: int | None = Query(None, ge=0, le=6, description="Day of week (0=Sun..6=Sat); omit for the whole week"),
+    hour: int | None = Query(None, ge=0, le=23, description="Hour of day (0..23); omit for the whole week"),
+):
+    """Places in one web-mercator tile as a compact binary (layout in app/services/tiles.py)."""
+    if not valid_tile(z, x, y):
+        raise HTTPException(status_code=404, detail="Tile out of range")
+    body, etag = get_tile(z, x, y, dow, hour)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.tile_max_age_seconds}"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/octet-stream", headers=headers)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match list (or "*") against the current ETag."""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
@@ -0,0 +1,40 @@
+import struct
+from fastapi import APIRouter, HTTPException, Query, Response
+from app.services.heatmap import crop, get_raster
+
+router = APIRouter()
+
+# magic, rows, cols, then the crop's sw_lat, sw_lng, ne_lat, ne_lng
+HEADER = struct.Struct("<4sHH4d")
+
+
+@router.get("")
+async def get_heatmap(
+    sw_lat: float = Query(..., ge=-90, le=90),
+    sw_lng: float = Query(..., ge=-180, le=180),
+    ne_lat: float = Query(..., ge=-90, le=90),
+    ne_lng: float = Query(..., ge=-180, le=180),
+    dow: int = Query(..., ge=0, le=6, description="Day of week (0=Sun..6=Sat)"),
+    hour: int = Query(..., ge=0, le=23, description="Hour of day (0..23)"),
+    max_side: int = Query(512, ge=1, le=4096, description="Downsample so neither side exceeds this many cells"),
+):
+    """Viewport crop of the precomputed heatmap as binary: a 40-byte header
+    (b"FTH1", uint16 rows, uint16 cols, float64 sw_lat, sw_lng, ne_lat, ne_lng)
+    then rows x cols uint8 busyness, north row first."""
+    if ne_lat <= sw_lat or ne_lng <= sw_lng:
+        raise HTTPException(status_code=422, detail="Bounds must have ne_lat > sw_lat and ne_lng > sw_lng.")
+    result = crop(sw_lat, sw_lng, ne_lat, ne_lng, dow, hour, max_side=max_side)
+    if result is None:
+        raise HTTPException(status_code=503, detail="Heatmap not built yet.")
+    view, edges = result
+    rows, cols = view.shape
+    return Response(HEADER.pack(b"FTH1", rows, cols, *edges) + view.tobytes(), media_type="application/octet-stream")
+
+
+@router.get("/meta")
+async def get_heatmap_meta():
+    # Grid bounds, resolution and build time of the raster being served
+    loaded = get_raster()
+    if loaded is None:
+        return {"error": "Heatmap not built yet.", "data": None}
+    return {"data": loaded[1]}
@@ -0,0 +1,20 @@
+import asyncio
+
+from fastapi import APIRouter
+from app.models.registry import get_registry
+
+router = APIRouter()
+
+
+@router.get("")
+async def get_models():
+    # Active/candidate versions plus per-model latency and score distribution
+    return get_registry().stats()
+
+
+@router.post("/reload")
+async def reload_models():
+    # Check the model directory now instead of waiting for the next poll
+    registry = get_registry()
+    swapped = await asyncio.to_thread(registry.reload_if_changed)
+    return {"reloaded": swapped, **registry.stats()}
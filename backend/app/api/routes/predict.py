@@ -1,19 +1,48 @@
-from fastapi import APIRouter, Query
-from app.services.predict_service import predict_score
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import List
+from app.core.config import settings
+from app.services.predict_service import predict_score, predict_batch, shape_prediction
 
 router = APIRouter()
 
 
+class BatchLocation(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    place_query: str = "San Francisco"
+
+
+class BatchRequest(BaseModel):
+    locations: List[BatchLocation] = Field(..., min_length=1)
+    # ISO datetimes; every location is scored at every slot
+    slots: List[str | None] = Field(default_factory=lambda: [None], min_length=1)
+
+
 @router.get("")
 async def get_prediction(
     latitude: float = Query(37.7749),
     longitude: float = Query(-122.4194),
     date_iso: str | None = Query(None),
-    place_query: str = Query("San Francisco")
+    place_query: str = Query("San Francisco"),
+    include_raw: bool = Query(True, description="Include the raw upstream payloads under `raw`"),
+    fields: str | None = Query(None, description="Comma-separated top-level keys to return, e.g. score,label"),
 ):
     result = await predict_score(
         latitude=latitude, longitude=longitude, date_iso=date_iso, place_query=place_query
     )
-    return result
+    return shape_prediction(result, include_raw=include_raw, fields=fields)
 
 
+@router.post("/batch")
+async def post_prediction_batch(body: BatchRequest):
+    total = len(body.locations) * len(body.slots)
+    if total > settings.predict_batch_max_candidates:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{total} candidates requested; the limit is {settings.predict_batch_max_candidates}.",
+        )
+    results = await predict_batch(
+        locations=[loc.model_dump() for loc in body.locations], slots=body.slots
+    )
+    return {"count": len(results), "results": results}
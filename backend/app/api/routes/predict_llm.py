@@ -1,5 +1,7 @@
+import json
 from fastapi import APIRouter, Query
-from app.services.predict_service import predict_score, summarize_with_gemini
+from fastapi.responses import StreamingResponse
+from app.services.predict_service import predict_with_summary, shape_prediction, stream_prediction_with_summary
 
 router = APIRouter()
 
@@ -9,10 +11,33 @@ async def get_prediction_llm(
     latitude: float = Query(37.7749),
     longitude: float = Query(-122.4194),
     date_iso: str | None = Query(None),
-    place_query: str = Query("San Francisco")
+    place_query: str = Query("San Francisco"),
+    include_raw: bool = Query(True, description="Include the raw upstream payloads under `raw`"),
+    fields: str | None = Query(None, description="Comma-separated top-level keys to return, e.g. score,label,summary"),
 ):
-    base = await predict_score(latitude=latitude, longitude=longitude, date_iso=date_iso, place_query=place_query)
-    summary = await summarize_with_gemini(base)
-    return {**base, "summary": summary}
+    result = await predict_with_summary(latitude=latitude, longitude=longitude, date_iso=date_iso, place_query=place_query)
+    return shape_prediction(result, include_raw=include_raw, fields=fields)
 
 
+@router.get("/stream")
+async def stream_prediction_llm(
+    latitude: float = Query(37.7749),
+    longitude: float = Query(-122.4194),
+    date_iso: str | None = Query(None),
+    place_query: str = Query("San Francisco"),
+    include_raw: bool = Query(True, description="Include the raw upstream payloads in the prediction line"),
+    fields: str | None = Query(None, description="Comma-separated keys for the prediction line, e.g. score,label"),
+):
+    """NDJSON stream: a `prediction` line as soon as the score is ready, then
+    `summary_delta` lines as Gemini generates, then a final `done` line."""
+    async def lines():
+        async for event in stream_prediction_with_summary(
+            latitude=latitude, longitude=longitude, date_iso=date_iso, place_query=place_query
+        ):
+            if event["type"] == "prediction":
+                event = shape_prediction(event, include_raw=include_raw, fields=fields)
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    # GZip would buffer the lines until the compressor flushes; opt out so each
+    # line reaches the client as soon as it is produced
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"Content-Encoding": "identity"})
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.services.search_service import search_best_spots
+
+router = APIRouter()
+
+
+@router.get("")
+async def get_best_spots(
+    sw_lat: float = Query(..., ge=-90, le=90),
+    sw_lng: float = Query(..., ge=-180, le=180),
+    ne_lat: float = Query(..., ge=-90, le=90),
+    ne_lng: float = Query(..., ge=-180, le=180),
+    start_iso: str = Query(..., description="Start of the time window (ISO datetime)"),
+    end_iso: str | None = Query(None, description="End of the time window; defaults to one hour after start"),
+    k: int = Query(10, ge=1, le=100, description="Number of best cells to return"),
+    step_deg: float = Query(0.005, gt=0, le=0.1, description="Grid cell size in degrees"),
+    place_query: str = Query("San Francisco", description="Query used to look up events"),
+):
+    if ne_lat <= sw_lat or ne_lng <= sw_lng:
+        raise HTTPException(status_code=422, detail="Bounds must have ne_lat > sw_lat and ne_lng > sw_lng.")
+    try:
+        return await search_best_spots(
+            sw_lat=sw_lat,
+            sw_lng=sw_lng,
+            ne_lat=ne_lat,
+            ne_lng=ne_lng,
+            start_iso=start_iso,
+            end_iso=end_iso,
+            k=k,
+            step_deg=step_deg,
+            place_query=place_query,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from app.core.resilience import upstream_stats
+
+router = APIRouter()
+
+
+@router.get("")
+async def get_upstreams():
+    # Circuit breaker state and per-endpoint latency histograms
+    return upstream_stats()
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Query
-from app.services.weather_service import fetch_weather_forecast
+from app.services.weather_service import fetch_weather_forecast, cache_stats
 
 router = APIRouter()
 
@@ -13,3 +13,8 @@ async def get_weather(
     return await fetch_weather_forecast(latitude=latitude, longitude=longitude, date_iso=date_iso)
 
 
+@router.get("/cache")
+async def get_weather_cache_stats():
+    # Hit/miss counters for tuning WEATHER_CACHE_GRID_DEG
+    return cache_stats()
+
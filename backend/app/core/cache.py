@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from app.core import cache_backends
+
+
+class AsyncTTLCache:
+    """In-process async cache with TTL expiry, LRU bound and single-flight loads.
+
+    Concurrent `get_or_load` calls for the same missing key share one in-flight
+    loader call instead of each hitting the upstream.
+
+    A cache given a `name` also uses the shared backend when CACHE_BACKEND is
+    set (see app/core/cache_backends.py): local misses are looked up there
+    before loading, and loaded or `set` values are written behind to it, so
+    other workers reuse them for the rest of their TTL.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, name: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.name = name
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._writes: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.shared_hits = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """Seconds until `key` expires, or None when it is not cached."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = entry[0] - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def lookup(self, key: Hashable) -> Optional[Any]:
+        """`get` that also counts towards the hit/miss stats."""
+        value = self.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._set_local(key, value, ttl)
+        self._publish({key: value}, ttl)
+
+    def set_many(self, items: Dict[Hashable, Any], ttl_seconds: Optional[float] = None) -> None:
+        """`set` for several keys, written to the shared backend in one batch."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        for key, value in items.items():
+            self._set_local(key, value, ttl)
+        self._publish(items, ttl)
+
+    def _set_local(self, key: Hashable, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def lookup_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Cached values for `keys`, from memory or else the shared backend; counts stats."""
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            value = self.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        self.hits += len(found)
+        if missing:
+            shared = await self._pull(missing)
+            self.shared_hits += len(shared)
+            self.misses += len(missing) - len(shared)
+            found.update(shared)
+        return found
+
+    async def pull_shared(self, keys: Iterable[Hashable], min_ttl: float = 0.0) -> Set[Hashable]:
+        """Adopt backend entries with more than `min_ttl` seconds left; returns their keys.
+
+        Lets the prefetch scheduler skip keys another worker has just refreshed.
+        """
+        return set(await self._pull(list(keys), min_ttl))
+
+    async def _pull(self, keys: list, min_ttl: float = 0.0) -> Dict[Hashable, Any]:
+        backend = self._backend()
+        if backend is None or not keys:
+            return {}
+        names = {cache_backends.namespaced(self.name, key): key for key in keys}
+        try:
+            entries = await backend.get_many(names)
+        except Exception:
+            # The shared tier is an optimization; fall back to loading
+            return {}
+        found = {}
+        for name, (data, remaining) in entries.items():
+            if remaining <= min_ttl:
+                continue
+            try:
+                value = cache_backends.loads(data)
+            except Exception:
+                continue
+            key = names[name]
+            self._set_local(key, value, remaining)
+            found[key] = value
+        return found
+
+    def _publish(self, items: Dict[Hashable, Any], ttl: float) -> None:
+        backend = self._backend()
+        if backend is None or not items:
+            return
+        try:
+            encoded = {cache_backends.namespaced(self.name, key): cache_backends.dumps(value) for key, value in items.items()}
+            task = asyncio.get_running_loop().create_task(backend.set_many(encoded, ttl))
+        except Exception:
+            # Unserializable value, or no running loop: keep it local
+            return
+        # Write-behind: callers don't wait on the backend, and errors are dropped
+        self._writes.add(task)
+        task.add_done_callback(self._write_done)
+
+    def _write_done(self, task: asyncio.Task) -> None:
+        self._writes.discard(task)
+        if not task.cancelled():
+            task.exception()
+
+    def _backend(self) -> Optional[cache_backends.CacheBackend]:
+        return cache_backends.get_cache_backend() if self.name else None
+
+    async def flush(self) -> None:
+        """Wait for pending write-behinds to reach the shared backend."""
+        if self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda _: True,
+        refresh: bool = False,
+    ) -> Any:
+        """Cached value for `key`, loading it once on a miss.
+
+        `refresh=True` reloads even when a value is cached (used by the prefetch
+        scheduler) and is left out of the hit/miss stats.
+        """
+        if not refresh:
+            value = self.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            if not refresh:
+                self.coalesced += 1
+        else:
+            # The load runs in its own task, so a cancelled caller (e.g. a timed-out
+            # warm-up) does not cancel it for the callers coalesced onto it
+            inflight = asyncio.get_running_loop().create_task(self._load(key, loader, should_cache, refresh))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda task: self._load_done(key, task))
+        return await asyncio.shield(inflight)
+
+    async def _load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool],
+        refresh: bool,
+    ) -> Any:
+        if not refresh:
+            # Another worker may already have loaded it
+            shared = await self._pull([key])
+            if key in shared:
+                self.shared_hits += 1
+                return shared[key]
+            self.misses += 1
+        value = await loader()
+        if should_cache(value):
+            self.set(key, value)
+        return value
+
+    def _load_done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark retrieved so a failure nobody awaited any more does not log a warning
+        if not task.cancelled():
+            task.exception()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced + self.shared_hits
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "shared_hits": self.shared_hits,
+            "hit_ratio": (self.hits + self.coalesced + self.shared_hits) / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
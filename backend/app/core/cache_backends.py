@@ -0,0 +1,278 @@
+"""Shared second tier behind AsyncTTLCache, so workers reuse each other's loads.
+
+Each AsyncTTLCache keeps its in-process LRU; a cache created with a `name`
+also reads through to and writes behind to the backend picked by CACHE_BACKEND:
+
+- "none" (default): process-local only, as before,
+- "memory": an in-process backend, for a single worker or tests,
+- "sqlite": a WAL-mode SQLite file (CACHE_SQLITE_PATH) shared by every worker
+  on the host.
+
+Keys are namespaced as "<CACHE_NAMESPACE>:<cache name>:<key>" so deployments or
+incompatible payload versions can share one store. Values are encoded with
+CACHE_SERIALIZER: msgpack when installed, else JSON. The first byte records
+which, so workers with different settings still read each other's entries.
+Both return exactly what was stored: tuples stay tuples, dict keys keep their
+type and NumPy arrays keep dtype and shape (NumPy scalars become Python
+numbers). Other types raise TypeError, and such values stay process-local.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_MSGPACK = b"m"
+_JSON = b"j"
+_NDARRAY_EXT = 1
+_TUPLE_EXT = 2
+
+
+class CacheBackend(ABC):
+    """Byte store with per-entry TTL; every call may be made from the event loop."""
+
+    @abstractmethod
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[bytes, float]]:
+        """{key: (value, seconds left)} for the keys that are present and unexpired."""
+
+    @abstractmethod
+    async def set_many(self, items: Dict[str, bytes], ttl_seconds: float) -> None:
+        """Store every item for `ttl_seconds`, replacing existing entries."""
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[bytes, float]]:
+        now = time.time()
+        found = {}
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            if entry[0] <= now:
+                del self._entries[key]
+                continue
+            self._entries.move_to_end(key)
+            found[key] = (entry[1], entry[0] - now)
+        return found
+
+    async def set_many(self, items: Dict[str, bytes], ttl_seconds: float) -> None:
+        expires_at = time.time() + ttl_seconds
+        for key, value in items.items():
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class SQLiteBackend(CacheBackend):
+    """Shared by processes on one host; queries run in a worker thread."""
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cache (
+        key        TEXT PRIMARY KEY,
+        value      BLOB NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at);
+    """
+    # Expired rows are deleted every this many writes
+    _PURGE_EVERY = 500
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL lets readers in other workers proceed while one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(self._SCHEMA)
+        self._writes = 0
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[bytes, float]]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        return await asyncio.to_thread(self._get_many, keys)
+
+    def _get_many(self, keys: list) -> Dict[str, Tuple[bytes, float]]:
+        now = time.time()
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value, expires_at FROM cache WHERE key IN ({','.join('?' * len(chunk))}) "
+                    "AND expires_at > ?",
+                    (*chunk, now),
+                ).fetchall()
+                found.update((key, (value, expires_at - now)) for key, value, expires_at in rows)
+        return found
+
+    async def set_many(self, items: Dict[str, bytes], ttl_seconds: float) -> None:
+        if items:
+            await asyncio.to_thread(self._set_many, items, ttl_seconds)
+
+    def _set_many(self, items: Dict[str, bytes], ttl_seconds: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    [(key, value, now + ttl_seconds) for key, value in items.items()],
+                )
+                self._writes += 1
+                if self._writes % self._PURGE_EVERY == 0:
+                    self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                # Left open, the transaction would make every later BEGIN fail
+                self._conn.execute("ROLLBACK")
+                raise
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a cache value; raises TypeError for types that would not round-trip."""
+    if settings.cache_serializer == "msgpack" and msgpack is not None:
+        return _MSGPACK + _packb(value)
+    return _JSON + json.dumps(_to_json(value), separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    tag, body = data[:1], data[1:]
+    if tag == _MSGPACK:
+        if msgpack is None:
+            raise ValueError("msgpack-encoded cache entry but msgpack is not installed")
+        return _unpackb(body)
+    return json.loads(body, object_hook=_from_json)
+
+
+# msgpack: strict_types sends tuples and dict/list subclasses to `default`, so
+# tuples come back as tuples (and stay usable as dict keys)
+def _packb(value) -> bytes:
+    return msgpack.packb(value, default=_msgpack_default, use_bin_type=True, strict_types=True)
+
+
+def _unpackb(body: bytes):
+    return msgpack.unpackb(body, ext_hook=_msgpack_ext, raw=False, strict_map_key=False)
+
+
+def _msgpack_default(value):
+    if isinstance(value, np.ndarray):
+        header = msgpack.packb([value.dtype.str, list(value.shape)])
+        return msgpack.ExtType(_NDARRAY_EXT, header + np.ascontiguousarray(value).tobytes())
+    if isinstance(value, tuple):
+        return msgpack.ExtType(_TUPLE_EXT, _packb(list(value)))
+    if isinstance(value, np.generic):
+        return value.item()
+    # Subclasses such as IntEnum or OrderedDict travel as their base type
+    for base in (bool, int, float, str, dict, list):
+        if isinstance(value, base):
+            return base(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _msgpack_ext(code: int, data: bytes):
+    if code == _TUPLE_EXT:
+        return tuple(_unpackb(data))
+    if code != _NDARRAY_EXT:
+        return msgpack.ExtType(code, data)
+    unpacker = msgpack.Unpacker()
+    unpacker.feed(data)
+    dtype, shape = next(unpacker)
+    return np.frombuffer(data[unpacker.tell():], dtype=np.dtype(dtype)).reshape(shape).copy()
+
+
+# JSON: tuples, arrays and dicts with non-string keys are tagged objects
+_JSON_TAGS = ("__ndarray__", "__tuple__", "__dict__")
+
+
+def _to_json(value):
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value) and not (len(value) == 1 and next(iter(value)) in _JSON_TAGS):
+            return {k: _to_json(v) for k, v in value.items()}
+        return {"__dict__": [[_to_json(k), _to_json(v)] for k, v in value.items()]}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_to_json(v) for v in value]}
+    if isinstance(value, list):
+        return [_to_json(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return {"__ndarray__": [value.dtype.str, list(value.shape), base64.b64encode(value.tobytes()).decode("ascii")]}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _from_json(obj: dict):
+    if len(obj) != 1:
+        return obj
+    tag, body = next(iter(obj.items()))
+    if tag == "__tuple__":
+        return tuple(body)
+    if tag == "__dict__":
+        return {k: v for k, v in body}
+    if tag == "__ndarray__":
+        dtype, shape, data = body
+        return np.frombuffer(base64.b64decode(data), dtype=np.dtype(dtype)).reshape(shape).copy()
+    return obj
+
+
+def namespaced(cache_name: str, key) -> str:
+    # repr keeps tuples of floats/strings distinct and is stable across processes
+    return f"{settings.cache_namespace}:{cache_name}:{key!r}"
+
+
+_backend: Optional[CacheBackend] = None
+_backend_loaded = False
+
+
+def get_cache_backend() -> Optional[CacheBackend]:
+    """The configured shared backend, or None for process-local caching only."""
+    global _backend, _backend_loaded
+    if not _backend_loaded:
+        _backend_loaded = True
+        if settings.cache_backend == "memory":
+            _backend = MemoryBackend(settings.cache_memory_max_entries)
+        elif settings.cache_backend == "sqlite":
+            _backend = SQLiteBackend(settings.cache_sqlite_path)
+        elif settings.cache_backend != "none":
+            raise ValueError(f"Unknown CACHE_BACKEND {settings.cache_backend!r}; expected none, memory or sqlite")
+    return _backend
+
+
+async def close_cache_backend() -> None:
+    global _backend, _backend_loaded
+    if _backend is not None:
+        await _backend.close()
+    _backend, _backend_loaded = None, False
@@ -9,11 +9,122 @@ class Settings(BaseSettings):
     cors_allow_origins_raw: Optional[str] = None
     cors_allow_origins: List[str] = ["http://localhost:3000"]
     open_meteo_base: str = "https://api.open-meteo.com/v1/forecast"
+    serpapi_base: str = "https://serpapi.com/search.json"
+    # Preferred cloud endpoint first; the second is raced against it (see _outscraper_post)
+    outscraper_endpoints: List[str] = [
+        "https://app.outscraper.cloud/api/google-maps/places",
+        "https://api.outscraper.com/google-maps/places",
+    ]
+    # Overrides the Gemini API host (switches the SDK to its REST transport)
+    gemini_api_endpoint: str | None = None
     serpapi_api_key: str | None = None
     eventbrite_token: str | None = None
     outscraper_api_key: str | None = None
     gemini_api_key: str | None = None
     google_maps_api_key: str | None = None
+    # Shared upstream HTTP clients (see app/core/http.py)
+    http2_enabled: bool = True
+    http_connect_timeout: float = 5.0
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry: float = 30.0
+    open_meteo_timeout: float = 20.0
+    open_meteo_max_connections: int = 20
+    serpapi_timeout: float = 30.0
+    serpapi_max_connections: int = 10
+    outscraper_timeout: float = 30.0
+    outscraper_max_connections: int = 10
+    # OutScraper resilience (see app/core/resilience.py)
+    outscraper_max_concurrency: int = 4
+    outscraper_queue_timeout: float = 1.0
+    # Start the second endpoint if the first hasn't answered after this long
+    outscraper_hedge_delay: float = 1.5
+    outscraper_deadline_seconds: float = 10.0
+    upstream_breaker_window: int = 20
+    upstream_breaker_failure_ratio: float = 0.5
+    upstream_breaker_min_calls: int = 5
+    upstream_breaker_cooldown_seconds: float = 30.0
+    # Open-Meteo forecast cache (see app/services/weather_service.py)
+    weather_cache_grid_deg: float = 0.01
+    weather_cache_ttl_seconds: float = 3600.0
+    weather_cache_max_entries: int = 2048
+    weather_grid_cache_max_entries: int = 20000
+    # Locations per multi-point Open-Meteo request (see fetch_weather_modifiers)
+    open_meteo_max_locations: int = 100
+    # SerpApi events cache (see app/services/events_service.py)
+    events_cache_ttl_seconds: float = 6 * 3600.0
+    events_cache_max_entries: int = 512
+    # Cache tier shared by workers: none, memory or sqlite (see app/core/cache_backends.py)
+    cache_backend: str = "none"
+    cache_namespace: str = "ftf:v1"
+    # msgpack when installed, otherwise JSON
+    cache_serializer: str = "msgpack"
+    cache_sqlite_path: str = "data/cache.sqlite3"
+    cache_memory_max_entries: int = 10000
+    # Persistent popular-times store (see app/services/place_store.py)
+    place_store_path: str = "data/places.sqlite3"
+    place_store_max_age_seconds: float = 14 * 24 * 3600.0
+    place_store_nearby_grid_deg: float = 0.005
+    # Bounds-mode spatial index (see app/services/place_index.py)
+    place_index_max_results: int = 500
+    place_index_thin_cells_per_tile: int = 16
+    # Binary z/x/y foot-traffic tiles (see app/services/tiles.py)
+    tile_max_places: int = 4096
+    # Short, so new places show up soon; revalidating with the ETag is a cheap 304
+    tile_max_age_seconds: int = 300
+    tile_cache_max_entries: int = 4096
+    # Precomputed (dow, hour) heatmap raster (see app/services/heatmap.py)
+    heatmap_path: str = "data/heatmap.npy"
+    heatmap_sw_lat: float = 37.70
+    heatmap_sw_lng: float = -122.58
+    heatmap_ne_lat: float = 37.84
+    heatmap_ne_lng: float = -122.35
+    heatmap_cell_deg: float = 0.001
+    heatmap_bandwidth_m: float = 200.0
+    heatmap_max_age_seconds: float = 6 * 3600.0
+    # Upper bound on locations x slots per /api/predict/batch call
+    predict_batch_max_candidates: int = 5000
+    # Best-spot grid search (see app/services/search_service.py)
+    search_max_candidates: int = 20000
+    search_batch_size: int = 32
+    # /api/predict-llm coalescing and short-lived result cache
+    predict_llm_cache_ttl_seconds: float = 60.0
+    predict_llm_cache_max_entries: int = 1024
+    predict_llm_coalesce_decimals: int = 4
+    # Gemini summaries
+    gemini_model: str = "gemini-1.5-flash"
+    gemini_deadline_seconds: float = 2.5
+    summary_cache_ttl_seconds: float = 6 * 3600.0
+    summary_cache_max_entries: int = 2048
+    # Responses smaller than this are sent uncompressed
+    gzip_minimum_size: int = 1000
+    # Trained model artifacts (see app/models/train.py); TRAFFIC_MODEL_PATH pins one file
+    traffic_model_dir: str = "models"
+    traffic_model_path: str | None = None
+    # Candidate artifact served to a slice of /api/predict traffic for A/B comparison
+    traffic_model_candidate_path: str | None = None
+    traffic_model_candidate_percent: int = 0
+    # How often the model directory is checked for new artifacts (0 disables hot reload)
+    traffic_model_poll_seconds: float = 10.0
+    # Background cache warming (see app/services/prefetch.py)
+    prefetch_enabled: bool = True
+    prefetch_interval_seconds: float = 300.0
+    prefetch_jitter: float = 0.2
+    prefetch_concurrency: int = 4
+    # Entries expiring sooner than this are reloaded by the next cycle
+    prefetch_refresh_ahead_seconds: float = 900.0
+    prefetch_backoff_max_seconds: float = 3600.0
+    prefetch_sw_lat: float = 37.70
+    prefetch_sw_lng: float = -122.52
+    prefetch_ne_lat: float = 37.82
+    prefetch_ne_lng: float = -122.36
+    prefetch_weather_step_deg: float = 0.02
+    prefetch_weather_days: int = 2
+    prefetch_event_queries: List[str] = ["San Francisco"]
+    prefetch_event_days: int = 3
+    prefetch_top_places: int = 20
+    # Startup warm-up gating /api/ready (see app/services/warmup.py)
+    warmup_prime_caches: bool = True
+    warmup_timeout_seconds: float = 20.0
 
     @field_validator("cors_allow_origins", mode="before")
     @classmethod
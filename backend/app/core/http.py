@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import importlib.util
+from typing import Dict
+
+import httpx
+
+from app.core.config import settings
+
+
+# Upstream name -> (read timeout, max connections) from Settings
+def _upstream_limits() -> Dict[str, tuple[float, int]]:
+    return {
+        "open_meteo": (settings.open_meteo_timeout, settings.open_meteo_max_connections),
+        "serpapi": (settings.serpapi_timeout, settings.serpapi_max_connections),
+        "outscraper": (settings.outscraper_timeout, settings.outscraper_max_connections),
+    }
+
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_available() -> bool:
+    # httpx only speaks HTTP/2 when the optional `h2` package is installed
+    return settings.http2_enabled and importlib.util.find_spec("h2") is not None
+
+
+def _build_client(upstream: str) -> httpx.AsyncClient:
+    read_timeout, max_connections = _upstream_limits()[upstream]
+    return httpx.AsyncClient(
+        http2=_http2_available(),
+        timeout=httpx.Timeout(read_timeout, connect=settings.http_connect_timeout),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(max_connections, settings.http_max_keepalive_connections),
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+    )
+
+
+def get_client(upstream: str) -> httpx.AsyncClient:
+    """Return the shared, pooled client for an upstream.
+
+    Clients are normally created by `open_clients()` in the app lifespan; outside
+    of the app (scripts, REPL) they are created lazily on first use.
+    """
+    client = _clients.get(upstream)
+    if client is None or client.is_closed:
+        client = _build_client(upstream)
+        _clients[upstream] = client
+    return client
+
+
+async def open_clients() -> None:
+    for upstream in _upstream_limits():
+        get_client(upstream)
+
+
+async def close_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
@@ -0,0 +1,181 @@
+"""In-process metrics rendered as Prometheus text at /api/metrics.
+
+Hot-path cost is one perf_counter pair and a few integer updates per stage:
+
+    with track("open_meteo") as stage:
+        ...
+        stage.fail()  # for errors that are returned rather than raised
+"""
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+# Upper bounds (seconds) of the latency buckets; the last one catches everything
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Bucket upper bound containing the q-th observation (an upper estimate)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_seconds": self.total / self.count if self.count else None,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "buckets": {_le(b): n for b, n in zip(self.buckets, self.counts)},
+        }
+
+
+class Stage:
+    """Latency, errors and in-flight count for one named stage."""
+
+    __slots__ = ("name", "latency", "in_flight")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latency = LatencyHistogram()
+        self.in_flight = 0
+
+
+class _Span:
+    __slots__ = ("stage", "started", "failed")
+
+    def __init__(self, stage: Stage):
+        self.stage = stage
+        self.failed = False
+
+    def fail(self) -> None:
+        self.failed = True
+
+    def __enter__(self) -> "_Span":
+        self.stage.in_flight += 1
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.stage.latency.observe(time.perf_counter() - self.started, error=self.failed or exc_type is not None)
+        self.stage.in_flight -= 1
+        return False
+
+
+_stages: Dict[str, Stage] = {}
+# Extra sources of samples (caches, upstreams, models), polled at scrape time
+_collectors: List[Callable[[], Iterable[str]]] = []
+_caches: Dict[str, object] = {}
+
+
+def track(name: str) -> _Span:
+    stage = _stages.get(name)
+    if stage is None:
+        stage = _stages[name] = Stage(name)
+    return _Span(stage)
+
+
+def register_cache(name: str, cache) -> None:
+    """Report an AsyncTTLCache's hit/miss counters under `name`."""
+    _caches[name] = cache
+
+
+def register_collector(collect: Callable[[], Iterable[str]]) -> None:
+    _collectors.append(collect)
+
+
+def render() -> str:
+    lines: List[str] = []
+    lines += histogram_lines(
+        "app_stage_duration_seconds", "Latency of each instrumented stage.",
+        [({"stage": s.name}, s.latency) for s in _stages.values()],
+    )
+    lines += header("app_stage_errors_total", "counter", "Stage calls that raised or returned an error.")
+    lines += [sample("app_stage_errors_total", {"stage": s.name}, s.latency.errors) for s in _stages.values()]
+    lines += header("app_stage_in_flight", "gauge", "Stage calls currently running.")
+    lines += [sample("app_stage_in_flight", {"stage": s.name}, s.in_flight) for s in _stages.values()]
+
+    caches = [(name, cache.stats()) for name, cache in _caches.items()]
+    for metric, key, kind, help_text in (
+        ("app_cache_hits_total", "hits", "counter", "Cache lookups served from memory."),
+        ("app_cache_misses_total", "misses", "counter", "Cache lookups that loaded from the source."),
+        ("app_cache_coalesced_total", "coalesced", "counter", "Lookups that joined an in-flight load."),
+        ("app_cache_shared_hits_total", "shared_hits", "counter", "Local misses served by the shared cache backend."),
+        ("app_cache_hit_ratio", "hit_ratio", "gauge", "(hits + coalesced + shared hits) / lookups."),
+        ("app_cache_entries", "size", "gauge", "Entries currently cached."),
+    ):
+        lines += header(metric, kind, help_text)
+        lines += [sample(metric, {"cache": name}, stats[key]) for name, stats in caches]
+
+    for collect in _collectors:
+        try:
+            lines += list(collect())
+        except Exception:
+            pass
+    return "\n".join(lines) + "\n"
+
+
+def histogram_lines(name: str, help_text: str, series: Sequence[tuple]) -> List[str]:
+    """Prometheus lines for (labels, LatencyHistogram) pairs."""
+    lines = header(name, "histogram", help_text)
+    for labels, hist in series:
+        cumulative = 0
+        for bound, n in zip(hist.buckets, hist.counts):
+            cumulative += n
+            lines.append(sample(f"{name}_bucket", {**labels, "le": _le(bound)}, cumulative))
+        lines.append(sample(f"{name}_sum", labels, hist.total))
+        lines.append(sample(f"{name}_count", labels, hist.count))
+    return lines
+
+
+def header(name: str, kind: str, help_text: str) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def sample(name: str, labels: dict, value) -> str:
+    if labels:
+        body = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+        return f"{name}{{{body}}} {_number(value)}"
+    return f"{name} {_number(value)}"
+
+
+def _le(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _number(value) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
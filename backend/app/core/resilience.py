@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.metrics import LatencyHistogram
+
+
+T = TypeVar("T")
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling an upstream that is failing or saturated."""
+
+
+class CircuitBreaker:
+    """Opens when the recent failure ratio spikes; half-opens for one probe after a cooldown.
+
+    `allow()` hands out a token that the call passes back to `record()`. The
+    token changes whenever the breaker opens, probes or closes, so a call that
+    started before then can't close the breaker or disturb a running probe.
+    """
+
+    def __init__(self, window: int, failure_ratio: float, min_calls: int, cooldown_seconds: float):
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.cooldown_seconds = cooldown_seconds
+        self._outcomes: deque = deque(maxlen=window)
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        # Token of the current closed period, or of the running probe
+        self._epoch = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> Optional[int]:
+        """A token for `record()` if the call may go ahead, else None."""
+        state = self.state
+        if state == "closed":
+            return self._epoch
+        if state == "half_open" and not self._probing:
+            # Let exactly one request through to test the upstream
+            self._probing = True
+            self._epoch += 1
+            return self._epoch
+        return None
+
+    def cancel_probe(self, token: int) -> None:
+        # The probe was abandoned without an answer; let the next request try
+        if token == self._epoch and self._opened_at is not None:
+            self._probing = False
+
+    def record(self, token: int, success: bool) -> None:
+        if token != self._epoch:
+            # Started before the breaker last changed state
+            return
+        if self._opened_at is not None:
+            self._probing = False
+            self._epoch += 1
+            if success:
+                self._opened_at = None
+                self._outcomes.clear()
+            else:
+                self._opened_at = time.monotonic()
+            return
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_ratio:
+            self._opened_at = time.monotonic()
+            self._epoch += 1
+            self.times_opened += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": self._outcomes.count(False),
+            "times_opened": self.times_opened,
+        }
+
+
+class Upstream:
+    """Concurrency cap, circuit breaker and hedged requests for one upstream.
+
+    `call` races `attempt(endpoint)` across endpoints: the first starts at once,
+    each next one after `hedge_delay` (or as soon as an earlier one fails), and
+    the first non-None result wins. An attempt raises on transport or HTTP
+    errors; returning None means "answered, but nothing found".
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        queue_timeout: float,
+        hedge_delay: float,
+        deadline: float,
+        breaker: CircuitBreaker,
+    ):
+        self.name = name
+        self.queue_timeout = queue_timeout
+        self.hedge_delay = hedge_delay
+        self.deadline = deadline
+        self.breaker = breaker
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.rejected = 0
+        self.latency: Dict[str, LatencyHistogram] = {}
+
+    async def call(self, endpoints: List[str], attempt: Callable[[str], Awaitable[Optional[T]]]) -> Optional[T]:
+        # Fail fast without queueing while the breaker is open
+        if self.breaker.state == "open":
+            self.rejected += 1
+            raise UpstreamUnavailable(f"{self.name}: circuit open")
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Saturated rather than failing, so this doesn't count against the breaker
+            self.rejected += 1
+            raise UpstreamUnavailable(f"{self.name}: too many concurrent requests")
+        token = self.breaker.allow()
+        if token is None:
+            self._semaphore.release()
+            self.rejected += 1
+            raise UpstreamUnavailable(f"{self.name}: circuit open")
+        self.in_flight += 1
+        try:
+            result = await asyncio.wait_for(self._hedged(endpoints, attempt), timeout=self.deadline)
+        except asyncio.CancelledError:
+            self.breaker.cancel_probe(token)
+            raise
+        except Exception as e:
+            self.breaker.record(token, False)
+            raise UpstreamUnavailable(f"{self.name}: {str(e) or type(e).__name__}") from e
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+        self.breaker.record(token, True)
+        return result
+
+    async def _hedged(self, endpoints: List[str], attempt: Callable[[str], Awaitable[Optional[T]]]) -> Optional[T]:
+        pending: set = set()
+        remaining = list(endpoints)
+        errors: List[BaseException] = []
+        answered = False
+        try:
+            while remaining or pending:
+                if remaining:
+                    pending.add(asyncio.create_task(self._timed(remaining.pop(0), attempt)))
+                # Hedge: wait briefly for the in-flight attempts, then launch the next endpoint
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                        continue
+                    answered = True
+                    if task.result() is not None:
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+        if answered:
+            return None
+        raise errors[-1] if errors else RuntimeError("no endpoints")
+
+    async def _timed(self, endpoint: str, attempt: Callable[[str], Awaitable[Optional[T]]]) -> Optional[T]:
+        hist = self.latency.setdefault(endpoint, LatencyHistogram())
+        started = time.perf_counter()
+        try:
+            result = await attempt(endpoint)
+        except asyncio.CancelledError:
+            # Lost the race to a hedge; not an upstream error
+            raise
+        except Exception:
+            hist.observe(time.perf_counter() - started, error=True)
+            raise
+        hist.observe(time.perf_counter() - started)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "breaker": self.breaker.as_dict(),
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "rejected": self.rejected,
+            "endpoints": {endpoint: hist.as_dict() for endpoint, hist in self.latency.items()},
+        }
+
+
+# Upstream name -> Upstream kwargs from Settings (compare app/core/http.py)
+def _upstream_settings() -> Dict[str, dict]:
+    return {
+        "outscraper": dict(
+            max_concurrency=settings.outscraper_max_concurrency,
+            queue_timeout=settings.outscraper_queue_timeout,
+            hedge_delay=settings.outscraper_hedge_delay,
+            deadline=settings.outscraper_deadline_seconds,
+        ),
+    }
+
+
+_upstreams: Dict[str, Upstream] = {}
+
+
+def get_upstream(name: str) -> Upstream:
+    """Shared resilience wrapper for an upstream, configured from Settings."""
+    upstream = _upstreams.get(name)
+    if upstream is None:
+        upstream = _upstreams[name] = Upstream(
+            name,
+            **_upstream_settings()[name],
+            breaker=CircuitBreaker(
+                window=settings.upstream_breaker_window,
+                failure_ratio=settings.upstream_breaker_failure_ratio,
+                min_calls=settings.upstream_breaker_min_calls,
+                cooldown_seconds=settings.upstream_breaker_cooldown_seconds,
+            ),
+        )
+    return upstream
+
+
+def upstream_stats() -> dict:
+    return {name: upstream.stats() for name, upstream in _upstreams.items()}
+
+
+def _collect() -> Iterable[str]:
+    upstreams = list(_upstreams.values())
+    yield from metrics.histogram_lines(
+        "app_upstream_endpoint_duration_seconds", "Latency of each upstream endpoint attempt.",
+        [({"upstream": u.name, "endpoint": e}, h) for u in upstreams for e, h in u.latency.items()],
+    )
+    yield from metrics.header("app_upstream_endpoint_errors_total", "counter", "Failed upstream endpoint attempts.")
+    for u in upstreams:
+        for e, h in u.latency.items():
+            yield metrics.sample("app_upstream_endpoint_errors_total", {"upstream": u.name, "endpoint": e}, h.errors)
+    yield from metrics.header("app_upstream_circuit_open", "gauge", "1 while the circuit breaker rejects calls.")
+    yield from (metrics.sample("app_upstream_circuit_open", {"upstream": u.name}, u.breaker.state == "open") for u in upstreams)
+    yield from metrics.header("app_upstream_rejected_total", "counter", "Calls refused by the breaker or concurrency cap.")
+    yield from (metrics.sample("app_upstream_rejected_total", {"upstream": u.name}, u.rejected) for u in upstreams)
+    yield from metrics.header("app_upstream_in_flight", "gauge", "Upstream calls holding a concurrency slot.")
+    yield from (metrics.sample("app_upstream_in_flight", {"upstream": u.name}, u.in_flight) for u in upstreams)
+
+
+metrics.register_collector(_collect)
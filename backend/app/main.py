@@ -1,15 +1,58 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
+from app.core import metrics
+from app.core.cache_backends import close_cache_backend
 from app.core.config import settings
+from app.core.http import open_clients, close_clients
+from app.models.registry import get_registry
+from app.services.prefetch import start_prefetch, stop_prefetch
+from app.services.warmup import start_warmup, stop_warmup, warmup_status
 from app.api.routes.weather import router as weather_router
 from app.api.routes.events import router as events_router
 from app.api.routes.foot_traffic import router as foot_router
 from app.api.routes.predict import router as predict_router
 from app.api.routes.predict_llm import router as predict_llm_router
+from app.api.routes.search import router as search_router
+from app.api.routes.models import router as models_router
+from app.api.routes.upstreams import router as upstreams_router
+from app.api.routes.heatmap import router as heatmap_router
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP client per upstream, shared by every request
+    await open_clients()
+    # Load the model artifacts now rather than on the first request, then watch for new ones
+    registry = get_registry()
+    registry.start()
+    # Gemini, the place index and the caches warm up in the background; see /api/ready
+    start_warmup()
+    # Keep weather, events and hot places warm so handlers mostly hit cache
+    start_prefetch()
+    try:
+        yield
+    finally:
+        await stop_warmup()
+        await stop_prefetch()
+        await registry.stop()
+        await close_clients()
+        await close_cache_backend()
+
 
+app = FastAPI(title="SF Food Truck Spot Finder API", lifespan=lifespan, default_response_class=DefaultResponse)
 
-app = FastAPI(title="SF Food Truck Spot Finder API")
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +67,10 @@ app.include_router(events_router, prefix="/api/events", tags=["events"])
 app.include_router(foot_router, prefix="/api/foot-traffic", tags=["foot-traffic"])
 app.include_router(predict_router, prefix="/api/predict", tags=["predict"])
 app.include_router(predict_llm_router, prefix="/api/predict-llm", tags=["predict-llm"])
+app.include_router(search_router, prefix="/api/search", tags=["search"])
+app.include_router(models_router, prefix="/api/models", tags=["models"])
+app.include_router(upstreams_router, prefix="/api/upstreams", tags=["upstreams"])
+app.include_router(heatmap_router, prefix="/api/heatmap", tags=["heatmap"])
 
 
 @app.get("/api/health")
@@ -31,3 +78,18 @@ def health():
     return {"status": "ok"}
 
 
+# async, so these read the stats dicts on the event loop that updates them rather
+# than from the threadpool mid-update
+@app.get("/api/ready")
+async def ready():
+    # Readiness, unlike /api/health (liveness): 503 until the warm-up has finished
+    status = warmup_status()
+    return DefaultResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
@@ -1,13 +1,30 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from sklearn.linear_model import LinearRegression
+import glob
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
 import numpy as np
 
 
+FEATURE_NAMES = ["weather_score", "event_score", "historical_score"]
+
+
 @dataclass
 class TrafficModel:
-    reg: LinearRegression
+    # Linear model over FEATURE_NAMES: score = coef . features + intercept
+    coef: np.ndarray
+    intercept: float
+    version: str = "mock"
+    metadata: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.coef = np.ascontiguousarray(self.coef, dtype=np.float64)
+        self.intercept = float(self.intercept)
+        # Plain floats for the scalar path: three multiply-adds, no arrays
+        self._w, self._e, self._h = (float(c) for c in self.coef)
 
     @staticmethod
     def train_mock() -> "TrafficModel":
@@ -22,23 +39,74 @@ class TrafficModel:
         ])
         # target score in [0,1]
         y = np.array([0.75, 0.2, 0.4, 0.95, 0.6, 0.7])
-        reg = LinearRegression().fit(X, y)
-        return TrafficModel(reg=reg)
+        # Ordinary least squares with an intercept column (what LinearRegression fits),
+        # without importing sklearn on the serving path
+        solution, *_ = np.linalg.lstsq(np.column_stack([X, np.ones(len(X))]), y, rcond=None)
+        return TrafficModel(coef=solution[:-1], intercept=float(solution[-1]))
+
+    @staticmethod
+    def load(path: str) -> "TrafficModel":
+        """Load an artifact written by `save` (see app/models/train.py)."""
+        with open(path, "r", encoding="utf-8") as f:
+            artifact = json.load(f)
+        if artifact.get("feature_names") != FEATURE_NAMES:
+            raise ValueError(f"{path}: unexpected feature_names {artifact.get('feature_names')}")
+        return TrafficModel(
+            coef=np.asarray(artifact["coef"], dtype=np.float64),
+            intercept=float(artifact["intercept"]),
+            version=str(artifact["version"]),
+            metadata={k: v for k, v in artifact.items() if k not in ("coef", "intercept", "version")},
+        )
+
+    def save(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"traffic-model-{self.version}.json")
+        artifact = {
+            "version": self.version,
+            "feature_names": FEATURE_NAMES,
+            "coef": [float(c) for c in self.coef],
+            "intercept": float(self.intercept),
+            "saved_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **self.metadata,
+        }
+        # Write then rename so a watcher never sees a half-written artifact
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, indent=2)
+        os.replace(tmp, path)
+        return path
 
     def predict(self, weather: float, events: float, historical: float) -> float:
-        features = np.array([[weather, events, historical]])
-        pred = float(self.reg.predict(features)[0])
+        pred = self._w * weather + self._e * events + self._h * historical + self.intercept
         return max(0.0, min(1.0, pred))
 
+    def predict_many(self, features: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Score an (n, 3) matrix of [weather, events, historical] rows in one call.
 
-# Singleton mock model
-model_instance: TrafficModel | None = None
+        Pass a preallocated float64 `out` of shape (n,) to score without allocating.
+        """
+        out = np.dot(features, self.coef, out=out)
+        out += self.intercept
+        return np.clip(out, 0.0, 1.0, out=out)
 
+    def upper_bound(self, historical: np.ndarray) -> np.ndarray:
+        """Highest score reachable for each historical value.
+
+        The weather and event features live in [0, 1], so with a linear model the
+        best case adds every positive coefficient at 1 and nothing else.
+        """
+        best = self.intercept + max(self._w, 0.0) + max(self._e, 0.0)
+        return np.clip(best + self._h * np.asarray(historical, dtype=np.float64), 0.0, 1.0)
 
-def get_model() -> TrafficModel:
-    global model_instance
-    if model_instance is None:
-        model_instance = TrafficModel.train_mock()
-    return model_instance
 
+def latest_artifact(directory: str) -> str | None:
+    # Versions start with a UTC timestamp, so the lexically last file is the newest
+    paths = sorted(glob.glob(os.path.join(directory, "traffic-model-*.json")))
+    return paths[-1] if paths else None
+
+
+def get_model() -> TrafficModel:
+    """The active model; see app/models/registry.py for reloads and A/B routing."""
+    from app.models.registry import get_registry
 
+    return get_registry().active
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.prediction_model import TrafficModel, latest_artifact
+
+
+SCORE_BUCKETS = 10
+# Fingerprint that never matches a file, so the first poll always loads
+_UNLOADED = ("", -1)
+
+
+class _ModelStats:
+    """Latency and score-distribution counters for one model version."""
+
+    def __init__(self, role: str):
+        self.role = role
+        self.requests = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.score_total = 0.0
+        self.score_buckets = np.zeros(SCORE_BUCKETS, dtype=np.int64)
+
+    def record(self, latency_seconds: float, score: float) -> None:
+        self.requests += 1
+        self.latency_total += latency_seconds
+        self.latency_max = max(self.latency_max, latency_seconds)
+        self.score_total += score
+        self.score_buckets[min(int(score * SCORE_BUCKETS), SCORE_BUCKETS - 1)] += 1
+
+    def as_dict(self) -> dict:
+        n = self.requests
+        return {
+            "role": self.role,
+            "requests": n,
+            "latency_ms_avg": self.latency_total / n * 1000 if n else 0.0,
+            "latency_ms_max": self.latency_max * 1000,
+            "score_mean": self.score_total / n if n else 0.0,
+            # Counts of scores in [0, 0.1), [0.1, 0.2), ... [0.9, 1.0]
+            "score_histogram": self.score_buckets.tolist(),
+        }
+
+
+class ModelRegistry:
+    """Active model plus an optional candidate, hot-reloaded from disk.
+
+    The active model is TRAFFIC_MODEL_PATH or the newest artifact in
+    TRAFFIC_MODEL_DIR; the candidate is TRAFFIC_MODEL_CANDIDATE_PATH and gets
+    TRAFFIC_MODEL_CANDIDATE_PERCENT of prediction traffic. A background task
+    polls file mtimes and loads changed artifacts in a worker thread; the swap
+    itself is a single attribute assignment, so requests never wait on it.
+    """
+
+    def __init__(self):
+        self.active: Optional[TrafficModel] = None
+        self.candidate: Optional[TrafficModel] = None
+        self.candidate_percent = settings.traffic_model_candidate_percent
+        self._fingerprints: Dict[str, Optional[Tuple[str, int]]] = {"active": _UNLOADED, "candidate": _UNLOADED}
+        self._stats: Dict[str, _ModelStats] = {}
+        self._watcher: Optional[asyncio.Task] = None
+        self.last_error: Optional[str] = None
+
+    def route(self, key: str) -> TrafficModel:
+        """Model to serve `key`; the same key always lands on the same model."""
+        candidate = self.candidate
+        if candidate is not None and zlib.crc32(key.encode()) % 100 < self.candidate_percent:
+            return candidate
+        return self.active
+
+    def record(self, model: TrafficModel, latency_seconds: float, score: float) -> None:
+        role = "candidate" if model is self.candidate else "active"
+        stats = self._stats.get(model.version)
+        if stats is None:
+            stats = self._stats[model.version] = _ModelStats(role)
+        stats.role = role
+        stats.record(latency_seconds, score)
+
+    def reload_if_changed(self) -> bool:
+        """Load any artifact whose path or mtime changed; True if a model was swapped."""
+        swapped = False
+        active_path = settings.traffic_model_path or latest_artifact(settings.traffic_model_dir)
+        for role, path in (("active", active_path), ("candidate", settings.traffic_model_candidate_path)):
+            fingerprint = _fingerprint(path)
+            if fingerprint == self._fingerprints[role]:
+                continue
+            try:
+                model = TrafficModel.load(path) if fingerprint else None
+            except Exception as e:
+                # Keep serving the previous model; a half-copied file is retried next poll
+                self.last_error = f"{path}: {e}"
+                if role == "active" and self.active is None:
+                    self.active = TrafficModel.train_mock()
+                continue
+            self._fingerprints[role] = fingerprint
+            if role == "active":
+                self.active = model if model is not None else TrafficModel.train_mock()
+            else:
+                self.candidate = model
+            swapped = True
+        return swapped
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(settings.traffic_model_poll_seconds)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                self.last_error = str(e)
+
+    def start(self) -> None:
+        if self._watcher is None and settings.traffic_model_poll_seconds > 0:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    def stats(self) -> dict:
+        candidate = self.candidate
+        return {
+            "active": _describe(self.active, self._fingerprints["active"]),
+            "candidate": _describe(candidate, self._fingerprints["candidate"]) if candidate else None,
+            "candidate_percent": self.candidate_percent if candidate else 0,
+            "last_error": self.last_error,
+            "models": {version: s.as_dict() for version, s in self._stats.items()},
+        }
+
+
+def _fingerprint(path: Optional[str]) -> Optional[Tuple[str, int]]:
+    if not path:
+        return None
+    try:
+        return path, os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _describe(model: TrafficModel, fingerprint: Optional[Tuple[str, int]]) -> dict:
+    return {
+        "version": model.version,
+        "path": fingerprint[0] if fingerprint else None,
+        "coef": [float(c) for c in model.coef],
+        "intercept": model.intercept,
+    }
+
+
+_registry: ModelRegistry | None = None
+
+
+def get_registry() -> ModelRegistry:
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+        _registry.reload_if_changed()
+    return _registry
+
+
+def _collect() -> Iterable[str]:
+    if _registry is None:
+        return
+    models = list(_registry._stats.items())
+    yield from metrics.header("app_model_predictions_total", "counter", "Predictions served per model version.")
+    for version, s in models:
+        yield metrics.sample("app_model_predictions_total", {"version": version, "role": s.role}, s.requests)
+    yield from metrics.header("app_model_score_mean", "gauge", "Mean predicted score per model version.")
+    for version, s in models:
+        yield metrics.sample("app_model_score_mean", {"version": version, "role": s.role},
+                             s.score_total / s.requests if s.requests else None)
+
+
+metrics.register_collector(_collect)
@@ -0,0 +1,108 @@
+"""Offline training for TrafficModel.
+
+Usage (from backend/):
+
+    python -m app.models.train --data data/training.csv [--out models]
+
+The input is a CSV (or .parquet / .jsonl) of historical rows with the same
+features `predict_score` computes plus the observed outcome:
+
+    historical_baseline  popular-times busyness for the slot, 0..1
+    weather_modifier     `_weather_modifier` output, ~0.7..1.3
+    event_modifier       `_event_modifier` output, 1.0..1.5
+    observed             measured traffic, 0..1 (or 0..100)
+
+The fitted coefficients are written as a versioned JSON artifact to the model
+directory, where the app picks up the newest one at startup.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.models.prediction_model import FEATURE_NAMES, TrafficModel
+
+
+REQUIRED_COLUMNS = ["historical_baseline", "weather_modifier", "event_modifier", "observed"]
+
+
+def read_rows(path: str) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    elif path.endswith(".jsonl") or path.endswith(".ndjson"):
+        df = pd.read_json(path, lines=True)
+    else:
+        df = pd.read_csv(path)
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing}")
+    return df[REQUIRED_COLUMNS].apply(pd.to_numeric, errors="coerce").dropna()
+
+
+def build_features(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized twin of predict_service._model_features plus the target."""
+    X = np.column_stack([
+        np.clip((df["weather_modifier"].to_numpy() - 0.7) / 0.6, 0.0, 1.0),
+        np.clip((df["event_modifier"].to_numpy() - 1.0) / 0.5, 0.0, 1.0),
+        np.clip(df["historical_baseline"].to_numpy(), 0.0, 1.0),
+    ])
+    y = df["observed"].to_numpy(dtype=np.float64)
+    if y.max(initial=0.0) > 1.0:
+        # Observed counts given as percentages
+        y = y / 100.0
+    return X, np.clip(y, 0.0, 1.0)
+
+
+def fit(X: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, float, float]:
+    """Least-squares fit with intercept; returns (coef, intercept, r2)."""
+    A = np.column_stack([X, np.ones(len(X))])
+    solution, *_ = np.linalg.lstsq(A, y, rcond=None)
+    coef, intercept = solution[:-1], float(solution[-1])
+    residual = y - (X @ coef + intercept)
+    total = ((y - y.mean()) ** 2).sum()
+    r2 = 1.0 - float((residual ** 2).sum() / total) if total > 0 else 0.0
+    return coef, intercept, r2
+
+
+def artifact_version(coef: np.ndarray, intercept: float) -> str:
+    """UTC timestamp plus a short hash of the weights.
+
+    Runs within the same second (a CI retry, variants trained in a loop) only
+    share a version, and so an artifact file, when they fitted the same model.
+    """
+    weights = np.append(np.asarray(coef, dtype=np.float64), intercept)
+    digest = hashlib.blake2b(weights.tobytes(), digest_size=4).hexdigest()
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{digest}"
+
+
+def train(data_path: str, out_dir: str) -> str:
+    df = read_rows(data_path)
+    if len(df) < len(FEATURE_NAMES) + 1:
+        raise ValueError(f"{data_path}: need at least {len(FEATURE_NAMES) + 1} usable rows, got {len(df)}")
+    X, y = build_features(df)
+    coef, intercept, r2 = fit(X, y)
+    model = TrafficModel(
+        coef=coef,
+        intercept=intercept,
+        version=artifact_version(coef, intercept),
+        metadata={"n_samples": int(len(y)), "r2": r2, "source": data_path},
+    )
+    return model.save(out_dir)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Fit TrafficModel from historical feature rows.")
+    parser.add_argument("--data", required=True, help="CSV, .parquet or .jsonl of training rows")
+    parser.add_argument("--out", default=settings.traffic_model_dir, help="Directory for the versioned artifact")
+    args = parser.parse_args(argv)
+    path = train(args.data, args.out)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Columnar view of an events payload for vectorized scoring.
+
+`_normalize_serpapi_events` turns each SerpApi result into a flat record with
+coordinates, expected attendance and a start/end window; `EventTable` stacks
+those records into NumPy columns so the event modifier for many points and a
+time slot is a couple of array operations instead of a per-event Python loop.
+"""
+from __future__ import annotations
+
+import math
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0
+# Influence decays as exp(-DECAY_PER_KM * d): ~0.3 at 1km, tiny beyond 3km
+DECAY_PER_KM = 1.2
+MAX_MODIFIER = 1.5
+# Events without coordinates are somewhere in the city: a small flat nudge each
+NO_GEO_INFLUENCE = 0.05
+# Attendance scales an event's influence relative to a typical event, within bounds
+TYPICAL_ATTENDANCE = 1000.0
+ATTENDANCE_WEIGHT_RANGE = (0.5, 2.0)
+# Assumed duration when only a start time is listed
+DEFAULT_DURATION = timedelta(hours=3)
+
+_TIME_RANGE = re.compile(
+    r"\b(\d{1,2})(?::(\d{2}))?\s*([AP]M)?\s*[–-]\s*(\d{1,2})(?::(\d{2}))?\s*([AP]M)\b", re.IGNORECASE
+)
+_TIME = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*([AP]M)\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class EventTable:
+    lat: np.ndarray  # NaN when the event has no geo
+    lng: np.ndarray
+    attendance: np.ndarray  # NaN when unknown
+    start: np.ndarray  # datetime64[m], NaT when unknown
+    end: np.ndarray
+    # Per event (lat rad, lng rad, cos lat, weight, start, end) as Python scalars for
+    # the single-point loop; lat is None without geo, start/end None when unknown
+    rows: tuple = field(default=(), compare=False, repr=False)
+
+    @classmethod
+    def from_records(cls, events: List[dict]) -> "EventTable":
+        def column(name: str) -> np.ndarray:
+            return np.array([_float(ev.get(name)) for ev in events], dtype=np.float64)
+
+        def times(name: str) -> np.ndarray:
+            return np.array([ev.get(name) or "NaT" for ev in events], dtype="datetime64[m]")
+
+        table = cls(column("latitude"), column("longitude"), column("attendance"), times("start"), times("end"))
+        weight = table.weights()
+        rows = []
+        for i in range(len(events)):
+            lat, lng = table.lat[i], table.lng[i]
+            geo = not (np.isnan(lat) or np.isnan(lng))
+            start, end = table.start[i], table.end[i]
+            known = not (np.isnat(start) or np.isnat(end))
+            rows.append((
+                math.radians(lat) if geo else None,
+                math.radians(lng) if geo else None,
+                math.cos(math.radians(lat)) if geo else None,
+                float(weight[i]),
+                start.astype(datetime) if known else None,
+                end.astype(datetime) if known else None,
+            ))
+        object.__setattr__(table, "rows", tuple(rows))
+        return table
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def active(self, slot: Optional[datetime]) -> np.ndarray:
+        """Events overlapping the hour starting at `slot`; unknown times always count."""
+        if slot is None:
+            return np.ones(len(self), dtype=bool)
+        lo = np.datetime64(slot.replace(minute=0, second=0, microsecond=0), "m")
+        hi = lo + np.timedelta64(60, "m")
+        unknown = np.isnat(self.start) | np.isnat(self.end)
+        return unknown | ((self.start < hi) & (self.end > lo))
+
+    def modifiers(self, lats, lngs, slot: Optional[datetime] = None) -> np.ndarray:
+        """Event modifier (1.0..MAX_MODIFIER) for each (lat, lng) point at `slot`."""
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lngs = np.atleast_1d(np.asarray(lngs, dtype=np.float64))
+        mask = self.active(slot)
+        has_geo = mask & ~np.isnan(self.lat) & ~np.isnan(self.lng)
+        weight = self.weights()
+
+        total = np.full(lats.shape, NO_GEO_INFLUENCE * float(weight[mask & ~has_geo].sum()))
+        if has_geo.any():
+            # (points, events) distance matrix for the events that are on
+            d = haversine_km(lats[:, None], lngs[:, None], self.lat[has_geo], self.lng[has_geo])
+            total += np.exp(-DECAY_PER_KM * d) @ weight[has_geo]
+        return np.minimum(MAX_MODIFIER, 1.0 + total)
+
+    def modifier(self, lat: float, lng: float, slot: Optional[datetime] = None) -> float:
+        """`modifiers` for a single point, as a plain loop over `rows`.
+
+        One /api/predict point costs far less this way than broadcasting the
+        columns.
+        """
+        if slot is not None:
+            lo = slot.replace(minute=0, second=0, microsecond=0)
+            hi = lo + timedelta(hours=1)
+        lat_r, lng_r = math.radians(lat), math.radians(lng)
+        cos_lat = math.cos(lat_r)
+        total = 0.0
+        for ev_lat, ev_lng, ev_cos, weight, start, end in self.rows:
+            if slot is not None and start is not None and not (start < hi and end > lo):
+                continue
+            if ev_lat is None:
+                total += NO_GEO_INFLUENCE * weight
+                continue
+            a = math.sin((ev_lat - lat_r) / 2) ** 2 + cos_lat * ev_cos * math.sin((ev_lng - lng_r) / 2) ** 2
+            total += math.exp(-DECAY_PER_KM * 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))) * weight
+        return min(MAX_MODIFIER, 1.0 + total)
+
+    def weights(self) -> np.ndarray:
+        """Influence weight per event from its attendance."""
+        return np.clip(
+            np.where(np.isnan(self.attendance), TYPICAL_ATTENDANCE, self.attendance) / TYPICAL_ATTENDANCE,
+            *ATTENDANCE_WEIGHT_RANGE,
+        )
+
+
+def haversine_km(lat1, lng1, lat2, lng2) -> np.ndarray:
+    lat1, lng1, lat2, lng2 = (np.radians(a) for a in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+EMPTY = EventTable.from_records([])
+
+# Tables built per payload; holding the payload keeps its id from being reused
+_tables: "OrderedDict[int, Tuple[dict, EventTable]]" = OrderedDict()
+_TABLES_MAX = 256
+
+
+def table_for(payload) -> EventTable:
+    """EventTable for an events payload, built once per fetched payload."""
+    if not isinstance(payload, dict) or payload.get("error"):
+        return EMPTY
+    entry = _tables.get(id(payload))
+    if entry is not None and entry[0] is payload:
+        _tables.move_to_end(id(payload))
+        return entry[1]
+    events = ((payload.get("data") or {}).get("events")) or []
+    table = EventTable.from_records(events)
+    _tables[id(payload)] = (payload, table)
+    while len(_tables) > _TABLES_MAX:
+        _tables.popitem(last=False)
+    return table
+
+
+def parse_when(date_info, day: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(start, end) ISO minutes for a SerpApi `date` block, best effort.
+
+    SerpApi gives e.g. {"start_date": "Oct 18", "when": "Sat, Oct 18, 7 – 10 PM"}.
+    The year comes from the requested `day`; a date without times covers the
+    whole day, and nothing parseable returns (None, None).
+    """
+    if not isinstance(date_info, dict):
+        return None, None
+    start_day = _event_day(date_info.get("start_date"), day)
+    if start_day is None:
+        return None, None
+    when = date_info.get("when") or ""
+
+    start = end = None
+    m = _TIME_RANGE.search(when)
+    if m:
+        end_t = _clock(m.group(4), m.group(5), m.group(6))
+        # "7 – 10 PM": the start inherits the end's AM/PM
+        start_t = _clock(m.group(1), m.group(2), m.group(3) or m.group(6))
+        if start_t and end_t:
+            start = datetime.combine(start_day, start_t)
+            end = datetime.combine(start_day, end_t)
+            if end <= start:
+                end += timedelta(days=1)
+    if start is None:
+        m = _TIME.search(when)
+        start_t = _clock(m.group(1), m.group(2), m.group(3)) if m else None
+        if start_t:
+            start = datetime.combine(start_day, start_t)
+            end = start + DEFAULT_DURATION
+        else:
+            start = datetime.combine(start_day, datetime.min.time())
+            end = start + timedelta(days=1)
+    return start.isoformat(timespec="minutes"), end.isoformat(timespec="minutes")
+
+
+def _event_day(start_date, day: Optional[str]) -> Optional[date]:
+    if not start_date:
+        return None
+    year = int(day[:4]) if day else datetime.now().year
+    try:
+        return datetime.strptime(f"{start_date} {year}", "%b %d %Y").date()
+    except ValueError:
+        return None
+
+
+def _clock(hour, minute, meridiem):
+    if not meridiem:
+        return None
+    h, m = int(hour), int(minute or 0)
+    if not 1 <= h <= 12 or m > 59:
+        return None
+    h = h % 12 + (12 if meridiem.upper() == "PM" else 0)
+    return datetime.min.time().replace(hour=h, minute=m)
+
+
+def _float(value) -> float:
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
@@ -1,40 +1,88 @@
+import copy
+
 import httpx
+from app.core import metrics
+from app.core.cache import AsyncTTLCache
 from app.core.config import settings
+from app.core.http import get_client
+from app.services.event_table import parse_when, table_for
+from app.services.place_store import normalize_query
+
 
+# SerpApi results keyed on (normalized query, day); see `events_key`
+events_cache = AsyncTTLCache(
+    ttl_seconds=settings.events_cache_ttl_seconds,
+    max_entries=settings.events_cache_max_entries,
+    name="events",
+)
+metrics.register_cache("events", events_cache)
 
-async def fetch_local_events(query: str, date_iso: str | None = None):
+
+async def fetch_local_events(
+    query: str,
+    date_iso: str | None = None,
+    client: httpx.AsyncClient | None = None,
+    refresh: bool = False,
+):
     # SerpApi Google Events integration
     if settings.serpapi_api_key:
-        params = {
-            "engine": "google_events",
-            # Bias the search to SF and the date text when present
-            "q": f"{query} San Francisco" if not date_iso else f"{query} San Francisco {date_iso[:10]}",
-            "hl": "en",
-            "gl": "us",
-            "location": "San Francisco, California",
-            "api_key": settings.serpapi_api_key,
-        }
-        async with httpx.AsyncClient(timeout=30) as client:
-            try:
-                resp = await client.get("https://serpapi.com/search.json", params=params)
-                resp.raise_for_status()
-                payload = resp.json()
-                normalized = _normalize_serpapi_events(payload)
-                return {"data": {"events": normalized}}
-            except Exception as e:
-                return {"error": str(e), "data": None}
-    # Fallback mock
-    return {
-        "data": {
-            "events": [
-                {"title": "Street Food Festival", "distance_km": 1.2, "attendance": 5000},
-                {"title": "Farmers Market", "distance_km": 0.8, "attendance": 1200},
-            ]
-        }
+        day = date_iso[:10] if date_iso else None
+        return await events_cache.get_or_load(
+            events_key(query, day),
+            lambda: _fetch_serpapi_events(query, day, client),
+            should_cache=lambda payload: not payload.get("error"),
+            refresh=refresh,
+        )
+    # Fallback mock; a copy, so callers that annotate it can't change it for later requests
+    return copy.deepcopy(_MOCK_EVENTS)
+
+
+_MOCK_EVENTS = {
+    "data": {
+        "events": [
+            {"title": "Street Food Festival", "latitude": 37.8065, "longitude": -122.4300, "attendance": 5000},
+            {"title": "Farmers Market", "latitude": 37.7955, "longitude": -122.3937, "attendance": 1200},
+        ]
     }
+}
+
+
+async def _fetch_serpapi_events(query: str, day: str | None, client: httpx.AsyncClient | None):
+    params = {
+        "engine": "google_events",
+        # Bias the search to SF and the date text when present
+        "q": f"{query} San Francisco" if not day else f"{query} San Francisco {day}",
+        "hl": "en",
+        "gl": "us",
+        "location": "San Francisco, California",
+        "api_key": settings.serpapi_api_key,
+    }
+    client = client or get_client("serpapi")
+    with metrics.track("serpapi") as stage:
+        try:
+            resp = await client.get(settings.serpapi_base, params=params)
+            resp.raise_for_status()
+            payload = resp.json()
+            normalized = _normalize_serpapi_events(payload, day)
+        except Exception as e:
+            stage.fail()
+            return {"error": str(e), "data": None}
+    result = {"data": {"events": normalized}}
+    # Build the columnar table once per fetch rather than per scored point
+    table_for(result)
+    return result
+
+
+def events_key(query: str, day: str | None) -> tuple:
+    # The SerpApi search text only uses the date part, so every hour of a day shares one entry
+    return (normalize_query(query), day)
+
+
+def cache_stats() -> dict:
+    return events_cache.stats()
 
 
-def _normalize_serpapi_events(payload: dict):
+def _normalize_serpapi_events(payload: dict, day: str | None = None):
     results = payload.get("events_results") or []
     normalized = []
     for ev in results:
@@ -43,7 +91,7 @@ def _normalize_serpapi_events(payload: dict):
         address = ev.get("address")
         link = ev.get("link")
         venue = (ev.get("venue") or {}).get("name") if isinstance(ev.get("venue"), dict) else ev.get("venue")
-        # Estimate distance_km if lat/lng present
+        # Coordinates feed the distance decay; events without them still count, flatly
         lat = None
         lng = None
         geo = ev.get("geo") or {}
@@ -52,6 +100,7 @@ def _normalize_serpapi_events(payload: dict):
             lng = float(geo.get("lng")) if geo.get("lng") is not None else None
         except Exception:
             lat = lng = None
+        start, end = parse_when(ev.get("date"), day)
         if title:
             normalized.append(
                 {
@@ -62,6 +111,10 @@ def _normalize_serpapi_events(payload: dict):
                     "link": link,
                     "latitude": lat,
                     "longitude": lng,
+                    # SerpApi rarely reports attendance; the scorer assumes a typical event
+                    "attendance": ev.get("attendance"),
+                    "start": start,
+                    "end": end,
                 }
             )
     return normalized
@@ -1,9 +1,27 @@
 from app.core.config import settings
-from typing import List, Optional
+from app.core import metrics
+from app.core.http import get_client
+from app.core.resilience import UpstreamUnavailable, get_upstream
+from app.services.place_index import get_place_index
+from app.services.place_store import get_place_store, is_stale, normalize_query
+from app.services import histograms
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional
+import numpy as np
 import httpx
 import asyncio
 
 
+DAYS_ORDER = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+# Background store refreshes in flight, keyed like ("query", q) / ("nearby", cell)
+_refreshing: Dict[tuple, asyncio.Task] = {}
+
+# Place-query request counts; the prefetch scheduler keeps the top ones fresh
+_query_counts: Counter = Counter()
+_QUERY_COUNTS_MAX = 1000
+
+
 async def fetch_popular_times(
     place_query: Optional[str] = None,
     sw_lat: Optional[float] = None,
@@ -15,71 +33,185 @@ async def fetch_popular_times(
     hour: Optional[int] = None,
     center_lat: Optional[float] = None,
     center_lng: Optional[float] = None,
+    zoom: Optional[float] = None,
+    limit: Optional[int] = None,
+    client: Optional[httpx.AsyncClient] = None,
 ):
     """Fetches popular times data.
 
-    Primary source: OutScraper (no Google Places dependency).
+    Primary source: OutScraper (no Google Places dependency), fronted by the
+    local place store so repeat lookups never leave the process.
     - If a text `place_query` is provided, we ask OutScraper for a single place
       and extract its weekly "popular_times" histogram, averaging to 24h series.
-    - Bounds mode remains mock for now (OutScraper doesn't provide a simple free
-      bounding-box endpoint); UI still works with mock bubbles.
+    - Bounds mode answers from the in-memory place index built over the store
+      (OutScraper doesn't provide a simple free bounding-box endpoint); until
+      any places are known the UI still works with mock bubbles.
     """
     if settings.outscraper_api_key:
         try:
             if place_query:
-                place = await _outscraper_place_by_query(place_query)
+                place = await _place_by_query(place_query, client=client)
                 if not place:
                     return {"error": f"Place '{place_query}' not found.", "data": None}
-                series = _series_from_outscraper(place, dow=dow, hour=hour)
+                series = _series_from_histogram(place["histogram"], dow=dow, hour=hour)
                 return {"data": {"series": series, "place_name": place.get("name"), "source": "outscraper_query"}}
 
             # Nearby aggregate based on coordinates
             if center_lat is not None and center_lng is not None:
-                agg = await _outscraper_nearby(center_lat, center_lng, dow=dow, hour=hour)
+                places = await _places_nearby(center_lat, center_lng, client=client)
+                agg = _aggregate_series(histograms.stack([p["histogram"] for p in places]), dow=dow, hour=hour)
                 if agg:
                     return {"data": {"series": agg, "place_name": "nearby aggregate", "source": "outscraper_nearby"}}
-
-            # Bounds mode – keep lightweight mock dataset for map density (still mock for now)
-            if sw_lat is not None and sw_lng is not None and ne_lat is not None and ne_lng is not None:
-                return {"data": {"places": _get_mock_places(), "source": "mock_bounds"}}
+        except UpstreamUnavailable as e:
+            # Fail fast: single places have nothing to fall back on, areas use the index or mock
+            if place_query:
+                return {"error": str(e), "data": None}
         except Exception as e:
             return {"error": str(e), "data": None}
 
-    # Fallback when no API key – use mock
+    # Bounds mode – served from the local index, never goes upstream
+    if sw_lat is not None and sw_lng is not None and ne_lat is not None and ne_lng is not None:
+        index = get_place_index()
+        if len(index):
+            places = index.query(sw_lat, sw_lng, ne_lat, ne_lng, dow=dow, hour=hour, zoom=zoom, limit=limit)
+            return {"data": {"places": places, "source": "place_index"}}
+
+    # Fallback when no API key or no known places – use mock
     return {"data": {"places": _get_mock_places(), "source": "mock"}}
 
-def _process_place(place: dict):
-    series = _series_from_place(place)
-    avg_busyness = sum(s["busyness"] for s in series) / len(series) if series else 0
-    return {
-        "name": place.get("name"),
-        "coordinates": place.get("coordinates"),
-        "avg_busyness": avg_busyness,
-        "types": place.get("types")
-    }
 
-def _series_from_place(place: dict):
-    week = place.get("populartimes") or []
-    if not week:
-        return []
-    
-    total_data = [0] * 24
-    days_with_data = 0
-    for day in week:
-        data = day.get("data")
-        if data and len(data) == 24:
-            days_with_data += 1
-            for i in range(24):
-                total_data[i] += data[i]
-
-    if days_with_data == 0:
-        return []
-        
-    avg_data = [round(x / days_with_data) for x in total_data]
-    return [{"hour": i, "busyness": avg_data[i]} for i in range(24)]
+async def fetch_place_histogram(place_query: str, client: Optional[httpx.AsyncClient] = None) -> Optional[np.ndarray]:
+    """Weekly (7, 24) histogram for a place query, or None when unavailable.
+
+    Lets callers scoring many time slots for one place fetch it only once.
+    """
+    if not settings.outscraper_api_key:
+        return None
+    place = await _place_by_query(place_query, client=client)
+    return place["histogram"] if place else None
+
+
+async def _place_by_query(query: str, client: Optional[httpx.AsyncClient] = None) -> Optional[dict]:
+    """Serve a place from the store, going to OutScraper only on a miss.
+
+    Stale entries are still served; a background refresh replaces them.
+    """
+    _count_query(query)
+    cached = get_place_store().get_by_query(query)
+    if cached:
+        place, fetched_at = cached
+        if is_stale(fetched_at):
+            _refresh_in_background(("query", query), lambda: _refresh_query(query))
+        return place
+    return await _refresh_query(query, client=client)
+
+
+def _count_query(query: str) -> None:
+    _query_counts[normalize_query(query)] += 1
+    if len(_query_counts) > _QUERY_COUNTS_MAX:
+        # Keep the head of the distribution; the long tail is never prefetched anyway
+        keep = _query_counts.most_common(_QUERY_COUNTS_MAX // 2)
+        _query_counts.clear()
+        _query_counts.update(dict(keep))
+
+
+def popular_queries(n: int) -> List[str]:
+    return [q for q, _ in _query_counts.most_common(n)]
+
+
+async def refresh_place_if_stale(query: str, client: Optional[httpx.AsyncClient] = None) -> Optional[dict]:
+    """Fetch `query` from OutScraper unless the store already has a fresh copy."""
+    cached = get_place_store().get_by_query(query)
+    if cached and not is_stale(cached[1]):
+        return cached[0]
+    return await _refresh_query(query, client=client)
+
+
+async def _refresh_query(query: str, client: Optional[httpx.AsyncClient] = None) -> Optional[dict]:
+    raw = await _outscraper_place_by_query(query, client=client)
+    place = _normalize_place(raw) if raw else None
+    if place:
+        get_place_store().put_query(query, place)
+        get_place_index().add(place)
+    return place
+
+
+async def _places_nearby(lat: float, lng: float, client: Optional[httpx.AsyncClient] = None) -> List[dict]:
+    cell = _nearby_cell(lat, lng)
+    cached = get_place_store().get_nearby(cell)
+    if cached:
+        places, fetched_at = cached
+        if is_stale(fetched_at):
+            _refresh_in_background(("nearby", cell), lambda: _refresh_nearby(lat, lng))
+        return places
+    return await _refresh_nearby(lat, lng, client=client)
+
+
+async def _refresh_nearby(lat: float, lng: float, client: Optional[httpx.AsyncClient] = None) -> List[dict]:
+    items = await _outscraper_nearby(lat, lng, client=client)
+    places = [p for p in (_normalize_place(it) for it in items or []) if p]
+    if places:
+        get_place_store().put_nearby(_nearby_cell(lat, lng), places)
+        get_place_index().add_many(places)
+    return places
+
+
+def _nearby_cell(lat: float, lng: float) -> str:
+    step = settings.place_store_nearby_grid_deg
+    return f"{round(lat / step) * step:.5f},{round(lng / step) * step:.5f}"
+
+
+def _refresh_in_background(key: tuple, refresh: Callable[[], Awaitable]) -> None:
+    if key in _refreshing:
+        return
+    task = asyncio.create_task(refresh())
+    _refreshing[key] = task
+
+    def _done(t: asyncio.Task) -> None:
+        _refreshing.pop(key, None)
+        # A failed refresh just keeps serving the stale copy
+        if not t.cancelled():
+            t.exception()
+
+    task.add_done_callback(_done)
+
+
+def _normalize_place(place: dict) -> Optional[dict]:
+    """Reduce an OutScraper result to {place_id, name, coordinates, histogram}."""
+    histogram = _histogram_from_outscraper(place)
+    if histogram is None:
+        return None
+    coords = _coordinates(place)
+    place_id = place.get("place_id") or place.get("google_id")
+    if not place_id:
+        if coords is None and not place.get("name"):
+            return None
+        loc = f"{coords['lat']:.5f},{coords['lng']:.5f}" if coords else ""
+        place_id = f"{place.get('name') or ''}@{loc}"
+    return {"place_id": str(place_id), "name": place.get("name"), "coordinates": coords, "histogram": histogram}
+
 
+def _coordinates(place: dict) -> Optional[dict]:
+    coords = place.get("coordinates") or {}
+    lat = coords.get("lat", coords.get("latitude")) if isinstance(coords, dict) else None
+    lng = coords.get("lng", coords.get("longitude")) if isinstance(coords, dict) else None
+    if lat is None:
+        lat, lng = place.get("latitude"), place.get("longitude")
+    try:
+        return {"lat": float(lat), "lng": float(lng)}
+    except (TypeError, ValueError):
+        return None
 
-async def _outscraper_place_by_query(query: str) -> Optional[dict]:
+
+def _histogram_from_outscraper(place: dict) -> Optional[np.ndarray]:
+    """Normalize OutScraper popular_times into a Sunday-first (7, 24) uint8 histogram."""
+    week = (place or {}).get("popular_times") or (place or {}).get("popularTimes") or {}
+    if not isinstance(week, dict) or not week:
+        return None
+    return histograms.from_days([week.get(day_key) for day_key in DAYS_ORDER])
+
+
+async def _outscraper_place_by_query(query: str, client: Optional[httpx.AsyncClient] = None) -> Optional[dict]:
     """Query OutScraper for a single place with popular times.
 
     Notes:
@@ -87,96 +219,64 @@ async def _outscraper_place_by_query(query: str) -> Optional[dict]:
     - We request 1 result with popular_times included.
     - API routes evolve; this call supports common endpoints and payloads.
     """
-    headers = {
-        "x-api-key": settings.outscraper_api_key or "",
-        "accept": "application/json",
-        "content-type": "application/json",
-    }
-    # Try JSON POST payload variant first
     payload = {
         "queries": [
             {
                 "query": query,
                 "limit": 1,
-                "fields": ["name", "popular_times", "coordinates"],
+                "fields": ["place_id", "name", "popular_times", "coordinates"],
             }
         ]
     }
 
-    async with httpx.AsyncClient(timeout=30) as client:
-        # Preferred cloud endpoint
-        endpoints = [
-            "https://app.outscraper.cloud/api/google-maps/places",
-            "https://api.outscraper.com/google-maps/places",
-        ]
-        for url in endpoints:
-            try:
-                resp = await client.post(url, headers=headers, json=payload)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    # Expected shape: { data: [ { name, popular_times, coordinates, ... } ] }
-                    items = (
-                        (data or {}).get("data")
-                        or (data or {}).get("results")
-                        or (data or {}).get("items")
-                        or []
-                    )
-                    if items:
-                        return items[0]
-            except Exception:
-                continue
-
-    return None
-
-
-def _series_from_outscraper(place: dict, dow: Optional[int] = None, hour: Optional[int] = None):
-    """Normalize OutScraper popular_times structure into a 24-hour series.
-
-    OutScraper typically returns weekly histograms by weekday with 24 buckets.
-    We average across week days to a single 24-hour profile for simplicity.
+    items = await _outscraper_post(payload, client)
+    return items[0] if items else None
+
+
+def _series_from_histogram(hist: Optional[np.ndarray], dow: Optional[int] = None, hour: Optional[int] = None):
+    """Turn a (7, 24) histogram into a series.
+
+    A requested (dow, hour) slot yields a single point when that day has data;
+    otherwise we average across week days to a single 24-hour profile.
     """
-    week = (place or {}).get("popular_times") or (place or {}).get("popularTimes") or {}
-    if not week:
+    if hist is None:
         return []
-
-    # If specific slot requested
-    if dow is not None and hour is not None and isinstance(week, dict):
-        days_order = ["Sunday","Monday","Tuesday","Wednesday","Thursday","Friday","Saturday"]
-        day_key = days_order[dow]
-        hours = week.get(day_key)
-        if isinstance(hours, list) and len(hours) == 24:
-            val = int(hours[hour]) if hours[hour] is not None else 0
-            return [{"hour": hour, "busyness": val}]
-
-    # Aggregate by hour
-    total = [0] * 24
-    days = 0
-    for _, hours in (week.items() if isinstance(week, dict) else []):
-        if isinstance(hours, list) and len(hours) == 24:
-            days += 1
-            for i in range(24):
-                try:
-                    total[i] += int(hours[i])
-                except Exception:
-                    pass
-
-    if days == 0:
+    # One place is the common case; plain indexing beats the stacked path here
+    if dow is not None and hour is not None:
+        value = int(hist[dow, hour])
+        if value != histograms.NO_DATA:
+            return [{"hour": hour, "busyness": value}]
+    days = hist[hist[:, 0] != histograms.NO_DATA]
+    if not len(days):
         return []
-    avg = [round(x / days) for x in total]
-    return [{"hour": i, "busyness": avg[i]} for i in range(24)]
+    return histograms.series(days.sum(axis=0, dtype=np.float64) / len(days))
 
 
-async def _outscraper_nearby(lat: float, lng: float, dow: Optional[int] = None, hour: Optional[int] = None) -> Optional[list]:
-    """Query OutScraper for nearby places and return an aggregated series/slot.
+def _aggregate_series(stacked: np.ndarray, dow: Optional[int] = None, hour: Optional[int] = None):
+    """Average a stack of place histograms `(n_places, 7, 24)` into one series/slot."""
+    if not len(stacked):
+        return None
 
-    If dow+hour are provided, return a single-element series for that slot averaged across nearby places.
-    Otherwise, average across week-days to a 24-hour profile.
-    """
-    headers = {
-        "x-api-key": settings.outscraper_api_key or "",
-        "accept": "application/json",
-        "content-type": "application/json",
-    }
+    if dow is not None and hour is not None:
+        # Single slot, averaged over places that have data for that weekday
+        vals = histograms.slot(stacked, dow, hour)
+        if not np.isnan(vals).all():
+            return histograms.series(np.array([np.nanmean(vals)]), hours=[hour])
+
+    # Per-place 24h profiles, rounded like the single-place series, then averaged
+    profiles = np.rint(histograms.daily_profile(stacked))
+    profiles = profiles[~np.isnan(profiles[:, 0])]
+    if not len(profiles):
+        return None
+    return histograms.series(profiles.mean(axis=0))
+
+
+async def _outscraper_nearby(
+    lat: float,
+    lng: float,
+    client: Optional[httpx.AsyncClient] = None,
+) -> Optional[list]:
+    """Query OutScraper for places with popular times around a point."""
     payload = {
         "queries": [
             {
@@ -184,45 +284,37 @@ async def _outscraper_nearby(lat: float, lng: float, dow: Optional[int] = None,
                 "lng": lng,
                 "radius": 600,  # meters
                 "limit": 10,
-                "fields": ["name", "popular_times", "coordinates"],
+                "fields": ["place_id", "name", "popular_times", "coordinates"],
             }
         ]
     }
-    async with httpx.AsyncClient(timeout=30) as client:
-        for url in [
-            "https://app.outscraper.cloud/api/google-maps/places",
-            "https://api.outscraper.com/google-maps/places",
-        ]:
-            try:
-                resp = await client.post(url, headers=headers, json=payload)
-                if resp.status_code != 200:
-                    continue
-                data = resp.json()
-                items = (data or {}).get("data") or (data or {}).get("results") or (data or {}).get("items") or []
-                if not items:
-                    continue
-                # Aggregate popular times across results
-                collector = []
-                for it in items:
-                    arr = _series_from_outscraper(it, dow=dow, hour=hour)
-                    if arr:
-                        collector.append(arr)
-                if not collector:
-                    return None
-                if dow is not None and hour is not None:
-                    # Single slot arrays like [{hour, busyness}]
-                    val = round(sum(a[0]["busyness"] for a in collector) / len(collector))
-                    return [{"hour": hour, "busyness": val}]
-                # 24-element per place
-                merged = [0] * 24
-                for arr in collector:
-                    for i in range(24):
-                        merged[i] += arr[i]["busyness"]
-                avg = [round(x / len(collector)) for x in merged]
-                return [{"hour": i, "busyness": avg[i]} for i in range(24)]
-            except Exception:
-                continue
-    return None
+    return await _outscraper_post(payload, client)
+
+
+async def _outscraper_post(payload: dict, client: Optional[httpx.AsyncClient] = None) -> Optional[list]:
+    """POST a places query to OutScraper through the shared resilience layer.
+
+    The two endpoints are hedged rather than tried one after the other, and
+    UpstreamUnavailable is raised when the breaker is open, the concurrency cap
+    is full or every endpoint failed.
+    """
+    headers = {
+        "x-api-key": settings.outscraper_api_key or "",
+        "accept": "application/json",
+        "content-type": "application/json",
+    }
+    client = client or get_client("outscraper")
+
+    async def attempt(url: str) -> Optional[list]:
+        resp = await client.post(url, headers=headers, json=payload)
+        resp.raise_for_status()
+        data = resp.json()
+        # Expected shape: { data: [ { name, popular_times, coordinates, ... } ] }
+        return (data or {}).get("data") or (data or {}).get("results") or (data or {}).get("items") or None
+
+    with metrics.track("outscraper"):
+        return await get_upstream("outscraper").call(settings.outscraper_endpoints, attempt)
+
 
 def _get_mock_places():
     return [
@@ -0,0 +1,263 @@
+"""Precomputed citywide heatmap raster for every (dow, hour) slot.
+
+Usage (from backend/), e.g. from cron after new places have been fetched:
+
+    python -m app.services.heatmap [--out data/heatmap.npy]
+
+Known places' popular times are smoothed with a Gaussian kernel onto a fixed
+grid over HEATMAP_SW/NE (HEATMAP_CELL_DEG per cell, north row first) and
+written as one uint8 `(7, 24, H, W)` .npy, next to a small JSON sidecar with
+the grid's bounds. Each cell holds the kernel-weighted busyness of nearby
+places, fading to 0 away from them.
+
+Workers open the file memory-mapped, so they share one copy in the page cache,
+and a viewport crop is a slice of that mapping. A rebuilt file is swapped in
+atomically and picked up within a few seconds. The startup warm-up and each
+prefetch cycle rebuild the raster when it is missing, older than
+HEATMAP_MAX_AGE_SECONDS or the place store has changed since; a lock file next
+to the raster keeps concurrent workers from building it at the same time.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services import histograms
+from app.services.place_store import get_place_store
+
+METERS_PER_DEG_LAT = 111_320.0
+# How often a reader checks whether the raster file was replaced
+_RELOAD_CHECK_SECONDS = 5.0
+# A build lock older than this is assumed to be left over from a crashed builder
+_LOCK_STALE_SECONDS = 600.0
+
+_raster: Optional[np.ndarray] = None
+_meta: Optional[dict] = None
+_loaded_mtime: Optional[int] = None
+_checked_at = 0.0
+
+
+def build_heatmap(out_path: Optional[str] = None) -> Optional[dict]:
+    """Build the raster from every place in the store; returns its metadata.
+
+    Returns None without building when another process holds the build lock.
+    """
+    out_path = out_path or settings.heatmap_path
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    lock = _acquire_lock(out_path + ".lock")
+    if lock is None:
+        return None
+    try:
+        return _build(out_path)
+    finally:
+        os.close(lock)
+        try:
+            os.unlink(out_path + ".lock")
+        except OSError:
+            pass
+
+
+def _acquire_lock(path: str) -> Optional[int]:
+    for _ in range(2):
+        try:
+            return os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(path).st_mtime < _LOCK_STALE_SECONDS:
+                    return None
+                os.unlink(path)
+            except OSError:
+                pass
+    return None
+
+
+def _build(out_path: str) -> dict:
+    store = get_place_store()
+    # Read before the places, so a place stored meanwhile triggers another build
+    store_version = store.version()
+    cell = settings.heatmap_cell_deg
+    sw_lat, sw_lng = settings.heatmap_sw_lat, settings.heatmap_sw_lng
+    # Tolerance so float noise in the span doesn't add a whole extra row or column
+    rows = int(math.ceil((settings.heatmap_ne_lat - sw_lat) / cell - 1e-9))
+    cols = int(math.ceil((settings.heatmap_ne_lng - sw_lng) / cell - 1e-9))
+    ne_lat, ne_lng = sw_lat + rows * cell, sw_lng + cols * cell
+
+    places = [p for p in store.all_places() if p.get("coordinates")]
+    lat = np.array([p["coordinates"]["lat"] for p in places], dtype=np.float64)
+    lng = np.array([p["coordinates"]["lng"] for p in places], dtype=np.float64)
+    hist = histograms.stack([p["histogram"] for p in places])
+
+    r = np.floor((ne_lat - lat) / cell).astype(np.int64)
+    c = np.floor((lng - sw_lng) / cell).astype(np.int64)
+    inside = (r >= 0) & (r < rows) & (c >= 0) & (c < cols)
+    r, c, hist = r[inside], c[inside], hist[inside]
+
+    # Slot value where the weekday has data, otherwise the place's weekly average
+    slots = histograms.DAYS * histograms.HOURS
+    values = np.where(
+        hist == histograms.NO_DATA, histograms.weekly_average(hist)[:, None, None], hist
+    ).reshape(-1, slots).astype(np.float32)
+
+    # Sum of busyness and number of places per cell, then the same Gaussian blur on both
+    flat = r * cols + c
+    sums = np.zeros((rows * cols, slots), dtype=np.float32)
+    np.add.at(sums, flat, values)
+    sums = sums.T.reshape(slots, rows, cols)
+    counts = np.bincount(flat, minlength=rows * cols).astype(np.float32).reshape(rows, cols)
+
+    center_lat = math.radians((sw_lat + ne_lat) / 2)
+    k_rows = _gaussian(rows, settings.heatmap_bandwidth_m / (METERS_PER_DEG_LAT * cell))
+    k_cols = _gaussian(cols, settings.heatmap_bandwidth_m / (METERS_PER_DEG_LAT * math.cos(center_lat) * cell))
+    smoothed = k_rows @ sums @ k_cols.T
+    density = k_rows @ counts @ k_cols.T
+    # Weighted mean near places; below one place's worth of kernel mass it fades to 0
+    heat = smoothed / np.maximum(density, 1.0)
+
+    meta = {
+        "sw_lat": sw_lat, "sw_lng": sw_lng, "ne_lat": ne_lat, "ne_lng": ne_lng,
+        "cell_deg": cell, "rows": rows, "cols": cols,
+        "bandwidth_m": settings.heatmap_bandwidth_m,
+        "places": int(len(r)),
+        "store_version": store_version,
+        "built_at": time.time(),
+    }
+    _write(out_path, np.clip(np.rint(heat), 0, 100).astype(np.uint8), meta)
+    return meta
+
+
+def _write(out_path: str, cells: np.ndarray, meta: dict) -> None:
+    # Unique temp names, so even a builder that ignored the lock can't tear the raster
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(out_path) or ".", prefix=".heatmap-", suffix=".npy")
+    os.close(fd)
+    try:
+        raster = np.lib.format.open_memmap(
+            tmp, mode="w+", dtype=np.uint8, shape=(histograms.DAYS, histograms.HOURS, meta["rows"], meta["cols"])
+        )
+        raster[:] = cells.reshape(raster.shape)
+        raster.flush()
+        del raster
+        with open(_meta_path(tmp), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        # Sidecar first: a reader that sees the new raster also finds its metadata
+        os.replace(_meta_path(tmp), _meta_path(out_path))
+        os.replace(tmp, out_path)
+    finally:
+        for leftover in (tmp, _meta_path(tmp)):
+            if os.path.exists(leftover):
+                os.unlink(leftover)
+
+
+def _gaussian(n: int, sigma_cells: float) -> np.ndarray:
+    """(n, n) Gaussian blur matrix along one axis, truncated at 3 sigma, peak 1."""
+    sigma = max(sigma_cells, 1e-6)
+    d = np.arange(n)[:, None] - np.arange(n)[None, :]
+    k = np.exp(-0.5 * (d / sigma) ** 2).astype(np.float32)
+    k[np.abs(d) > 3 * sigma] = 0.0
+    return k
+
+
+def _meta_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+
+def get_raster() -> Optional[Tuple[np.ndarray, dict]]:
+    """The memory-mapped raster and its metadata, or None before the first build."""
+    global _raster, _meta, _loaded_mtime, _checked_at
+    now = time.monotonic()
+    if _raster is not None and now - _checked_at < _RELOAD_CHECK_SECONDS:
+        return _raster, _meta
+    _checked_at = now
+    try:
+        mtime = os.stat(settings.heatmap_path).st_mtime_ns
+    except OSError:
+        return (_raster, _meta) if _raster is not None else None
+    if mtime != _loaded_mtime:
+        try:
+            raster = np.load(settings.heatmap_path, mmap_mode="r")
+            with open(_meta_path(settings.heatmap_path), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return (_raster, _meta) if _raster is not None else None
+        if raster.shape[2:] == (meta["rows"], meta["cols"]):
+            _raster, _meta, _loaded_mtime = raster, meta, mtime
+    return (_raster, _meta) if _raster is not None else None
+
+
+def crop(
+    sw_lat: float,
+    sw_lng: float,
+    ne_lat: float,
+    ne_lng: float,
+    dow: int,
+    hour: int,
+    max_side: Optional[int] = None,
+) -> Optional[Tuple[np.ndarray, Tuple[float, float, float, float]]]:
+    """View of the slot's raster covering the box, plus the view's own edges.
+
+    Strides down to at most `max_side` cells per side; both are slices of the
+    memmap, so no cell is copied or computed here.
+    """
+    loaded = get_raster()
+    if loaded is None:
+        return None
+    raster, meta = loaded
+    cell = meta["cell_deg"]
+    r0 = int(np.clip(math.floor((meta["ne_lat"] - ne_lat) / cell), 0, meta["rows"]))
+    r1 = int(np.clip(math.ceil((meta["ne_lat"] - sw_lat) / cell), r0, meta["rows"]))
+    c0 = int(np.clip(math.floor((sw_lng - meta["sw_lng"]) / cell), 0, meta["cols"]))
+    c1 = int(np.clip(math.ceil((ne_lng - meta["sw_lng"]) / cell), c0, meta["cols"]))
+    step = 1
+    if max_side:
+        step = max(1, math.ceil(max(r1 - r0, c1 - c0) / max_side))
+    view = raster[dow, hour, r0:r1:step, c0:c1:step]
+    # With a stride, each kept cell stands for `step` cells
+    r_end = min(r0 + view.shape[0] * step, meta["rows"])
+    c_end = min(c0 + view.shape[1] * step, meta["cols"])
+    edges = (
+        meta["ne_lat"] - r_end * cell,
+        meta["sw_lng"] + c0 * cell,
+        meta["ne_lat"] - r0 * cell,
+        meta["sw_lng"] + c_end * cell,
+    )
+    return view, edges
+
+
+def ensure_heatmap() -> Optional[dict]:
+    """Build the raster when it is missing, older than HEATMAP_MAX_AGE_SECONDS or
+    built from an older version of the place store."""
+    try:
+        age = time.time() - os.stat(settings.heatmap_path).st_mtime
+        with open(_meta_path(settings.heatmap_path), "r", encoding="utf-8") as f:
+            built_from = json.load(f).get("store_version")
+    except (OSError, ValueError):
+        return build_heatmap()
+    if age < settings.heatmap_max_age_seconds and built_from == get_place_store().version():
+        return None
+    return build_heatmap()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Precompute the (dow, hour) heatmap raster from the place store.")
+    parser.add_argument("--out", default=settings.heatmap_path, help="Path of the .npy raster")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    meta = build_heatmap(args.out)
+    if meta is None:
+        print(f"Another process is building {args.out}; nothing to do")
+        return
+    print(
+        f"Wrote {args.out}: {meta['rows']}x{meta['cols']} cells x 168 slots from {meta['places']} places "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Weekly popular-times histograms as compact NumPy arrays.
+
+A place's week is a `(7, 24)` uint8 array, Sunday first, busyness 0..100.
+Weekdays the upstream had no data for are filled with `NO_DATA`. Several
+places stack into a `(n_places, 7, 24)` tensor and every lookup below works
+on either shape.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+DAYS = 7
+HOURS = 24
+NO_DATA = 255
+
+
+def from_days(days: Sequence[Optional[Sequence]]) -> Optional[np.ndarray]:
+    """Build a histogram from 7 Sunday-first day lists (None for missing days).
+
+    Days that are not 24 buckets long count as missing; unparseable buckets as 0.
+    """
+    present = [
+        (d, hours) for d, hours in enumerate(days[:DAYS])
+        if isinstance(hours, (list, tuple)) and len(hours) == HOURS
+    ]
+    if not present:
+        return None
+    rows = [hours for _, hours in present]
+    # All days in one conversion; the per-value fallback parses numbers the same way
+    try:
+        values = np.array(rows, dtype=np.float64)
+    except (TypeError, ValueError):
+        values = np.array([[_to_float(v) for v in hours] for hours in rows])
+    hist = np.full((DAYS, HOURS), NO_DATA, dtype=np.uint8)
+    hist[[d for d, _ in present]] = np.clip(np.nan_to_num(values), 0, 100).astype(np.uint8)
+    return hist
+
+
+def _to_float(v) -> float:
+    # Same parse as the np.asarray fast path; the caller truncates to uint8
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def stack(histograms: Sequence[np.ndarray]) -> np.ndarray:
+    if not histograms:
+        return np.empty((0, DAYS, HOURS), dtype=np.uint8)
+    return np.stack(histograms)
+
+
+def day_mask(hist: np.ndarray) -> np.ndarray:
+    """True for weekdays with data; shape `(..., 7)`."""
+    return hist[..., 0] != NO_DATA
+
+
+def daily_profile(hist: np.ndarray) -> np.ndarray:
+    """Average 24h profile over weekdays with data; NaN where a place has none."""
+    mask = day_mask(hist)
+    total = np.where(mask[..., None], hist, 0).sum(axis=-2, dtype=np.float64)
+    days = mask.sum(axis=-1)[..., None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(days > 0, total / np.maximum(days, 1), np.nan)
+
+
+def weekly_average(hist: np.ndarray) -> np.ndarray:
+    """Mean busyness over every hour of the weekdays with data (0 if none)."""
+    return np.nan_to_num(daily_profile(hist).mean(axis=-1))
+
+
+def slot(hist: np.ndarray, dow: int, hour: int) -> np.ndarray:
+    """Busyness at one (dow, hour) slot; NaN where that weekday has no data."""
+    vals = hist[..., dow, hour].astype(np.float64)
+    return np.where(vals == NO_DATA, np.nan, vals)
+
+
+def series(values: np.ndarray, hours: Optional[List[int]] = None) -> list:
+    """Render rounded busyness values as the API's [{hour, busyness}] series."""
+    hours = list(range(len(values))) if hours is None else hours
+    return [{"hour": h, "busyness": int(v)} for h, v in zip(hours, np.rint(values))]
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services import histograms
+from app.services.place_store import get_place_store
+
+# Deepest web-mercator zoom that tiles are served at (see app/services/tiles.py)
+TILE_MAX_ZOOM = 22
+# A place this close to a tile edge counts as in both tiles, against float noise
+_TILE_EDGE_DEG = 1e-9
+# How often the shared index checks the store for places other workers stored
+_REFRESH_CHECK_SECONDS = 5.0
+
+
+class PlaceIndex:
+    """Latitude-sorted arrays of known places for viewport (bounds) queries.
+
+    A bounds query is a binary search for the latitude band overlapping the
+    viewport plus one vectorized longitude mask. Histograms live in one stacked
+    `(n_places, 7, 24)` tensor, so the requested slot for every candidate is a
+    single fancy index. New places are inserted at their sorted position, so
+    ingest never rebuilds the arrays.
+    """
+
+    def __init__(self):
+        self._places: Dict[str, dict] = {}
+        # Bumped on every change
+        self.version = 0
+        # Version of the last change inside each z/x/y tile, so tiles elsewhere stay cached
+        self._tile_versions: Dict[Tuple[int, int, int], int] = {}
+        self._ids: List[str] = []
+        self._names: List[Optional[str]] = []
+        self._lat = np.empty(0)
+        self._lng = np.empty(0)
+        self._hist = histograms.stack([])
+        self._avg = np.empty(0)
+        # PlaceStore.version() this index has caught up with; None if not built from the store
+        self.store_version: Optional[list] = None
+        self._checked_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def add(self, place: dict) -> None:
+        if not place.get("coordinates") or place.get("histogram") is None:
+            return
+        old = self._places.get(place["place_id"])
+        if old is not None:
+            self._delete(old)
+        self._insert(place)
+        self._places[place["place_id"]] = place
+        self._touch(place, old)
+
+    def add_many(self, places: Iterable[dict]) -> None:
+        """Bulk load: one sort instead of an insert per place.
+
+        Only a fresh index is bulk loaded, since no tile has been built from it
+        yet; otherwise the places are added one by one.
+        """
+        places = [p for p in places if p.get("coordinates") and p.get("histogram") is not None]
+        if self.version:
+            for place in places:
+                self.add(place)
+            return
+        self._places = {p["place_id"]: p for p in places}
+        places = list(self._places.values())
+        lat = np.array([p["coordinates"]["lat"] for p in places], dtype=np.float64)
+        order = np.argsort(lat, kind="stable")
+        places = [places[i] for i in order]
+        self._ids = [p["place_id"] for p in places]
+        self._names = [p.get("name") for p in places]
+        self._lat = lat[order]
+        self._lng = np.array([p["coordinates"]["lng"] for p in places], dtype=np.float64)
+        self._hist = histograms.stack([p["histogram"] for p in places])
+        self._avg = histograms.weekly_average(self._hist)
+        self.version += 1
+
+    def remove(self, place_id: str) -> None:
+        old = self._places.pop(place_id, None)
+        if old is not None:
+            self._delete(old)
+            self._touch(old)
+
+    def tile_version(self, z: int, x: int, y: int) -> int:
+        """Version of the last change to a place inside the tile (0 if none since load)."""
+        return self._tile_versions.get((z, x, y), 0)
+
+    def _insert(self, place: dict) -> None:
+        lat, lng = float(place["coordinates"]["lat"]), float(place["coordinates"]["lng"])
+        hist = np.asarray(place["histogram"], dtype=np.uint8)
+        # After equal latitudes, matching the stable sort of add_many
+        i = int(np.searchsorted(self._lat, lat, side="right"))
+        self._lat = _insert_at(self._lat, i, lat)
+        self._lng = _insert_at(self._lng, i, lng)
+        self._hist = _insert_at(self._hist, i, hist)
+        self._avg = _insert_at(self._avg, i, histograms.weekly_average(hist))
+        self._ids.insert(i, place["place_id"])
+        self._names.insert(i, place.get("name"))
+
+    def _delete(self, place: dict) -> None:
+        lat = float(place["coordinates"]["lat"])
+        lo = int(np.searchsorted(self._lat, lat, side="left"))
+        hi = int(np.searchsorted(self._lat, lat, side="right"))
+        i = lo + self._ids[lo:hi].index(place["place_id"])
+        self._lat, self._lng, self._hist, self._avg = (
+            np.concatenate((a[:i], a[i + 1:])) for a in (self._lat, self._lng, self._hist, self._avg)
+        )
+        del self._ids[i]
+        del self._names[i]
+
+    def _touch(self, *places: Optional[dict]) -> None:
+        self.version += 1
+        for place in places:
+            if place is not None:
+                for key in _tiles_at(place["coordinates"]["lat"], place["coordinates"]["lng"]):
+                    self._tile_versions[key] = self.version
+
+    def _in_box(self, sw_lat, sw_lng, ne_lat, ne_lng, dow, hour) -> tuple[np.ndarray, np.ndarray]:
+        """Positions of the places inside the box and their busyness for the slot."""
+        lo = np.searchsorted(self._lat, sw_lat, side="left")
+        hi = np.searchsorted(self._lat, ne_lat, side="right")
+        idx = lo + np.flatnonzero((self._lng[lo:hi] >= sw_lng) & (self._lng[lo:hi] <= ne_lng))
+
+        values = self._avg[idx]
+        if dow is not None and hour is not None:
+            # Slot value when that weekday has data, otherwise the weekly average
+            slot = histograms.slot(self._hist[idx], dow, hour)
+            values = np.where(np.isnan(slot), values, slot)
+        return idx, values
+
+    def query(
+        self,
+        sw_lat: float,
+        sw_lng: float,
+        ne_lat: float,
+        ne_lng: float,
+        dow: Optional[int] = None,
+        hour: Optional[int] = None,
+        zoom: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """Places inside the box, busiest first, thinned by zoom and capped."""
+        idx, values = self._in_box(sw_lat, sw_lng, ne_lat, ne_lng, dow, hour)
+
+        if zoom is not None and len(idx):
+            keep = _thin(self._lat[idx], self._lng[idx], values, _thin_cell_deg(zoom))
+            idx, values = idx[keep], values[keep]
+
+        limit = settings.place_index_max_results if limit is None else limit
+        if len(idx) > limit:
+            top = np.argpartition(-values, limit - 1)[:limit]
+            idx, values = idx[top], values[top]
+        order = np.argsort(-values, kind="stable")
+        return [
+            {
+                "name": self._names[i],
+                "coordinates": {"lat": float(self._lat[i]), "lng": float(self._lng[i])},
+                "avg_busyness": float(v),
+            }
+            for i, v in zip(idx[order], values[order])
+        ]
+
+    def tile_places(
+        self,
+        sw_lat: float,
+        sw_lng: float,
+        ne_lat: float,
+        ne_lng: float,
+        zoom: float,
+        limit: int,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, List[Optional[str]]]:
+        """(lat, lng, histograms, names) of the places in a map tile, thinned by zoom.
+
+        Thinning and the cap rank places by weekly average, so a tile does not
+        depend on the slot being shown and stays cacheable across slots.
+        """
+        idx, values = self._in_box(sw_lat, sw_lng, ne_lat, ne_lng, None, None)
+        # Half-open on the north and east edges, so a place lands in exactly one tile
+        inside = (self._lat[idx] < ne_lat) & (self._lng[idx] < ne_lng)
+        idx, values = idx[inside], values[inside]
+        if len(idx):
+            keep = _thin(self._lat[idx], self._lng[idx], values, _thin_cell_deg(zoom))
+            idx, values = idx[keep], values[keep]
+        if len(idx) > limit:
+            top = np.argpartition(-values, limit - 1)[:limit]
+            idx = idx[top]
+        idx = np.sort(idx)
+        return self._lat[idx], self._lng[idx], self._hist[idx], [self._names[i] for i in idx]
+
+    def grid_average(
+        self,
+        sw_lat: float,
+        sw_lng: float,
+        ne_lat: float,
+        ne_lng: float,
+        rows: int,
+        cols: int,
+        dow: Optional[int] = None,
+        hour: Optional[int] = None,
+    ) -> np.ndarray:
+        """Mean busyness of the places in each cell of a rows x cols grid over the box.
+
+        Cells without any known place are NaN.
+        """
+        idx, values = self._in_box(sw_lat, sw_lng, ne_lat, ne_lng, dow, hour)
+        r = np.clip(((self._lat[idx] - sw_lat) / (ne_lat - sw_lat) * rows).astype(np.int64), 0, rows - 1)
+        c = np.clip(((self._lng[idx] - sw_lng) / (ne_lng - sw_lng) * cols).astype(np.int64), 0, cols - 1)
+        cell = r * cols + c
+        total = np.bincount(cell, weights=values, minlength=rows * cols)
+        count = np.bincount(cell, minlength=rows * cols)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count > 0, total / count, np.nan).reshape(rows, cols)
+
+
+def _thin_cell_deg(zoom: float) -> float:
+    # Width of one web-mercator tile at this zoom, split into N thinning cells
+    return 360.0 / (2 ** max(0.0, zoom)) / settings.place_index_thin_cells_per_tile
+
+
+def _thin(lat: np.ndarray, lng: np.ndarray, values: np.ndarray, cell_deg: float) -> np.ndarray:
+    """Positions of the busiest place per thinning cell."""
+    cells = np.stack([np.floor(lat / cell_deg), np.floor(lng / cell_deg)], axis=1)
+    # Busiest first, so the first occurrence of each cell is its winner
+    order = np.argsort(-values, kind="stable")
+    _, first = np.unique(cells[order], axis=0, return_index=True)
+    return order[first]
+
+
+def _insert_at(arr: np.ndarray, i: int, value) -> np.ndarray:
+    # np.insert's generic path costs several times this one copy
+    return np.concatenate((arr[:i], np.asarray(value, dtype=arr.dtype)[None], arr[i:]))
+
+
+def _tiles_at(lat: float, lng: float) -> set:
+    """Every z/x/y tile, up to TILE_MAX_ZOOM, that a place at (lat, lng) can land in."""
+    # Web-mercator position in [0, 1) on each axis, just either side of the point
+    fx = [(lng + d + 180.0) / 360.0 for d in (-_TILE_EDGE_DEG, _TILE_EDGE_DEG)]
+    fy = [
+        (1 - math.asinh(math.tan(math.radians(max(-85.0511, min(85.0511, lat + d))))) / math.pi) / 2
+        for d in (_TILE_EDGE_DEG, -_TILE_EDGE_DEG)
+    ]
+    fx = [min(max(f, 0.0), 1.0 - 1e-12) for f in fx]
+    fy = [min(max(f, 0.0), 1.0 - 1e-12) for f in fy]
+    keys = set()
+    for z in range(TILE_MAX_ZOOM + 1):
+        n = 1 << z
+        x0, x1, y0, y1 = int(fx[0] * n), int(fx[1] * n), int(fy[0] * n), int(fy[1] * n)
+        keys.update(((z, x0, y0), (z, x0, y1), (z, x1, y0), (z, x1, y1)))
+    return keys
+
+
+_index: PlaceIndex | None = None
+# Warm-up builds the index in a worker thread while requests may ask for it
+_index_lock = threading.Lock()
+
+
+def get_place_index() -> PlaceIndex:
+    """Index over every place in the store, built on first use.
+
+    Every _REFRESH_CHECK_SECONDS it adds the places stored since, by this or
+    any other worker, so all workers converge on the same tiles and ETags.
+    """
+    global _index
+    if _index is None or _sync_due(_index):
+        with _index_lock:
+            # Double-checked, so a concurrent first call doesn't build a second index
+            if _index is None:
+                index = PlaceIndex()
+                _sync(index)
+                _index = index
+            elif _sync_due(_index):
+                _sync(_index)
+    return _index
+
+
+def _sync_due(index: PlaceIndex) -> bool:
+    return index.store_version is not None and time.monotonic() - index._checked_at >= _REFRESH_CHECK_SECONDS
+
+
+def _sync(index: PlaceIndex) -> None:
+    store = get_place_store()
+    index._checked_at = time.monotonic()
+    # Read before the places, so a place stored meanwhile is picked up next time
+    version = store.version()
+    if version == index.store_version:
+        return
+    since = index.store_version[1] if index.store_version else None
+    index.add_many(store.places_since(since))
+    index.store_version = version
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.histograms import DAYS, HOURS
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS places (
+    place_id   TEXT PRIMARY KEY,
+    name       TEXT,
+    lat        REAL,
+    lng        REAL,
+    histogram  BLOB NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS places_lat_lng ON places (lat, lng);
+CREATE TABLE IF NOT EXISTS place_queries (
+    query      TEXT PRIMARY KEY,
+    place_id   TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nearby_cells (
+    cell       TEXT PRIMARY KEY,
+    place_ids  TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def encode_histogram(hist: np.ndarray) -> bytes:
+    """Pack a (7, 24) uint8 histogram into 168 bytes."""
+    return np.ascontiguousarray(hist, dtype=np.uint8).tobytes()
+
+
+def decode_histogram(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.uint8).reshape(DAYS, HOURS)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class PlaceStore:
+    """SQLite store of normalized weekly popular-times histograms.
+
+    Places are keyed by place id (with coordinates), and looked up either via the
+    text query that found them or via a snapped nearby-search cell.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def _row_to_place(self, row) -> dict:
+        place_id, name, lat, lng, blob, fetched_at = row
+        return {
+            "place_id": place_id,
+            "name": name,
+            "coordinates": {"lat": lat, "lng": lng} if lat is not None and lng is not None else None,
+            "histogram": decode_histogram(blob),
+            "fetched_at": fetched_at,
+        }
+
+    def _put_place(self, place: dict, now: float) -> None:
+        coords = place.get("coordinates") or {}
+        self._conn.execute(
+            "INSERT OR REPLACE INTO places (place_id, name, lat, lng, histogram, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                place["place_id"],
+                place.get("name"),
+                coords.get("lat"),
+                coords.get("lng"),
+                encode_histogram(place["histogram"]),
+                now,
+            ),
+        )
+
+    def get_place(self, place_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT place_id, name, lat, lng, histogram, fetched_at FROM places WHERE place_id = ?",
+                (place_id,),
+            ).fetchone()
+        return self._row_to_place(row) if row else None
+
+    def get_by_query(self, query: str) -> Optional[Tuple[dict, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.place_id, p.name, p.lat, p.lng, p.histogram, p.fetched_at, q.fetched_at "
+                "FROM place_queries q JOIN places p ON p.place_id = q.place_id WHERE q.query = ?",
+                (normalize_query(query),),
+            ).fetchone()
+        if not row:
+            return None
+        return self._row_to_place(row[:6]), row[6]
+
+    def put_query(self, query: str, place: dict) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._put_place(place, now)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO place_queries (query, place_id, fetched_at) VALUES (?, ?, ?)",
+                (normalize_query(query), place["place_id"], now),
+            )
+
+    def get_nearby(self, cell: str) -> Optional[Tuple[List[dict], float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT place_ids, fetched_at FROM nearby_cells WHERE cell = ?", (cell,)
+            ).fetchone()
+            if not row:
+                return None
+            place_ids = json.loads(row[0])
+            places = []
+            for place_id in place_ids:
+                prow = self._conn.execute(
+                    "SELECT place_id, name, lat, lng, histogram, fetched_at FROM places WHERE place_id = ?",
+                    (place_id,),
+                ).fetchone()
+                if prow:
+                    places.append(self._row_to_place(prow))
+        return places, row[1]
+
+    def put_nearby(self, cell: str, places: List[dict]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            for place in places:
+                self._put_place(place, now)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO nearby_cells (cell, place_ids, fetched_at) VALUES (?, ?, ?)",
+                (cell, json.dumps([p["place_id"] for p in places]), now),
+            )
+
+    def all_places(self) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT place_id, name, lat, lng, histogram, fetched_at FROM places"
+            ).fetchall()
+        return [self._row_to_place(r) for r in rows]
+
+    def places_since(self, fetched_at: Optional[float]) -> List[dict]:
+        """Places stored at or after `fetched_at` (every place when it is None)."""
+        if fetched_at is None:
+            return self.all_places()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT place_id, name, lat, lng, histogram, fetched_at FROM places WHERE fetched_at >= ?",
+                (fetched_at,),
+            ).fetchall()
+        return [self._row_to_place(r) for r in rows]
+
+    def version(self) -> list:
+        """[place count, latest fetch time]; changes whenever any worker stores a place."""
+        with self._lock:
+            count, latest = self._conn.execute("SELECT COUNT(*), MAX(fetched_at) FROM places").fetchone()
+        return [count, latest]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: PlaceStore | None = None
+
+
+def get_place_store() -> PlaceStore:
+    global _store
+    if _store is None:
+        _store = PlaceStore(settings.place_store_path)
+    return _store
+
+
+def is_stale(fetched_at: float) -> bool:
+    return time.time() - fetched_at > settings.place_store_max_age_seconds
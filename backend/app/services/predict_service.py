@@ -1,36 +1,86 @@
 from __future__ import annotations
 
+from app.core import metrics
+from app.core.cache import AsyncTTLCache
 from app.models.prediction_model import get_model
-from app.services.weather_service import fetch_weather_forecast
+from app.models.registry import get_registry
+from app.services.weather_service import fetch_weather_forecast, fetch_weather_modifiers, snap_to_grid
+from app.services import weather_features
 from app.services.events_service import fetch_local_events
-from app.services.foot_traffic_service import fetch_popular_times
+from app.services.event_table import table_for
+from app.services.foot_traffic_service import fetch_popular_times, fetch_place_histogram, _series_from_histogram
+from app.services.place_store import normalize_query
 from app.core.config import settings
+from datetime import datetime
+from typing import AsyncIterator, List
 import asyncio
-from math import exp
-from math import radians, cos, sin, asin, sqrt
+import hashlib
+import json
+import time
+import numpy as np
+
+
+# Gemini summaries keyed on a hash of the prompt inputs (see summarize_with_gemini)
+summary_cache = AsyncTTLCache(
+    ttl_seconds=settings.summary_cache_ttl_seconds,
+    max_entries=settings.summary_cache_max_entries,
+    name="gemini_summary",
+)
+_gemini_model = None
+_gemini_configured = False
+# Summary generations that outlived their request's deadline
+_background_tasks: set = set()
+
+# Full /api/predict-llm responses; concurrent identical requests share one computation
+prediction_llm_cache = AsyncTTLCache(
+    ttl_seconds=settings.predict_llm_cache_ttl_seconds,
+    max_entries=settings.predict_llm_cache_max_entries,
+    name="predict_llm",
+)
+metrics.register_cache("gemini_summary", summary_cache)
+metrics.register_cache("predict_llm", prediction_llm_cache)
+
+
+async def predict_with_summary(latitude: float, longitude: float, date_iso: str | None, place_query: str) -> dict:
+    """Prediction plus LLM summary, coalesced on the normalized request.
+
+    Requests that round to the same coordinates, hour and place query await one
+    shared computation (the first caller's exact inputs) and then hit a short
+    result cache, so a burst of identical requests makes one set of upstream
+    calls and one LLM call.
+    """
+    async def compute() -> dict:
+        base = await predict_score(latitude=latitude, longitude=longitude, date_iso=date_iso, place_query=place_query)
+        summary = await summarize_with_gemini(base)
+        return {**base, "summary": summary}
 
+    return await prediction_llm_cache.get_or_load(_request_key(latitude, longitude, date_iso, place_query), compute)
 
-async def predict_score(latitude: float, longitude: float, date_iso: str | None, place_query: str):
-    # Fetch all data concurrently, returning exceptions instead of raising them
-    # Estimate time slot (dow/hour) from date_iso if present
-    from datetime import datetime
-    dow = None
-    hour = None
+
+def _request_key(latitude: float, longitude: float, date_iso: str | None, place_query: str) -> tuple:
+    # Features only depend on the day and hour of date_iso (see _parse_slot)
+    hour_key = None
     try:
         if date_iso:
-            dt = datetime.fromisoformat(date_iso.replace("Z",""))
-            dow = dt.weekday()  # 0=Mon..6=Sun; convert to 0=Sun..6=Sat
-            dow = (dow + 1) % 7
-            hour = dt.hour
+            hour_key = datetime.fromisoformat(date_iso.replace("Z", "")).strftime("%Y-%m-%dT%H")
     except Exception:
-        pass
+        hour_key = date_iso
+    places = settings.predict_llm_coalesce_decimals
+    return (round(latitude, places), round(longitude, places), hour_key, normalize_query(place_query))
 
-    results = await asyncio.gather(
-        fetch_weather_forecast(latitude=latitude, longitude=longitude, date_iso=date_iso),
-        fetch_local_events(query=place_query, date_iso=date_iso),
-        fetch_popular_times(place_query=place_query, dow=dow, hour=hour),
-        return_exceptions=True
-    )
+
+async def predict_score(latitude: float, longitude: float, date_iso: str | None, place_query: str):
+    # Estimate time slot (dow/hour) from date_iso if present
+    dow, hour = _parse_slot(date_iso)
+
+    # Fetch all data concurrently, returning exceptions instead of raising them
+    with metrics.track("predict_inputs"):
+        results = await asyncio.gather(
+            fetch_weather_forecast(latitude=latitude, longitude=longitude, date_iso=date_iso),
+            fetch_local_events(query=place_query, date_iso=date_iso),
+            fetch_popular_times(place_query=place_query, dow=dow, hour=hour),
+            return_exceptions=True
+        )
     weather, events, foot = results
 
     # Check for exceptions and use a default error dict if any occurred
@@ -39,27 +89,32 @@ async def predict_score(latitude: float, longitude: float, date_iso: str | None,
     foot = foot if not isinstance(foot, Exception) else {"error": str(foot)}
 
     # Feature engineering is now safe from crashes
-    historical_baseline = _slot_or_average(foot)
-    weather_mod = _weather_modifier(weather)
-    event_mod = _event_modifier(events, latitude, longitude)
+    with metrics.track("features"):
+        historical_baseline = _slot_or_average(foot)
+        weather_mod = _weather_modifier(weather, hour)
+        event_mod = _event_modifier(events, latitude, longitude, date_iso)
 
     # Combine features via ML model when available; fall back to heuristic
+    registry = get_registry()
+    model = registry.route(f"{latitude:.4f},{longitude:.4f},{date_iso}")
     try:
-        model = get_model()
-        # Map modifiers to 0..1 feature ranges roughly
-        weather_score = max(0.0, min(1.0, (weather_mod - 0.7) / 0.6))
-        event_score = max(0.0, min(1.0, (event_mod - 1.0) / 0.5))
-        hist_score = max(0.0, min(1.0, historical_baseline))
-        score = model.predict(weather=weather_score, events=event_score, historical=hist_score)
+        with metrics.track("model"):
+            started = time.perf_counter()
+            weather_score, event_score, hist_score = _model_features(weather_mod, event_mod, historical_baseline)
+            score = model.predict(weather=weather_score, events=event_score, historical=hist_score)
+            registry.record(model, time.perf_counter() - started, score)
+        model_version = model.version
     except Exception:
         # Heuristic: baseline is dominant, modifiers nudge it
         score = max(0.0, min(1.0, historical_baseline * weather_mod * event_mod))
+        model_version = "heuristic"
 
     label = _label(score)
 
     return {
         "score": score * 100,
         "label": label,
+        "model": model_version,
         "features": {
             "historical_baseline": historical_baseline,
             "weather_modifier": weather_mod,
@@ -69,79 +124,176 @@ async def predict_score(latitude: float, longitude: float, date_iso: str | None,
     }
 
 
-def _weather_modifier(payload) -> float:
+async def predict_batch(locations: List[dict], slots: List[str | None]) -> List[dict]:
+    """Score every location x time slot with shared upstream fetches.
+
+    Weather is fetched once per (grid cell, day), events once per (query, day)
+    and popular times once per place; the model then scores the whole feature
+    matrix in a single vectorized call.
     """
-    Scores weather from 0.0 to 1.0 based on Open-Meteo data.
-    Ideal: Temp between 15-25°C, low precipitation, minimal cloud cover.
+    candidates = [(loc, date_iso) for loc in locations for date_iso in slots]
+
+    weather_days, event_keys, places = {}, {}, {}
+    for loc, date_iso in candidates:
+        # One multi-location Open-Meteo request per day covers every cell
+        weather_days.setdefault(_day(date_iso), {}).setdefault(_weather_key(loc, date_iso), (loc["latitude"], loc["longitude"]))
+        event_keys.setdefault(_event_key(loc, date_iso), (loc, date_iso))
+        places.setdefault(loc["place_query"], None)
+
+    weather_results, event_results, place_results = await asyncio.gather(
+        asyncio.gather(
+            *(fetch_weather_modifiers(list(cells.values()), day) for day, cells in weather_days.items()),
+            return_exceptions=True,
+        ),
+        asyncio.gather(
+            *(fetch_local_events(query=loc["place_query"], date_iso=date_iso) for loc, date_iso in event_keys.values()),
+            return_exceptions=True,
+        ),
+        asyncio.gather(*(fetch_place_histogram(q) for q in places), return_exceptions=True),
+    )
+    # Per-cell rows of hourly + daytime modifiers; each slot then picks its column
+    weather_mods = {}
+    for cells, res in zip(weather_days.values(), weather_results):
+        if isinstance(res, Exception):
+            res = np.full((len(cells), weather_features.HOURS + 1), np.nan)
+        weather_mods.update(zip(cells, res))
+    events_by_key = {
+        key: res if not isinstance(res, Exception) else {"error": str(res)}
+        for key, res in zip(event_keys, event_results)
+    }
+    hist_by_place = {
+        q: res if not isinstance(res, Exception) else None for q, res in zip(places, place_results)
+    }
+
+    n = len(candidates)
+    # Event modifiers per (query, slot), vectorized over all locations sharing it
+    groups: dict = {}
+    for i, (loc, date_iso) in enumerate(candidates):
+        groups.setdefault((_event_key(loc, date_iso), date_iso), []).append(i)
+    event_mods = np.empty(n)
+    for (key, date_iso), idx in groups.items():
+        lats = [candidates[i][0]["latitude"] for i in idx]
+        lngs = [candidates[i][0]["longitude"] for i in idx]
+        event_mods[idx] = _event_modifiers(events_by_key[key], lats, lngs, date_iso)
+
+    slots = [_parse_slot(date_iso) for _, date_iso in candidates]
+    weather_col = weather_features.select(
+        np.stack([weather_mods[_weather_key(loc, date_iso)] for loc, date_iso in candidates]),
+        [hour for _, hour in slots],
+    )
+
+    features = np.empty((n, 3))
+    raw_features = np.empty((n, 3))
+    for i, ((loc, date_iso), (dow, hour)) in enumerate(zip(candidates, slots)):
+        hist = hist_by_place[loc["place_query"]]
+        foot = {"data": {"series": _series_from_histogram(hist, dow=dow, hour=hour)}} if hist is not None else None
+        historical_baseline = _slot_or_average(foot)
+        weather_mod = float(weather_col[i])
+        event_mod = float(event_mods[i])
+        raw_features[i] = (historical_baseline, weather_mod, event_mod)
+        features[i] = _model_features(weather_mod, event_mod, historical_baseline)
+
+    try:
+        with metrics.track("model_batch"):
+            scores = get_model().predict_many(features)
+    except Exception:
+        # Heuristic: baseline is dominant, modifiers nudge it
+        scores = np.clip(raw_features.prod(axis=1), 0.0, 1.0)
+
+    return [
+        {
+            "latitude": loc["latitude"],
+            "longitude": loc["longitude"],
+            "place_query": loc["place_query"],
+            "date_iso": date_iso,
+            "score": float(score) * 100,
+            "label": _label(float(score)),
+            "features": {
+                "historical_baseline": float(hist_b),
+                "weather_modifier": float(w_mod),
+                "event_modifier": float(e_mod),
+            },
+        }
+        for (loc, date_iso), score, (hist_b, w_mod, e_mod) in zip(candidates, scores, raw_features)
+    ]
+
+
+def shape_prediction(result: dict, include_raw: bool = True, fields: str | None = None) -> dict:
+    """Trim a prediction response without mutating `result` (it may be cached).
+
+    `fields` is a comma-separated list of top-level keys to keep; `raw` is only
+    returned when `include_raw` is true.
     """
-    data = (payload or {}).get("data", {}).get("hourly", {})
-    if not data or payload.get("error"):
-        return 1.0
+    wanted = {f.strip() for f in fields.split(",") if f.strip()} if fields else None
+    return {
+        k: v
+        for k, v in result.items()
+        if (k != "raw" or include_raw) and (wanted is None or k in wanted or k == "type")
+    }
 
-    temps = data.get("temperature_2m", [])
-    precips = data.get("precipitation", [])
-    clouds = data.get("cloud_cover", [])
-    
-    if not temps:
-        return 1.0
 
-    # Consider daytime hours (e.g., 8am to 8pm)
-    day_temps = temps[8:20]
-    day_precips = precips[8:20]
-    day_clouds = clouds[8:20]
+def _parse_slot(date_iso: str | None) -> tuple[int | None, int | None]:
+    try:
+        if date_iso:
+            dt = datetime.fromisoformat(date_iso.replace("Z",""))
+            dow = dt.weekday()  # 0=Mon..6=Sun; convert to 0=Sun..6=Sat
+            return (dow + 1) % 7, dt.hour
+    except Exception:
+        pass
+    return None, None
 
-    # Temperature score (ideal range 15-25°C)
-    avg_temp = sum(day_temps) / len(day_temps) if day_temps else 18
-    temp_score = 1.0 - min(abs(avg_temp - 20) / 10, 1.0) # Penalty for deviation from 20°C
 
-    # Precipitation score (lower is better)
-    total_precip = sum(day_precips) if day_precips else 0
-    precip_score = 1.0 - min(total_precip / 5.0, 1.0) # Heavily penalize >5mm total rain
+def _day(date_iso: str | None) -> str | None:
+    return date_iso[:10] if date_iso else None
 
-    # Cloud cover score (lower is better)
-    avg_clouds = sum(day_clouds) / len(day_clouds) if day_clouds else 50
-    cloud_score = 1.0 - (avg_clouds / 100.0)
 
-    # Convert scores to multiplicative modifier centered at 1.0
-    base = (temp_score * 0.5) + (precip_score * 0.35) + (cloud_score * 0.15)  # 0..1
-    return 0.7 + 0.6 * base  # range roughly 0.7..1.3
+def _weather_key(loc: dict, date_iso: str | None) -> tuple:
+    return (*snap_to_grid(loc["latitude"], loc["longitude"]), _day(date_iso))
 
 
-def _event_modifier(payload, lat: float, lng: float) -> float:
-    if (payload or {}).get("error"):
+def _event_key(loc: dict, date_iso: str | None) -> tuple:
+    # SerpApi queries only carry the date part (see fetch_local_events)
+    return (loc["place_query"], _day(date_iso))
+
+
+def _model_features(weather_mod: float, event_mod: float, historical_baseline: float) -> tuple[float, float, float]:
+    # Map modifiers to 0..1 feature ranges roughly
+    weather_score = max(0.0, min(1.0, (weather_mod - 0.7) / 0.6))
+    event_score = max(0.0, min(1.0, (event_mod - 1.0) / 0.5))
+    hist_score = max(0.0, min(1.0, historical_baseline))
+    return weather_score, event_score, hist_score
+
+
+def _weather_modifier(payload, hour: int | None = None) -> float:
+    """Weather modifier (~0.7..1.3) for `hour`, or for the whole daytime when None.
+
+    Ideal: temperature around 20°C, low precipitation, minimal cloud cover. The
+    forecast fetch scores every hour of the day once (see weather_features), so
+    this is normally just an index into the cached payload.
+    """
+    if not payload or payload.get("error"):
         return 1.0
-    events = (payload or {}).get("data", {}).get("events", [])
-    if not events:
+    mods = payload.get("modifiers") or weather_features.payload_modifiers(payload.get("data"))
+    if not mods:
         return 1.0
+    return float(mods["daytime"] if hour is None else mods["hourly"][hour])
+
 
-    # Estimate distance-based influence; if distance_km missing, default mild
-    total_influence = 0.0
-    for ev in events:
-        dkm = ev.get("distance_km")
-        if dkm is None:
-            # If distance_km missing, try compute from coordinates
-            ev_lat = ev.get("latitude")
-            ev_lng = ev.get("longitude")
-            if ev_lat is not None and ev_lng is not None and lat is not None and lng is not None:
-                dkm = _haversine(lat, lng, ev_lat, ev_lng)
-            else:
-                continue
-        # Influence decays with distance (~exp(-lambda * d))
-        influence = exp(-1.2 * dkm)  # ~0.3 at 1km, tiny beyond 3km
-        total_influence += influence
-
-    # Convert to multiplicative modifier (capped)
-    return min(1.5, 1.0 + total_influence)
-
-
-def _haversine(lat1, lon1, lat2, lon2):
-    # Earth radius in km
-    R = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    return R * c
+def _event_modifier(payload, lat: float, lng: float, date_iso: str | None = None) -> float:
+    # One point: a plain loop; the vectorized path only pays off for many points
+    return table_for(payload).modifier(lat, lng, _slot_time(date_iso))
+
+
+def _event_modifiers(payload, lats, lngs, date_iso: str | None = None) -> np.ndarray:
+    """Event modifiers for many points at one time slot, in one vectorized pass."""
+    return table_for(payload).modifiers(lats, lngs, _slot_time(date_iso))
+
+
+def _slot_time(date_iso: str | None) -> datetime | None:
+    try:
+        return datetime.fromisoformat(date_iso.replace("Z", "")).replace(tzinfo=None) if date_iso else None
+    except ValueError:
+        return None
 
 
 def _slot_or_average(payload) -> float:
@@ -165,70 +317,179 @@ def _label(score: float) -> str:
 
 
 async def summarize_with_gemini(base: dict) -> str:
+    ctx = _summary_context(base)
+    model = _get_gemini_model()
+    if model is None:
+        return _fallback_summary(base, ctx)
+
+    async def generate() -> str:
+        with metrics.track("gemini") as stage:
+            try:
+                response = await model.generate_content_async(_summary_prompt(ctx))
+                return (response.text or "").strip()
+            except Exception:
+                stage.fail()
+                return ""
+
+    # Cache hits resolve immediately; misses keep generating past the deadline
+    # so the cache is warm for the next caller
+    task = asyncio.ensure_future(summary_cache.get_or_load(_summary_key(ctx), generate, should_cache=bool))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    try:
+        text = await asyncio.wait_for(asyncio.shield(task), timeout=settings.gemini_deadline_seconds)
+    except asyncio.TimeoutError:
+        return _fallback_summary(base, ctx)
+    return text or _fallback_summary(base, ctx)
+
+
+async def stream_summary(base: dict) -> AsyncIterator[str]:
+    """Yield the summary text as Gemini produces it.
+
+    Cached summaries and the fallback text are yielded as a single chunk; a
+    completed stream fills the same cache `summarize_with_gemini` reads.
+    """
+    ctx = _summary_context(base)
+    model = _get_gemini_model()
+    if model is None:
+        yield _fallback_summary(base, ctx)
+        return
+    key = _summary_key(ctx)
+    cached = (await summary_cache.lookup_many([key])).get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    parts: List[str] = []
+    with metrics.track("gemini_stream") as stage:
+        try:
+            response = await model.generate_content_async(_summary_prompt(ctx), stream=True)
+            async for chunk in response:
+                text = chunk.text
+                if text:
+                    parts.append(text)
+                    yield text
+        except Exception:
+            stage.fail()
+            # Keep whatever already streamed; only fall back when nothing did
+            if not parts:
+                yield _fallback_summary(base, ctx)
+            return
+    full = "".join(parts).strip()
+    if full:
+        summary_cache.set(key, full)
+    else:
+        yield _fallback_summary(base, ctx)
+
+
+async def stream_prediction_with_summary(
+    latitude: float, longitude: float, date_iso: str | None, place_query: str
+) -> AsyncIterator[dict]:
+    """Prediction first, then summary deltas, then the full summary."""
+    base = await predict_score(latitude=latitude, longitude=longitude, date_iso=date_iso, place_query=place_query)
+    yield {"type": "prediction", **base}
+    parts: List[str] = []
+    async for text in stream_summary(base):
+        parts.append(text)
+        yield {"type": "summary_delta", "text": text}
+    yield {"type": "done", "summary": "".join(parts).strip()}
+
+
+def _summary_context(base: dict) -> dict:
+    """Prompt inputs for a summary, with weather rounded so near-identical
+    forecasts share one cached summary."""
     # Safe extracts
-    label = str(base.get("label", "N/A"))
-    score = float(base.get("score", 0))
     raw = base.get("raw") or {}
     foot = raw.get("foot") or {}
-    place_name = ((foot.get("data") or {}).get("place_name")) or "the selected area"
     hourly = ((raw.get("weather") or {}).get("data") or {}).get("hourly") or {}
     temps = hourly.get("temperature_2m") or [15]
     precs = hourly.get("precipitation") or [0]
     temp = temps[min(12, len(temps)-1)] if temps else 15
     precip = precs[min(12, len(precs)-1)] if precs else 0
     events_list = (((raw.get("events") or {}).get("data") or {}).get("events")) or []
-    events_titles = ", ".join([e.get("title", "event") for e in events_list]) or "None reported"
-
-    # If Gemini is not configured or import fails, produce a fallback summary
-    def _fallback() -> str:
-        feats = base.get("features", {})
-        hist = float(feats.get("historical_baseline", 0.5))
-        wmod = float(feats.get("weather_modifier", 1.0))
-        emod = float(feats.get("event_modifier", 1.0))
-        lines = []
-        lines.append(f"Traffic is expected to be {label} at {place_name}.")
-        # Weather rationale
-        if wmod < 0.9:
-            lines.append("Weather may suppress foot traffic (chance of rain or less favorable conditions).")
-        elif wmod > 1.1:
-            lines.append("Favorable weather may increase activity.")
-        # Event rationale
-        if emod > 1.05:
-            lines.append("Nearby events are likely to boost traffic.")
-        elif not events_list:
-            lines.append("No significant nearby events are scheduled.")
-        # Baseline
-        if hist >= 0.66:
-            lines.append("Historically this time is busy in this area.")
-        elif hist <= 0.33:
-            lines.append("Historically this time is quieter in this area.")
-        return " ".join(lines)
+    return {
+        "label": str(base.get("label", "N/A")),
+        "place_name": ((foot.get("data") or {}).get("place_name")) or "the selected area",
+        "temp": round(float(temp if temp is not None else 15)),
+        "precip": round(float(precip or 0), 1),
+        "events_titles": ", ".join([e.get("title", "event") for e in events_list]) or "None reported",
+        "has_events": bool(events_list),
+    }
+
+
+def _summary_key(ctx: dict) -> str:
+    # Summaries only depend on the prompt inputs, so identical inputs share one
+    return hashlib.sha1(
+        json.dumps(
+            [ctx["label"], ctx["place_name"], ctx["temp"], ctx["precip"], ctx["events_titles"]], ensure_ascii=False
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+def _summary_prompt(ctx: dict) -> str:
+    return (
+        "You are a helpful assistant for a food truck owner in San Francisco. "
+        "Write a concise but info-rich paragraph (3-5 sentences) explaining WHY the expected foot traffic level occurs. "
+        "Do NOT restate the numeric score. Mention specific weather values and named events when available. "
+        "If events list is empty, say there are no notable events. "
+        "If popular-times data exists, reference whether the selected hour is historically busy or quiet.\n\n"
+        f"Level: {ctx['label']}.\n"
+        f"Location: {ctx['place_name']}.\n"
+        f"Weather: {ctx['temp']}°C, {ctx['precip']}mm precipitation (hourly).\n"
+        f"Events: {ctx['events_titles']}."
+    )
 
-    if not settings.gemini_api_key:
-        return _fallback()
 
+def _fallback_summary(base: dict, ctx: dict) -> str:
+    """Rule-based summary used when Gemini is not configured, fails or is too slow."""
+    label = ctx["label"]
+    place_name = ctx["place_name"]
+    feats = base.get("features", {})
+    hist = float(feats.get("historical_baseline", 0.5))
+    wmod = float(feats.get("weather_modifier", 1.0))
+    emod = float(feats.get("event_modifier", 1.0))
+    lines = []
+    lines.append(f"Traffic is expected to be {label} at {place_name}.")
+    # Weather rationale
+    if wmod < 0.9:
+        lines.append("Weather may suppress foot traffic (chance of rain or less favorable conditions).")
+    elif wmod > 1.1:
+        lines.append("Favorable weather may increase activity.")
+    # Event rationale
+    if emod > 1.05:
+        lines.append("Nearby events are likely to boost traffic.")
+    elif not ctx["has_events"]:
+        lines.append("No significant nearby events are scheduled.")
+    # Baseline
+    if hist >= 0.66:
+        lines.append("Historically this time is busy in this area.")
+    elif hist <= 0.33:
+        lines.append("Historically this time is quieter in this area.")
+    return " ".join(lines)
+
+
+def configure_gemini():
+    """Configure the Gemini client once; returns None when unavailable."""
+    global _gemini_model, _gemini_configured
+    if _gemini_configured:
+        return _gemini_model
+    _gemini_configured = True
+    if not settings.gemini_api_key:
+        return None
     try:
         import google.generativeai as genai
     except ImportError:
-        return _fallback()
-
+        return None
     try:
-        genai.configure(api_key=settings.gemini_api_key)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        prompt = (
-            "You are a helpful assistant for a food truck owner in San Francisco. "
-            "Write a concise but info-rich paragraph (3-5 sentences) explaining WHY the expected foot traffic level occurs. "
-            "Do NOT restate the numeric score. Mention specific weather values and named events when available. "
-            "If events list is empty, say there are no notable events. "
-            "If popular-times data exists, reference whether the selected hour is historically busy or quiet.\n\n"
-            f"Level: {label}.\n"
-            f"Location: {place_name}.\n"
-            f"Weather: {temp}°C, {precip}mm precipitation (hourly).\n"
-            f"Events: {events_titles}."
-        )
-        response = await model.generate_content_async(prompt)
-        return (response.text or "").strip() or _fallback()
+        options = {}
+        if settings.gemini_api_endpoint:
+            options = {"transport": "rest", "client_options": {"api_endpoint": settings.gemini_api_endpoint}}
+        genai.configure(api_key=settings.gemini_api_key, **options)
+        _gemini_model = genai.GenerativeModel(settings.gemini_model)
     except Exception:
-        return _fallback()
+        _gemini_model = None
+    return _gemini_model
 
 
+def _get_gemini_model():
+    return _gemini_model if _gemini_configured else configure_gemini()
@@ -0,0 +1,241 @@
+"""Background cache warming.
+
+Every `PREFETCH_INTERVAL_SECONDS` (with jitter) one cycle reloads:
+- Open-Meteo forecasts for a fixed SF grid over the next few days, both the
+  full per-point payloads and the trimmed multi-location grid,
+- SerpApi events for the configured queries over the next few days,
+- OutScraper popular times for the most-requested places, when stale,
+and then rebuilds the heatmap raster when the place store has changed.
+
+Only entries that are missing or close to expiry are fetched, so a warm cache
+costs no upstream calls. With a shared CACHE_BACKEND, entries another worker
+has already refreshed are adopted from it instead of refetched. A source whose
+cycle mostly fails backs off exponentially instead of being retried every
+interval.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.events_service import events_cache, events_key, fetch_local_events
+from app.services.foot_traffic_service import popular_queries, refresh_place_if_stale
+from app.services.heatmap import ensure_heatmap
+from app.services.weather_service import (
+    fetch_weather_forecast,
+    fetch_weather_modifiers,
+    forecast_cache,
+    forecast_key,
+    grid_cache,
+    snap_to_grid,
+)
+
+
+# A job returns True when its upstream call succeeded
+Job = Callable[[], Awaitable[bool]]
+
+_task: Optional[asyncio.Task] = None
+# Consecutive failed cycles per source, and when a backed-off source may run again
+_failures: Dict[str, int] = {}
+_retry_at: Dict[str, float] = {}
+_last_cycle: Dict[str, dict] = {}
+
+
+def start_prefetch() -> None:
+    global _task
+    if settings.prefetch_enabled and _task is None:
+        _task = asyncio.create_task(_run())
+
+
+async def stop_prefetch() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+async def _run() -> None:
+    # Stagger the first cycle so several workers starting together don't fire at once
+    await asyncio.sleep(random.uniform(0, settings.prefetch_jitter * settings.prefetch_interval_seconds))
+    while True:
+        try:
+            await run_cycle()
+        except Exception:
+            pass
+        try:
+            # Places fetched since the last build (by any worker) show up in the heatmap
+            await asyncio.to_thread(ensure_heatmap)
+        except Exception:
+            pass
+        await asyncio.sleep(_jittered(settings.prefetch_interval_seconds))
+
+
+async def run_cycle() -> Dict[str, dict]:
+    semaphore = asyncio.Semaphore(max(1, settings.prefetch_concurrency))
+    sources = {
+        "weather": _weather_jobs,
+        "weather_grid": _weather_grid_jobs,
+        "events": _event_jobs,
+        "places": _place_jobs,
+    }
+    results = await asyncio.gather(*(_run_source(name, build(), semaphore) for name, build in sources.items()))
+    _last_cycle.update(zip(sources, results))
+    return dict(_last_cycle)
+
+
+async def _run_source(name: str, jobs: List[Job], semaphore: asyncio.Semaphore) -> dict:
+    wait = _retry_at.get(name, 0.0) - time.monotonic()
+    if wait > 0:
+        return {"scheduled": len(jobs), "ok": 0, "failed": 0, "backoff_seconds": round(wait, 1)}
+
+    random.shuffle(jobs)
+    ok = failed = 0
+    streak = 0
+
+    async def run(job: Job) -> None:
+        nonlocal ok, failed, streak
+        async with semaphore:
+            # Give up on the rest of the cycle once the upstream looks down
+            if streak >= settings.prefetch_concurrency:
+                return
+            try:
+                success = await job()
+            except Exception:
+                success = False
+        if success:
+            ok += 1
+            streak = 0
+        else:
+            failed += 1
+            streak += 1
+
+    await asyncio.gather(*(run(job) for job in jobs))
+
+    if failed and failed >= ok:
+        _failures[name] = _failures.get(name, 0) + 1
+        delay = min(settings.prefetch_backoff_max_seconds, settings.prefetch_interval_seconds * 2 ** _failures[name])
+        _retry_at[name] = time.monotonic() + _jittered(delay)
+    else:
+        _failures.pop(name, None)
+        _retry_at.pop(name, None)
+    return {"scheduled": len(jobs), "ok": ok, "failed": failed, "skipped": len(jobs) - ok - failed}
+
+
+def _grid_cells(step: float) -> List[tuple]:
+    lats = np.arange(settings.prefetch_sw_lat, settings.prefetch_ne_lat + step / 2, step)
+    lngs = np.arange(settings.prefetch_sw_lng, settings.prefetch_ne_lng + step / 2, step)
+    return sorted({snap_to_grid(float(lat), float(lng)) for lat in lats for lng in lngs})
+
+
+def _weather_jobs() -> List[Job]:
+    cells = _grid_cells(settings.prefetch_weather_step_deg)
+    jobs = []
+    for day in _upcoming_days(settings.prefetch_weather_days):
+        for lat, lng in cells:
+            if _due(forecast_cache, forecast_key(lat, lng, day)):
+                jobs.append(_weather_job(lat, lng, day))
+    return jobs
+
+
+def _weather_grid_jobs() -> List[Job]:
+    # Batch and search scoring read the trimmed grid; it is cheap enough to cover every cell
+    cells = _grid_cells(settings.weather_cache_grid_deg)
+    jobs = []
+    size = max(1, settings.open_meteo_max_locations)
+    for day in _upcoming_days(settings.prefetch_weather_days):
+        due = [cell for cell in cells if _due(grid_cache, forecast_key(*cell, day))]
+        jobs.extend(_weather_grid_job(due[i:i + size], day) for i in range(0, len(due), size))
+    return jobs
+
+
+def _weather_grid_job(cells: List[tuple], day: str) -> Job:
+    async def job() -> bool:
+        adopted = await _adopt(grid_cache, [forecast_key(*cell, day) for cell in cells])
+        cells_left = [cell for cell in cells if forecast_key(*cell, day) not in adopted]
+        if not cells_left:
+            return True
+        mods = await fetch_weather_modifiers(cells_left, day, refresh=True)
+        return not np.isnan(mods).all()
+    return job
+
+
+def _weather_job(lat: float, lng: float, day: str) -> Job:
+    async def job() -> bool:
+        if await _adopt(forecast_cache, [forecast_key(lat, lng, day)]):
+            return True
+        payload = await fetch_weather_forecast(latitude=lat, longitude=lng, date_iso=day, refresh=True)
+        return not payload.get("error")
+    return job
+
+
+def _event_jobs() -> List[Job]:
+    if not settings.serpapi_api_key:
+        return []
+    return [
+        _event_job(query, day)
+        for day in _upcoming_days(settings.prefetch_event_days)
+        for query in settings.prefetch_event_queries
+        if _due(events_cache, events_key(query, day))
+    ]
+
+
+def _event_job(query: str, day: str) -> Job:
+    async def job() -> bool:
+        if await _adopt(events_cache, [events_key(query, day)]):
+            return True
+        payload = await fetch_local_events(query=query, date_iso=day, refresh=True)
+        return not payload.get("error")
+    return job
+
+
+def _place_jobs() -> List[Job]:
+    if not settings.outscraper_api_key:
+        return []
+    return [_place_job(query) for query in popular_queries(settings.prefetch_top_places)]
+
+
+def _place_job(query: str) -> Job:
+    async def job() -> bool:
+        return await refresh_place_if_stale(query) is not None
+    return job
+
+
+def _due(cache, key) -> bool:
+    remaining = cache.ttl_remaining(key)
+    return remaining is None or remaining < settings.prefetch_refresh_ahead_seconds
+
+
+async def _adopt(cache, keys) -> set:
+    # Keys another worker refreshed recently enough that they are no longer due
+    return await cache.pull_shared(keys, min_ttl=settings.prefetch_refresh_ahead_seconds)
+
+
+def _upcoming_days(n: int) -> List[str]:
+    # Clients send UTC ISO timestamps, and cache keys use their date part
+    today = datetime.now(timezone.utc).date()
+    return [(today + timedelta(days=i)).isoformat() for i in range(n)]
+
+
+def _jittered(seconds: float) -> float:
+    jitter = settings.prefetch_jitter
+    return max(0.0, seconds * random.uniform(1 - jitter, 1 + jitter))
+
+
+def prefetch_status() -> dict:
+    now = time.monotonic()
+    return {
+        "enabled": settings.prefetch_enabled,
+        "running": _task is not None and not _task.done(),
+        "last_cycle": dict(_last_cycle),
+        "backoff": {name: round(at - now, 1) for name, at in _retry_at.items() if at > now},
+    }
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+from datetime import datetime, timedelta
+from typing import List
+
+import numpy as np
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.prediction_model import get_model
+from app.services.events_service import fetch_local_events
+from app.services.place_index import get_place_index
+from app.services.predict_service import (
+    _event_modifiers,
+    _label,
+    _model_features,
+    _parse_slot,
+)
+from app.services import weather_features
+from app.services.weather_service import fetch_weather_modifiers
+
+
+def _parse_window(start_iso: str, end_iso: str | None) -> tuple[datetime, datetime]:
+    """(start, end) as naive datetimes on the start's wall clock.
+
+    Slots are read as wall-clock hours (see _parse_slot). When only one bound
+    carries an offset, the other is taken to be in the same zone; an end with a
+    different offset is converted to the start's. Raises ValueError (a 422 in
+    the route) for unparseable or reversed windows.
+    """
+    start = datetime.fromisoformat(_utc_suffix(start_iso))
+    if not end_iso:
+        return start.replace(tzinfo=None), start.replace(tzinfo=None) + timedelta(hours=1)
+    end = datetime.fromisoformat(_utc_suffix(end_iso))
+    if start.tzinfo is not None and end.tzinfo is not None:
+        end = end.astimezone(start.tzinfo)
+    start, end = start.replace(tzinfo=None), end.replace(tzinfo=None)
+    if end < start:
+        raise ValueError("end_iso must not be before start_iso.")
+    return start, end
+
+
+def _utc_suffix(iso: str) -> str:
+    # fromisoformat only accepts "Z" from Python 3.11
+    return iso[:-1] + "+00:00" if iso.endswith(("Z", "z")) else iso
+
+
+async def search_best_spots(
+    sw_lat: float,
+    sw_lng: float,
+    ne_lat: float,
+    ne_lng: float,
+    start_iso: str,
+    end_iso: str | None,
+    k: int,
+    step_deg: float,
+    place_query: str = "San Francisco",
+) -> dict:
+    """Top-K (grid cell, hour) candidates in a box and time window.
+
+    Every cell gets a cheap historical baseline from the place index. Because the
+    model is linear, that baseline bounds the best score a cell can reach; cells
+    are fully scored (weather + events + model) in bound order and the search
+    stops once no remaining bound can beat the current K-th best score.
+    """
+    start, end = _parse_window(start_iso, end_iso)
+    slots = []
+    t = start.replace(minute=0, second=0, microsecond=0)
+    while t < end or not slots:
+        slots.append(t)
+        t += timedelta(hours=1)
+
+    rows = max(1, int(np.ceil((ne_lat - sw_lat) / step_deg)))
+    cols = max(1, int(np.ceil((ne_lng - sw_lng) / step_deg)))
+    total = rows * cols * len(slots)
+    if total > settings.search_max_candidates:
+        raise ValueError(f"{total} candidates requested; the limit is {settings.search_max_candidates}.")
+    lat_centers = sw_lat + (np.arange(rows) + 0.5) * (ne_lat - sw_lat) / rows
+    lng_centers = sw_lng + (np.arange(cols) + 0.5) * (ne_lng - sw_lng) / cols
+
+    # Historical baseline per (slot, row, col); unknown cells use the neutral 0.5
+    index = get_place_index()
+    baseline = np.empty((len(slots), rows, cols))
+    for s, slot in enumerate(slots):
+        dow, hour = _parse_slot(slot.isoformat())
+        grid = index.grid_average(sw_lat, sw_lng, ne_lat, ne_lng, rows, cols, dow=dow, hour=hour)
+        baseline[s] = np.where(np.isnan(grid), 50.0, grid) / 100.0
+    baseline = np.clip(baseline, 0.0, 1.0).ravel()
+
+    model = get_model()
+    bounds = model.upper_bound(baseline)
+    order = np.argsort(-bounds, kind="stable")
+
+    # Events only depend on the query and day, so fetch each day once up front
+    days = sorted({slot.date().isoformat() for slot in slots})
+    event_payloads = dict(zip(days, await asyncio.gather(
+        *(fetch_local_events(query=place_query, date_iso=day) for day in days), return_exceptions=True
+    )))
+    # Event modifier for every (slot, cell), one vectorized call per slot
+    cell_lats = np.repeat(lat_centers, cols)
+    cell_lngs = np.tile(lng_centers, rows)
+    event_mods = np.empty((len(slots), rows * cols))
+    for s, slot in enumerate(slots):
+        events = event_payloads[slot.date().isoformat()]
+        events = events if not isinstance(events, Exception) else {"error": str(events)}
+        event_mods[s] = _event_modifiers(events, cell_lats, cell_lngs, slot.isoformat())
+    event_mods = event_mods.ravel()
+
+    heap: List[tuple] = []  # min-heap of (score, position, result)
+    scored = 0
+    batch_size = max(k, settings.search_batch_size)
+    # Score buffer reused by every batch so the model never allocates
+    score_buf = np.empty(batch_size)
+    for b in range(0, len(order), batch_size):
+        batch = order[b:b + batch_size]
+        if len(heap) >= k:
+            # Drop candidates whose best case cannot beat the current K-th score
+            batch = batch[bounds[batch] > heap[0][0]]
+            if not len(batch):
+                break
+        results = await _score_positions(
+            batch, baseline, event_mods, slots, rows, cols, lat_centers, lng_centers, model, score_buf[:len(batch)]
+        )
+        scored += len(batch)
+        for pos, result in zip(batch, results):
+            item = (result["score"] / 100.0, int(pos), result)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item[0] > heap[0][0]:
+                heapq.heapreplace(heap, item)
+
+    top = [item[2] for item in sorted(heap, key=lambda it: (-it[0], it[1]))]
+    return {"results": top, "candidates": total, "scored": scored, "pruned": total - scored}
+
+
+async def _score_positions(
+    positions, baseline, event_mods, slots, rows, cols, lat_centers, lng_centers, model, out=None
+) -> List[dict]:
+    s_idx, cell = np.divmod(positions, rows * cols)
+    r_idx, c_idx = np.divmod(cell, cols)
+    candidates = [
+        (float(lat_centers[r]), float(lng_centers[c]), slots[s], float(baseline[p]), float(event_mods[p]))
+        for p, s, r, c in zip(positions, s_idx, r_idx, c_idx)
+    ]
+    # One multi-location weather request per day in the batch
+    by_day: dict = {}
+    for i, (lat, lng, slot, _, _) in enumerate(candidates):
+        by_day.setdefault(slot.date().isoformat(), []).append(i)
+    grids = await asyncio.gather(
+        *(fetch_weather_modifiers([candidates[i][:2] for i in idx], day) for day, idx in by_day.items()),
+        return_exceptions=True,
+    )
+    weather_mods = np.ones(len(candidates))
+    for idx, grid in zip(by_day.values(), grids):
+        if not isinstance(grid, Exception):
+            weather_mods[idx] = weather_features.select(grid, [candidates[i][2].hour for i in idx])
+
+    features = np.empty((len(candidates), 3))
+    mods = []
+    for i, (lat, lng, slot, hist, event_mod) in enumerate(candidates):
+        weather_mod = float(weather_mods[i])
+        features[i] = _model_features(weather_mod, event_mod, hist)
+        mods.append((hist, weather_mod, event_mod))
+    with metrics.track("model_batch"):
+        scores = model.predict_many(features, out=out)
+
+    return [
+        {
+            "latitude": lat,
+            "longitude": lng,
+            "date_iso": slot.isoformat(timespec="minutes"),
+            "score": float(score) * 100,
+            "label": _label(float(score)),
+            "features": {
+                "historical_baseline": hist,
+                "weather_modifier": weather_mod,
+                "event_modifier": event_mod,
+            },
+        }
+        for (lat, lng, slot, _, _), score, (hist, weather_mod, event_mod) in zip(candidates, scores, mods)
+    ]
@@ -0,0 +1,97 @@
+"""Compact binary z/x/y tiles for the foot-traffic map layer.
+
+A tile holds every place the index knows inside one web-mercator tile (thinned
+for the zoom level), with its whole week of busyness, so panning and changing
+the day/hour slider never need another request. Little-endian layout, each
+section aligned for typed-array views on the client:
+
+    magic    4 bytes   b"FTT1"
+    count    uint32    n places
+    slots    uint16    168 (full week, Sunday-first, 24 per day) or 1 (?dow=&hour=)
+    reserved uint16
+    coords   uint16[n][2]   x, y within the tile, 0..65535, y growing southwards
+    values   uint8[n][slots]  busyness 0..100, 255 where the weekday has no data
+    names    n x (uint8 length, UTF-8 bytes), truncated to 255 bytes
+
+Tiles are keyed on the index's per-tile version, so a tile is rebuilt only
+after a place inside it changes. The ETag is a hash of the bytes, so workers
+agree on it once their indexes have picked up the same places from the store
+(see get_place_index); clients revalidate after TILE_MAX_AGE_SECONDS.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import struct
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.core import metrics
+from app.core.cache import AsyncTTLCache
+from app.core.config import settings
+from app.services import histograms
+from app.services.place_index import TILE_MAX_ZOOM, get_place_index
+
+MAGIC = b"FTT1"
+HEADER = struct.Struct("<4sIHH")
+EXTENT = 65535
+MAX_ZOOM = TILE_MAX_ZOOM
+
+_tiles = AsyncTTLCache(ttl_seconds=settings.tile_max_age_seconds, max_entries=settings.tile_cache_max_entries)
+metrics.register_cache("tiles", _tiles)
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(sw_lat, sw_lng, ne_lat, ne_lng) of a web-mercator tile."""
+    n = 2 ** z
+    return _tile_lat(y + 1, n), x / n * 360.0 - 180.0, _tile_lat(y, n), (x + 1) / n * 360.0 - 180.0
+
+
+def _tile_lat(y: float, n: int) -> float:
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+
+
+def valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def get_tile(z: int, x: int, y: int, dow: Optional[int] = None, hour: Optional[int] = None) -> Tuple[bytes, str]:
+    """(tile bytes, ETag) for a tile, from cache when the index hasn't changed."""
+    index = get_place_index()
+    key = (index.tile_version(z, x, y), z, x, y, dow, hour)
+    cached = _tiles.lookup(key)
+    if cached is None:
+        with metrics.track("tile_build"):
+            body = build_tile(z, x, y, dow, hour)
+        cached = (body, '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"')
+        _tiles.set(key, cached)
+    return cached
+
+
+def build_tile(z: int, x: int, y: int, dow: Optional[int] = None, hour: Optional[int] = None) -> bytes:
+    sw_lat, sw_lng, ne_lat, ne_lng = tile_bounds(z, x, y)
+    lat, lng, hist, names = get_place_index().tile_places(
+        sw_lat, sw_lng, ne_lat, ne_lng, zoom=z, limit=settings.tile_max_places
+    )
+    n = 2 ** z
+    # Position inside the tile in mercator space, quantized to 16 bits
+    px = (lng + 180.0) / 360.0 * n - x
+    py = (1 - np.arcsinh(np.tan(np.radians(lat))) / np.pi) / 2 * n - y
+    coords = np.rint(np.clip(np.stack([px, py], axis=1), 0.0, 1.0) * EXTENT).astype("<u2")
+
+    if dow is not None and hour is not None:
+        values = hist[:, dow, hour].reshape(-1, 1)
+    else:
+        values = hist.reshape(-1, histograms.DAYS * histograms.HOURS)
+
+    parts = [
+        HEADER.pack(MAGIC, len(coords), values.shape[1], 0),
+        coords.tobytes(),
+        np.ascontiguousarray(values, dtype=np.uint8).tobytes(),
+    ]
+    for name in names:
+        # Cut at 255 bytes without splitting a multi-byte character
+        encoded = (name or "").encode("utf-8")[:255].decode("utf-8", "ignore").encode("utf-8")
+        parts.append(bytes([len(encoded)]) + encoded)
+    return b"".join(parts)
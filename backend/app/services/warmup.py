@@ -0,0 +1,93 @@
+"""Startup warm-up, so a new worker's first requests don't pay cold-start costs.
+
+Runs in the background once the server is listening; `/api/health` answers
+right away while `/api/ready` reports 503 until every step has finished (or
+failed, or run out of time), so a load balancer only routes to warm workers:
+
+- model: touch the scalar and batch inference paths of the loaded artifact,
+- gemini: import and configure the Gemini SDK off the event loop,
+- place_index: build the in-memory place index from the SQLite store,
+- heatmap: build the precomputed raster when missing or too old,
+- caches: run one prefetch cycle, bounded by WARMUP_TIMEOUT_SECONDS.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.registry import get_registry
+from app.services.heatmap import ensure_heatmap
+from app.services.place_index import get_place_index
+from app.services.predict_service import configure_gemini
+from app.services.prefetch import run_cycle
+
+_task: Optional[asyncio.Task] = None
+_started_at: Optional[float] = None
+_finished_at: Optional[float] = None
+_steps: Dict[str, dict] = {}
+
+
+def start_warmup() -> None:
+    global _task, _started_at
+    if _task is None:
+        _started_at = time.monotonic()
+        _task = asyncio.create_task(warm_up())
+
+
+async def stop_warmup() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+async def warm_up() -> None:
+    global _finished_at
+    await _step("model", _warm_model)
+    await _step("gemini", lambda: asyncio.to_thread(configure_gemini))
+    await _step("place_index", lambda: asyncio.to_thread(get_place_index))
+    await _step("heatmap", lambda: asyncio.to_thread(ensure_heatmap))
+    if settings.warmup_prime_caches:
+        await _step("caches", lambda: asyncio.wait_for(run_cycle(), timeout=settings.warmup_timeout_seconds))
+    _finished_at = time.monotonic()
+
+
+async def _step(name: str, run: Callable[[], Awaitable]) -> None:
+    started = time.perf_counter()
+    try:
+        await run()
+        _steps[name] = {"ok": True}
+    except asyncio.TimeoutError:
+        # Whatever didn't finish is left to the prefetch scheduler
+        _steps[name] = {"ok": False, "error": "timed out"}
+    except Exception as e:
+        _steps[name] = {"ok": False, "error": str(e) or type(e).__name__}
+    _steps[name]["seconds"] = round(time.perf_counter() - started, 3)
+
+
+async def _warm_model() -> None:
+    registry = get_registry()
+    for model in (registry.active, registry.candidate):
+        if model is not None:
+            model.predict(weather=0.5, events=0.5, historical=0.5)
+            model.predict_many(np.full((8, 3), 0.5))
+
+
+def is_ready() -> bool:
+    return _finished_at is not None
+
+
+def warmup_status() -> dict:
+    return {
+        "ready": is_ready(),
+        "seconds": round(((_finished_at or time.monotonic()) - _started_at), 3) if _started_at else None,
+        "steps": dict(_steps),
+    }
@@ -0,0 +1,79 @@
+"""Vectorized weather modifier over (cells, hours, vars) forecast arrays.
+
+Scores follow the original daytime rule: ideal temperature around 20°C, little
+rain (5mm over the day is the worst case) and clear skies, mapped to a
+multiplicative modifier in roughly 0.7..1.3. Per-hour modifiers use a short
+window around each hour, with rain scaled to a daytime-equivalent total.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+
+VARS = ("temperature_2m", "precipitation", "cloud_cover")
+HOURS = 24
+DAYTIME = slice(8, 20)
+# Column holding the whole-daytime modifier, after the 24 hourly ones
+DAYTIME_INDEX = HOURS
+# Hours either side of the requested hour that count towards it
+HOUR_WINDOW = 1
+
+
+def from_hourly(hourly: dict) -> np.ndarray:
+    """First day of an Open-Meteo `hourly` block as an (hours, vars) array; gaps are NaN."""
+    values = np.full((HOURS, len(VARS)), np.nan)
+    for v, name in enumerate(VARS):
+        series = np.array((hourly or {}).get(name) or [], dtype=np.float64)[:HOURS]
+        values[:len(series), v] = series
+    return values
+
+
+def payload_modifiers(data) -> dict | None:
+    """JSON-friendly modifiers for one Open-Meteo response: 24 hourly plus daytime."""
+    hourly = (data or {}).get("hourly") if isinstance(data, dict) else None
+    if not hourly:
+        return None
+    mods = modifiers(from_hourly(hourly))
+    return {"hourly": mods[:HOURS].tolist(), "daytime": float(mods[DAYTIME_INDEX])}
+
+
+def select(mods: np.ndarray, hours) -> np.ndarray:
+    """Pick each row's hourly column (or the daytime one where hour is None); no data is neutral."""
+    cols = np.array([DAYTIME_INDEX if h is None else h for h in hours], dtype=np.intp)
+    picked = mods[np.arange(len(cols)), cols]
+    return np.where(np.isnan(picked), 1.0, picked)
+
+
+def modifiers(values: np.ndarray) -> np.ndarray:
+    """(cells, HOURS + 1) modifiers: one per hour, then the daytime one at DAYTIME_INDEX."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty(values.shape[:-2] + (HOURS + 1,))
+
+    # Per hour: mean over a centered window; rain as a rate times the daytime length
+    padded = np.pad(values, [(0, 0)] * (values.ndim - 2) + [(HOUR_WINDOW, HOUR_WINDOW), (0, 0)],
+                    constant_values=np.nan)
+    windows = np.stack([padded[..., i:i + HOURS, :] for i in range(2 * HOUR_WINDOW + 1)], axis=-2)
+    counts = (~np.isnan(windows)).sum(axis=-2)
+    means = np.nansum(windows, axis=-2) / np.maximum(counts, 1)
+    daytime_hours = DAYTIME.stop - DAYTIME.start
+    out[..., :HOURS] = _score(
+        means[..., 0], counts[..., 0], means[..., 1] * daytime_hours, means[..., 2], counts[..., 2]
+    )
+
+    # Whole daytime: the original averages over 8am..8pm, with total rain
+    day = values[..., DAYTIME, :]
+    n = (~np.isnan(day)).sum(axis=-2)
+    sums = np.nansum(day, axis=-2)
+    out[..., DAYTIME_INDEX] = _score(
+        sums[..., 0] / np.maximum(n[..., 0], 1), n[..., 0], sums[..., 1], sums[..., 2] / np.maximum(n[..., 2], 1), n[..., 2]
+    )
+    return out
+
+
+def _score(avg_temp, n_temps, total_precip, avg_clouds, n_clouds) -> np.ndarray:
+    temp_score = 1.0 - np.minimum(np.abs(avg_temp - 20) / 10, 1.0)  # Penalty for deviation from 20°C
+    precip_score = 1.0 - np.minimum(total_precip / 5.0, 1.0)  # Heavily penalize >5mm total rain
+    cloud_score = 1.0 - np.where(n_clouds > 0, avg_clouds, 50.0) / 100.0
+    base = temp_score * 0.5 + precip_score * 0.35 + cloud_score * 0.15  # 0..1
+    # No temperatures means no forecast: stay neutral
+    return np.where(n_temps > 0, 0.7 + 0.6 * base, 1.0)
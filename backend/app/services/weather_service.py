@@ -1,31 +1,165 @@
+import asyncio
 import httpx
+import numpy as np
+from app.core import metrics
+from app.core.cache import AsyncTTLCache
 from app.core.config import settings
+from app.core.http import get_client
 from datetime import datetime
+from typing import List, Tuple
+from zoneinfo import ZoneInfo
+from app.services import weather_features
 
 
-async def fetch_weather_forecast(latitude: float, longitude: float, date_iso: str | None = None):
+TIMEZONE = "America/Los_Angeles"
+
+
+# Forecasts keyed on (snapped lat, snapped lng, date); see `forecast_key`
+forecast_cache = AsyncTTLCache(
+    ttl_seconds=settings.weather_cache_ttl_seconds,
+    max_entries=settings.weather_cache_max_entries,
+    name="weather_forecast",
+)
+# Per-cell modifier rows from `fetch_weather_modifiers`, same keys as forecast_cache
+grid_cache = AsyncTTLCache(
+    ttl_seconds=settings.weather_cache_ttl_seconds,
+    max_entries=settings.weather_grid_cache_max_entries,
+    name="weather_grid",
+)
+metrics.register_cache("weather_forecast", forecast_cache)
+metrics.register_cache("weather_grid", grid_cache)
+
+
+async def fetch_weather_forecast(
+    latitude: float,
+    longitude: float,
+    date_iso: str | None = None,
+    client: httpx.AsyncClient | None = None,
+    refresh: bool = False,
+):
+    # Nearby requests share a grid cell, so query Open-Meteo at the cell center
+    latitude, longitude = snap_to_grid(latitude, longitude)
+    day = None
+    try:
+        if date_iso:
+            day = datetime.fromisoformat(date_iso.replace("Z", "")).date().isoformat()
+    except Exception:
+        # ignore parsing errors and fall back to default range
+        day = None
+
+    return await forecast_cache.get_or_load(
+        forecast_key(latitude, longitude, day),
+        lambda: _fetch_open_meteo(latitude, longitude, day, client),
+        should_cache=lambda payload: not payload.get("error"),
+        refresh=refresh,
+    )
+
+
+async def _fetch_open_meteo(latitude: float, longitude: float, day: str | None, client: httpx.AsyncClient | None):
     params = {
         "latitude": latitude,
         "longitude": longitude,
         "hourly": "temperature_2m,precipitation,cloud_cover,windspeed_10m",
-        "timezone": "America/Los_Angeles",
+        "timezone": TIMEZONE,
     }
     # If a specific date is requested, bound the forecast to that day
-    try:
-        if date_iso:
-            day = datetime.fromisoformat(date_iso.replace("Z", "")).date()
-            params["start_date"] = day.isoformat()
-            params["end_date"] = day.isoformat()
-    except Exception:
-        # ignore parsing errors and fall back to default range
-        pass
-    async with httpx.AsyncClient(timeout=20) as client:
+    if day:
+        params["start_date"] = day
+        params["end_date"] = day
+    client = client or get_client("open_meteo")
+    with metrics.track("open_meteo") as stage:
         try:
             resp = await client.get(settings.open_meteo_base, params=params)
             resp.raise_for_status()
             data = resp.json()
         except Exception as e:
+            stage.fail()
             return {"error": str(e), "data": None}
-    return {"data": data}
+    # Score the (first) day once here so every slot lookup is just an index
+    return {"data": data, "modifiers": weather_features.payload_modifiers(data)}
+
+
+async def fetch_weather_modifiers(
+    points: List[Tuple[float, float]],
+    day: str | None = None,
+    client: httpx.AsyncClient | None = None,
+    refresh: bool = False,
+) -> np.ndarray:
+    """Weather modifiers for many points as a (cells, 25) array.
+
+    Columns 0..23 are per-hour modifiers and DAYTIME_INDEX the whole-daytime one
+    (see weather_features). Points are snapped like `fetch_weather_forecast`;
+    cells not already cached are fetched together, up to OPEN_METEO_MAX_LOCATIONS
+    per Open-Meteo request, asking only for the variables the modifier reads.
+    Failed cells come back as NaN. `refresh=True` refetches every cell (used by
+    the prefetch scheduler).
+    """
+    day = day or datetime.now(ZoneInfo(TIMEZONE)).date().isoformat()
+    keys = [forecast_key(*snap_to_grid(lat, lng), day) for lat, lng in points]
+    out = np.full((len(keys), weather_features.HOURS + 1), np.nan)
+
+    cached = {} if refresh else await grid_cache.lookup_many(keys)
+    missing = {}
+    for i, key in enumerate(keys):
+        if key in cached:
+            out[i] = cached[key]
+        else:
+            missing.setdefault(key, []).append(i)
+    if not missing:
+        return out
+
+    cells = list(missing)
+    size = max(1, settings.open_meteo_max_locations)
+    chunks = [cells[i:i + size] for i in range(0, len(cells), size)]
+    results = await asyncio.gather(*(_fetch_open_meteo_grid(chunk, day, client) for chunk in chunks))
+    for chunk, values in zip(chunks, results):
+        if values is None:
+            continue
+        # Score the day once; slot lookups are then just a column index
+        rows = dict(zip(chunk, weather_features.modifiers(values)))
+        grid_cache.set_many(rows)
+        for key, mods in rows.items():
+            out[missing[key]] = mods
+    return out
+
+
+async def _fetch_open_meteo_grid(cells: List[tuple], day: str, client: httpx.AsyncClient | None) -> np.ndarray | None:
+    params = {
+        "latitude": ",".join(str(lat) for lat, _, _ in cells),
+        "longitude": ",".join(str(lng) for _, lng, _ in cells),
+        "hourly": ",".join(weather_features.VARS),
+        "timezone": TIMEZONE,
+        "start_date": day,
+        "end_date": day,
+    }
+    client = client or get_client("open_meteo")
+    with metrics.track("open_meteo_grid") as stage:
+        try:
+            resp = await client.get(settings.open_meteo_base, params=params)
+            resp.raise_for_status()
+            data = resp.json()
+        except Exception:
+            stage.fail()
+            return None
+    # One location comes back as an object, several as a list in request order
+    locations = data if isinstance(data, list) else [data]
+    if len(locations) != len(cells):
+        return None
+    return np.stack([weather_features.from_hourly(loc.get("hourly")) for loc in locations])
+
+
+def forecast_key(latitude: float, longitude: float, day: str | None) -> tuple:
+    # Callers pass coordinates already snapped with `snap_to_grid`
+    return (latitude, longitude, day)
+
+
+def snap_to_grid(latitude: float, longitude: float) -> tuple[float, float]:
+    step = settings.weather_cache_grid_deg
+    if step <= 0:
+        return latitude, longitude
+    # Round the result too, so float noise never splits one cell into two keys
+    return round(round(latitude / step) * step, 6), round(round(longitude / step) * step, 6)
 
 
+def cache_stats() -> dict:
+    return {**forecast_cache.stats(), "grid_deg": settings.weather_cache_grid_deg, "grid": grid_cache.stats()}
@@ -0,0 +1,80 @@
+"""Micro-benchmarks for the per-request scoring helpers, on the recorded fixtures.
+
+Run from backend/ (offline, no server needed):
+
+    python -m benchmarks.bench_features
+    python -m benchmarks.bench_features --save baseline.json
+    python -m benchmarks.bench_features --compare baseline.json --tolerance 0.25
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from typing import Callable, Dict
+
+import numpy as np
+
+from benchmarks.common import add_gate_arguments, gate, load_fixture
+from app.models.prediction_model import TrafficModel
+from app.services.events_service import _normalize_serpapi_events
+from app.services import histograms
+from app.services.foot_traffic_service import DAYS_ORDER, _aggregate_series
+from app.services.predict_service import _event_modifier, _weather_modifier
+from app.services.weather_features import payload_modifiers
+
+DAY = "2026-10-18"
+# Places averaged per bounds-mode request
+PLACES = 300
+
+
+def cases() -> Dict[str, Callable[[], object]]:
+    place = load_fixture("outscraper_places.json")["data"][0]
+    days = [place["popular_times"].get(day) for day in DAYS_ORDER]
+    # The fixture place, scaled per place so the average is not a no-op
+    scale = np.random.default_rng(0).uniform(0.5, 1.5, size=(PLACES, 1, 1))
+    hist = histograms.from_days(days)
+    stacked = np.where(hist == histograms.NO_DATA, hist, np.clip(hist * scale, 0, 100)).astype(np.uint8)
+    forecast = load_fixture("open_meteo.json")
+    weather = {"data": forecast, "modifiers": payload_modifiers(forecast)}
+    events = {"data": {"events": _normalize_serpapi_events(load_fixture("serpapi_events.json"), DAY)}}
+    model = TrafficModel.train_mock()
+    lat, lng = 37.7955, -122.3937
+    return {
+        "histograms.from_days": lambda: histograms.from_days(days),
+        f"_aggregate_series ({PLACES} places, 24h)": lambda: _aggregate_series(stacked),
+        f"_aggregate_series ({PLACES} places, slot)": lambda: _aggregate_series(stacked, dow=6, hour=13),
+        "_weather_modifier (hour)": lambda: _weather_modifier(weather, 13),
+        "_weather_modifier (daytime)": lambda: _weather_modifier(weather),
+        "_event_modifier (slot)": lambda: _event_modifier(events, lat, lng, f"{DAY}T18:00:00"),
+        "_event_modifier (whole day)": lambda: _event_modifier(events, lat, lng),
+        "TrafficModel.predict": lambda: model.predict(weather=0.6, events=0.3, historical=0.7),
+    }
+
+
+def measure(fn: Callable[[], object], min_seconds: float, repeats: int) -> float:
+    """Best per-call time in microseconds over `repeats` runs of at least `min_seconds`."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_seconds / 0.2))
+    return min(timer.repeat(repeat=repeats, number=number)) / number * 1e6
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="minimum time per timing run")
+    parser.add_argument("--repeats", type=int, default=5)
+    add_gate_arguments(parser)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, fn in cases().items():
+        fn()  # first call builds any per-payload tables
+        us = measure(fn, args.min_seconds, args.repeats)
+        results[name] = {"us_per_call": us}
+        print(f"{name:<40} {us:10.3f} us/call")
+    sys.exit(gate(results, args))
+
+
+if __name__ == "__main__":
+    main()
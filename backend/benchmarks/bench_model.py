@@ -0,0 +1,59 @@
+"""Micro-benchmark: TrafficModel inference vs. the sklearn `predict` it replaced.
+
+Run from backend/:
+
+    python -m benchmarks.bench_model
+"""
+from __future__ import annotations
+
+import timeit
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+from app.models.prediction_model import TrafficModel
+
+
+def _sklearn_twin(model: TrafficModel) -> LinearRegression:
+    # Same coefficients behind sklearn's validated predict path
+    X = np.random.default_rng(0).random((16, 3))
+    reg = LinearRegression().fit(X, X @ model.coef + model.intercept)
+    return reg
+
+
+def _report(name: str, seconds: float, calls: int, baseline: float | None = None) -> float:
+    per_call = seconds / calls
+    speedup = f"  ({baseline / per_call:,.0f}x faster)" if baseline else ""
+    print(f"{name:<40} {per_call * 1e6:10.3f} us/call{speedup}")
+    return per_call
+
+
+def main(single_calls: int = 20000, batch_size: int = 1000, batch_calls: int = 2000) -> None:
+    model = TrafficModel.train_mock()
+    reg = _sklearn_twin(model)
+    w, e, h = 0.6, 0.3, 0.7
+
+    print("single prediction")
+    base = _report(
+        "sklearn reg.predict([[w, e, h]])",
+        timeit.timeit(lambda: max(0.0, min(1.0, float(reg.predict(np.array([[w, e, h]]))[0]))), number=single_calls),
+        single_calls,
+    )
+    _report("TrafficModel.predict (scalar path)", timeit.timeit(lambda: model.predict(w, e, h), number=single_calls), single_calls, base)
+
+    print(f"\nbatch of {batch_size}")
+    X = np.random.default_rng(1).random((batch_size, 3))
+    out = np.empty(batch_size)
+    base = _report(
+        "sklearn reg.predict(X)",
+        timeit.timeit(lambda: np.clip(reg.predict(X), 0.0, 1.0), number=batch_calls),
+        batch_calls,
+    )
+    _report("TrafficModel.predict_many(X)", timeit.timeit(lambda: model.predict_many(X), number=batch_calls), batch_calls, base)
+    _report("TrafficModel.predict_many(X, out=buf)", timeit.timeit(lambda: model.predict_many(X, out=out), number=batch_calls), batch_calls, base)
+
+    assert np.allclose(model.predict_many(X), np.clip(reg.predict(X), 0.0, 1.0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Cold-start profile: import time and time to the first responses of a fresh worker.
+
+Run from backend/:
+
+    python -m benchmarks.bench_startup            # 3 runs, median reported
+    python -m benchmarks.bench_startup --runs 5 --no-prime
+
+Each run starts a new interpreter, so nothing is shared between runs. Reported:
+- import: `import app.main` in a fresh process,
+- listening: process start until /api/health answers,
+- ready: process start until /api/ready answers 200 (warm-up finished),
+- first predict: latency of the first /api/predict once ready.
+Add `-X importtime` output with `--importtime` to see which modules dominate.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+_IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+_PREDICT_PARAMS = {"latitude": 37.7749, "longitude": -122.4194, "place_query": "Ferry Building, San Francisco"}
+
+
+def measure_import(env: dict) -> float:
+    out = subprocess.run([sys.executable, "-c", _IMPORT_SNIPPET], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_server(env: dict, timeout: float = 60.0) -> dict:
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        with httpx.Client(base_url=base, timeout=timeout) as client:
+            listening = _wait_for(client, "/api/health", started, timeout)
+            ready = _wait_for(client, "/api/ready", started, timeout)
+            t = time.perf_counter()
+            client.get("/api/predict", params=_PREDICT_PARAMS)
+            first_predict = time.perf_counter() - t
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return {"listening": listening, "ready": ready, "first predict": first_predict}
+
+
+def _wait_for(client: httpx.Client, path: str, started: float, timeout: float) -> float:
+    while time.perf_counter() - started < timeout:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(f"{path} not ready after {timeout}s")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--no-prime", action="store_true", help="skip the cache-priming warm-up step")
+    parser.add_argument("--importtime", action="store_true", help="print the slowest imports of app.main")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ, PREFETCH_ENABLED="false")
+    if args.no_prime:
+        env["WARMUP_PRIME_CACHES"] = "false"
+
+    samples: dict = {"import": []}
+    for _ in range(args.runs):
+        samples["import"].append(measure_import(env))
+        for name, seconds in measure_server(env).items():
+            samples.setdefault(name, []).append(seconds)
+
+    for name, values in samples.items():
+        print(f"{name:<16} {statistics.median(values) * 1000:9.1f} ms  (min {min(values) * 1000:.1f}, max {max(values) * 1000:.1f})")
+
+    if args.importtime:
+        out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], env=env,
+                             capture_output=True, text=True)
+        rows = [line.split("|") for line in out.stderr.splitlines() if line.startswith("import time:") and "|" in line]
+        rows = [(int(r[1]), r[2].rstrip()) for r in rows if r[1].strip().isdigit()]
+        print("\nslowest imports (cumulative us)")
+        for cumulative, module in sorted(rows, reverse=True)[:15]:
+            print(f"{cumulative:>10}  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Shared helpers: fixtures, percentiles and baseline comparison for gating.
+
+Every benchmark can `--save` its numbers as JSON and `--compare` against a
+saved baseline; a metric that got worse by more than `--tolerance` (relative)
+fails the run with exit status 1, so CI can gate on it.
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Metrics where a bigger number is better; everything else is a latency
+HIGHER_IS_BETTER = ("rps", "requests")
+
+
+def load_fixture(name: str):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    if not len(samples):
+        return {"p50": float("nan"), "p95": float("nan"), "p99": float("nan")}
+    p50, p95, p99 = np.percentile(np.asarray(samples, dtype=np.float64), [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+
+def add_gate_arguments(parser) -> None:
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="fail when worse than this saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+
+
+def gate(results: Dict[str, Dict[str, float]], args) -> int:
+    """Save and/or compare `results` ({benchmark: {metric: value}}); returns an exit status."""
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if not args.compare:
+        return 0
+    with open(args.compare, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"\nno regressions beyond {args.tolerance:.0%} against {args.compare}")
+    return 1 if regressions else 0
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for bench, metrics in results.items():
+        for metric, value in metrics.items():
+            before = (baseline.get(bench) or {}).get(metric)
+            if not before or value != value:  # missing baseline or NaN
+                continue
+            change = (before - value) / before if metric in HIGHER_IS_BETTER else (value - before) / before
+            if change > tolerance:
+                regressions.append(f"{bench} {metric}: {before:.6g} -> {value:.6g} ({change:+.0%})")
+    return regressions
@@ -0,0 +1,259 @@
+"""Async load driver for /api/predict, /api/predict-llm and bounds-mode /api/foot-traffic.
+
+Run from backend/. By default it starts the upstream stand-ins and a fresh
+backend wired to them, so nothing leaves the machine:
+
+    python -m benchmarks.load                                  # every scenario, 20s each
+    python -m benchmarks.load --scenario predict --concurrency 64 --duration 30
+    python -m benchmarks.load --latency outscraper=3 --error-rate outscraper=0.2
+    python -m benchmarks.load --target http://localhost:8000   # an already running server
+
+Requests are spread over `--distinct` locations and places so caches see a
+realistic mix of hits and misses. Reports p50/p95/p99 latency, RPS and errors
+per scenario, plus the backend's cache hit ratios from /api/metrics. Gate on
+the numbers with --save / --compare (see benchmarks/common.py).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.common import add_gate_arguments, gate, percentiles
+from benchmarks.standins import add_injection_arguments, app_env
+
+# San Francisco, roughly the default prefetch area
+SW, NE = (37.70, -122.52), (37.82, -122.36)
+PLACES = [
+    "Ferry Building", "Dolores Park", "Pier 39", "Union Square", "Chase Center", "Oracle Park",
+    "Mission Dolores", "Alamo Square", "Fort Mason", "Japantown", "Castro Theatre", "Salesforce Park",
+]
+
+Request = Tuple[str, dict]
+
+
+def _predict_requests(distinct: int, seed: int) -> Callable[[random.Random], Request]:
+    pool_rng = random.Random(seed)
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    pool = [
+        {
+            "latitude": round(pool_rng.uniform(SW[0], NE[0]), 5),
+            "longitude": round(pool_rng.uniform(SW[1], NE[1]), 5),
+            "place_query": f"{pool_rng.choice(PLACES)} #{i % max(1, distinct // 4)}",
+        }
+        for i in range(distinct)
+    ]
+
+    def make(rng: random.Random) -> dict:
+        when = start + timedelta(hours=rng.randrange(48))
+        return {**rng.choice(pool), "date_iso": when.isoformat().replace("+00:00", "Z"), "include_raw": "false"}
+
+    return make
+
+
+def _bounds_request(rng: random.Random) -> dict:
+    zoom = rng.choice([13, 14, 15, 16])
+    span = 0.2 / 2 ** (zoom - 12)
+    lat, lng = rng.uniform(SW[0], NE[0] - span), rng.uniform(SW[1], NE[1] - span)
+    return {
+        "sw_lat": lat, "sw_lng": lng, "ne_lat": lat + span, "ne_lng": lng + span,
+        "zoom": zoom, "dow": rng.randrange(7), "hour": rng.randrange(24),
+    }
+
+
+def scenarios(distinct: int, seed: int) -> Dict[str, Callable[[random.Random], Request]]:
+    predict = _predict_requests(distinct, seed)
+    return {
+        "predict": lambda rng: ("/api/predict", predict(rng)),
+        "predict-llm": lambda rng: ("/api/predict-llm", predict(rng)),
+        "foot-traffic": lambda rng: ("/api/foot-traffic", _bounds_request(rng)),
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    make: Callable[[random.Random], Request],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int,
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    async def worker(n: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed * 1000 + n)
+        while True:
+            t = time.perf_counter()
+            if t >= stop_at:
+                return
+            path, params = make(rng)
+            try:
+                resp = await client.get(path, params=params)
+                failed = resp.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            if t >= measure_from:
+                latencies.append(time.perf_counter() - t)
+                errors += failed
+
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - measure_from
+    return {
+        **{k: v * 1000 for k, v in percentiles(latencies).items()},
+        "rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "requests": len(latencies),
+        "errors": errors,
+    }
+
+
+async def seed_places(client: httpx.AsyncClient, distinct: int) -> None:
+    """Look up every place once so bounds mode has an index to answer from."""
+    queries = sorted({f"{name} #{i}" for name in PLACES for i in range(max(1, distinct // 4))})
+    sem = asyncio.Semaphore(8)
+
+    async def one(q: str) -> None:
+        async with sem:
+            try:
+                await client.get("/api/foot-traffic", params={"place_query": q})
+            except httpx.HTTPError:
+                pass
+
+    await asyncio.gather(*(one(q) for q in queries))
+
+
+async def cache_ratios(client: httpx.AsyncClient) -> Dict[str, str]:
+    try:
+        text = (await client.get("/api/metrics")).text
+    except httpx.HTTPError:
+        return {}
+    ratios = {}
+    for line in text.splitlines():
+        if line.startswith("app_cache_hit_ratio{"):
+            name = line.split('cache="', 1)[1].split('"', 1)[0]
+            ratios[name] = line.rsplit(" ", 1)[1]
+    return ratios
+
+
+async def drive(base: str, args) -> Dict[str, Dict[str, float]]:
+    selected = scenarios(args.distinct, args.seed)
+    names = list(selected) if args.scenario == "all" else [args.scenario]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base, timeout=args.timeout, limits=limits) as client:
+        if "foot-traffic" in names:
+            await seed_places(client, args.distinct)
+        print(f"{'scenario':<14} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rps':>9} {'requests':>9} {'errors':>7}")
+        for name in names:
+            r = await run_scenario(client, selected[name], args.concurrency, args.duration, args.warmup, args.seed)
+            results[name] = r
+            print(f"{name:<14} {r['p50']:9.1f} {r['p95']:9.1f} {r['p99']:9.1f} {r['rps']:9.1f} {r['requests']:9d} {r['errors']:7d}")
+        ratios = await cache_ratios(client)
+    if ratios:
+        print("\ncache hit ratio: " + ", ".join(f"{k}={float(v):.2f}" for k, v in ratios.items()))
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+def start_stack(args, workdir: str, procs: List[subprocess.Popen]) -> str:
+    """Stand-ins plus a backend pointed at them; returns the backend URL.
+
+    Started processes are appended to `procs` as they start, for the caller to stop.
+    """
+    standin_port, app_port = _free_port(), _free_port()
+    standin_cmd = [sys.executable, "-m", "benchmarks.standins", "--port", str(standin_port), "--jitter", str(args.jitter)]
+    for flag, pairs in (("--latency", args.latency), ("--error-rate", args.error_rate)):
+        for pair in pairs or []:
+            standin_cmd += [flag, pair]
+    procs.append(subprocess.Popen(standin_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    _wait_ready(f"http://127.0.0.1:{standin_port}/docs")
+
+    env = dict(
+        os.environ,
+        **app_env(f"http://127.0.0.1:{standin_port}"),
+        # Measure the request path on its own: no background refreshes, empty store
+        PREFETCH_ENABLED="false",
+        WARMUP_PRIME_CACHES="false",
+        PLACE_STORE_PATH=os.path.join(workdir, "places.sqlite3"),
+        HEATMAP_PATH=os.path.join(workdir, "heatmap.npy"),
+        CACHE_BACKEND=args.cache_backend,
+        CACHE_SQLITE_PATH=os.path.join(workdir, "cache.sqlite3"),
+    )
+    procs.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(app_port), "--log-level", "warning",
+         "--workers", str(args.workers)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    ))
+    base = f"http://127.0.0.1:{app_port}"
+    _wait_ready(f"{base}/api/ready")
+    return base
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=["all", "predict", "predict-llm", "foot-traffic"], default="all")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--distinct", type=int, default=200, help="distinct locations in the request mix")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the spawned backend")
+    parser.add_argument("--cache-backend", choices=["none", "memory", "sqlite"], default="none",
+                        help="CACHE_BACKEND of the spawned backend; sqlite shares caches between --workers")
+    parser.add_argument("--target", help="benchmark this running server instead of spawning one")
+    add_injection_arguments(parser)
+    add_gate_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.target:
+        results = asyncio.run(drive(args.target.rstrip("/"), args))
+        sys.exit(gate(results, args))
+
+    workdir = tempfile.mkdtemp(prefix="bench-load-")
+    procs: List[subprocess.Popen] = []
+    try:
+        base = start_stack(args, workdir, procs)
+        results = asyncio.run(drive(base, args))
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            proc.wait(timeout=10)
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(gate(results, args))
+
+
+if __name__ == "__main__":
+    main()
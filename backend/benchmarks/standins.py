@@ -0,0 +1,184 @@
+"""Local stand-ins for Open-Meteo, SerpApi, OutScraper and Gemini.
+
+One server replays the payloads in benchmarks/fixtures under a path prefix per
+upstream, with injected latency and errors, so load tests run offline and
+repeatably:
+
+    python -m benchmarks.standins --port 8900 --latency outscraper=0.8 --error-rate serpapi=0.05
+
+Point the app at it with the variables from `app_env()`, e.g.
+OPEN_METEO_BASE=http://127.0.0.1:8900/open-meteo/v1/forecast. `--latency`
+takes `upstream=seconds` (the mean; actual delays are spread by `--jitter`),
+`--error-rate` takes `upstream=fraction` of requests answered with a 503.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import zlib
+from typing import Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from benchmarks.common import load_fixture
+
+UPSTREAMS = ("open_meteo", "serpapi", "outscraper", "gemini")
+# Ballpark latencies of the live APIs; override with --latency
+DEFAULT_LATENCY = {"open_meteo": 0.08, "serpapi": 0.6, "outscraper": 1.2, "gemini": 0.9}
+SF_CENTER = (37.7749, -122.4194)
+
+_latency: Dict[str, float] = dict(DEFAULT_LATENCY)
+_error_rate: Dict[str, float] = {}
+_jitter = 0.3
+
+app = FastAPI(title="upstream stand-ins")
+_open_meteo = load_fixture("open_meteo.json")
+_serpapi = load_fixture("serpapi_events.json")
+_outscraper = load_fixture("outscraper_places.json")["data"]
+_gemini = load_fixture("gemini_generate.json")
+
+
+def configure(latency: Dict[str, float] | None = None, error_rate: Dict[str, float] | None = None,
+              jitter: float | None = None) -> None:
+    global _jitter
+    _latency.update(latency or {})
+    _error_rate.update(error_rate or {})
+    if jitter is not None:
+        _jitter = jitter
+
+
+def app_env(base: str) -> Dict[str, str]:
+    """Environment that points the backend at stand-ins served from `base`."""
+    return {
+        "OPEN_METEO_BASE": f"{base}/open-meteo/v1/forecast",
+        "SERPAPI_BASE": f"{base}/serpapi/search.json",
+        "OUTSCRAPER_ENDPOINTS": json.dumps([f"{base}/outscraper/cloud/places", f"{base}/outscraper/api/places"]),
+        "GEMINI_API_ENDPOINT": f"{base}/gemini",
+        "SERPAPI_API_KEY": "standin",
+        "OUTSCRAPER_API_KEY": "standin",
+        "GEMINI_API_KEY": "standin",
+    }
+
+
+async def _delay(upstream: str) -> Response | None:
+    """Sleep for the injected latency; returns an error response for injected failures."""
+    mean = _latency.get(upstream, 0.0)
+    if mean > 0:
+        await asyncio.sleep(max(0.0, random.gauss(mean, mean * _jitter)))
+    if random.random() < _error_rate.get(upstream, 0.0):
+        return JSONResponse({"error": f"injected {upstream} failure"}, status_code=503)
+    return None
+
+
+@app.get("/open-meteo/v1/forecast")
+async def open_meteo(latitude: str, longitude: str, hourly: str = "", start_date: str | None = None):
+    error = await _delay("open_meteo")
+    if error:
+        return error
+    lats, lngs = latitude.split(","), longitude.split(",")
+    wanted = [v for v in hourly.split(",") if v] or list(_open_meteo["hourly"])
+    day = start_date or _open_meteo["hourly"]["time"][0][:10]
+    locations = []
+    for lat, lng in zip(lats, lngs):
+        loc = {**_open_meteo, "latitude": float(lat), "longitude": float(lng)}
+        loc["hourly"] = {
+            "time": [f"{day}{t[10:]}" for t in _open_meteo["hourly"]["time"]],
+            **{v: _open_meteo["hourly"][v] for v in wanted if v in _open_meteo["hourly"]},
+        }
+        locations.append(loc)
+    # Open-Meteo answers an object for one location and a list for several
+    return locations[0] if len(locations) == 1 else locations
+
+
+@app.get("/serpapi/search.json")
+async def serpapi(q: str = ""):
+    error = await _delay("serpapi")
+    return error or {**_serpapi, "search_parameters": {**_serpapi["search_parameters"], "q": q}}
+
+
+@app.post("/outscraper/{endpoint}/places")
+async def outscraper(endpoint: str, request: Request):
+    error = await _delay("outscraper")
+    if error:
+        return error
+    query = ((await request.json()).get("queries") or [{}])[0]
+    if "query" in query:
+        return {"status": "Success", "data": [_place_for(query["query"], *_near(SF_CENTER, query["query"], 0.04))]}
+    center = (float(query.get("lat", SF_CENTER[0])), float(query.get("lng", SF_CENTER[1])))
+    n = int(query.get("limit") or 10)
+    return {"status": "Success", "data": [_place_for(f"{center}#{i}", *_near(center, str(i), 0.005)) for i in range(n)]}
+
+
+def _near(center: tuple, seed: str, spread: float) -> tuple:
+    # Stable per seed, so a repeated query gets the same place back
+    rng = random.Random(zlib.crc32(seed.encode("utf-8")))
+    return center[0] + rng.uniform(-spread, spread), center[1] + rng.uniform(-spread, spread)
+
+
+def _place_for(seed: str, lat: float, lng: float) -> dict:
+    template = _outscraper[zlib.crc32(seed.encode("utf-8")) % len(_outscraper)]
+    return {
+        **template,
+        "place_id": f"standin-{zlib.crc32(seed.encode('utf-8')):08x}",
+        "name": f"{template['name']} ({seed[:40]})",
+        "coordinates": {"lat": round(lat, 6), "lng": round(lng, 6)},
+    }
+
+
+@app.post("/gemini/{path:path}")
+async def gemini(path: str):
+    error = await _delay("gemini")
+    if error:
+        return error
+    if not path.endswith(":streamGenerateContent"):
+        return _gemini
+    text = _gemini["candidates"][0]["content"]["parts"][0]["text"]
+    words = text.split(" ")
+
+    async def chunks():
+        # A few server-sent chunks, like the live streaming endpoint
+        for i in range(0, len(words), 12):
+            part = " ".join(words[i:i + 12]) + ("" if i + 12 >= len(words) else " ")
+            chunk = {"candidates": [{"content": {"parts": [{"text": part}], "role": "model"}, "index": 0}]}
+            yield f"data: {json.dumps(chunk)}\r\n\r\n"
+            await asyncio.sleep(0.02)
+
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+
+def parse_pairs(pairs) -> Dict[str, float]:
+    """["outscraper=0.8", ...] -> {"outscraper": 0.8}."""
+    out = {}
+    for pair in pairs or []:
+        name, _, value = pair.partition("=")
+        if name not in UPSTREAMS:
+            raise SystemExit(f"unknown upstream {name!r}; expected one of {', '.join(UPSTREAMS)}")
+        out[name] = float(value)
+    return out
+
+
+def add_injection_arguments(parser) -> None:
+    parser.add_argument("--latency", action="append", metavar="UPSTREAM=SECONDS",
+                        help=f"mean injected latency (defaults: {DEFAULT_LATENCY})")
+    parser.add_argument("--error-rate", action="append", metavar="UPSTREAM=FRACTION",
+                        help="fraction of requests answered with a 503")
+    parser.add_argument("--jitter", type=float, default=0.3, help="latency spread, relative to the mean")
+
+
+def main(argv: list[str] | None = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_injection_arguments(parser)
+    args = parser.parse_args(argv)
+    configure(parse_pairs(args.latency), parse_pairs(args.error_rate), args.jitter)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
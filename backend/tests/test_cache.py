@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import AsyncTTLCache
+
+
+def test_concurrent_misses_share_one_load():
+    async def run():
+        cache = AsyncTTLCache(ttl_seconds=60, max_entries=10)
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*(cache.get_or_load("k", load) for _ in range(5)))
+        assert results == ["value"] * 5
+        assert calls == 1
+        assert await cache.get_or_load("k", load) == "value"
+        assert calls == 1
+        stats = cache.stats()
+        assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 4, 1)
+
+    asyncio.run(run())
+
+
+def test_cancelled_leader_does_not_fail_waiters():
+    async def run():
+        cache = AsyncTTLCache(ttl_seconds=60, max_entries=10)
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return "value"
+
+        leader = asyncio.create_task(cache.get_or_load("k", load))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_load("k", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await waiter == "value"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        # The detached load still filled the cache
+        assert cache.get("k") == "value"
+
+    asyncio.run(run())
+
+
+def test_failed_load_reaches_every_caller_and_is_not_cached():
+    async def run():
+        cache = AsyncTTLCache(ttl_seconds=60, max_entries=10)
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(*(cache.get_or_load("k", load) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert calls == 1
+        assert cache.get("k") is None
+
+    asyncio.run(run())
+
+
+def test_should_cache_and_refresh():
+    async def run():
+        cache = AsyncTTLCache(ttl_seconds=60, max_entries=10)
+        values = iter([{"error": "x"}, {"v": 1}, {"v": 2}])
+
+        async def load():
+            return next(values)
+
+        ok = lambda payload: not payload.get("error")
+        assert await cache.get_or_load("k", load, should_cache=ok) == {"error": "x"}
+        assert await cache.get_or_load("k", load, should_cache=ok) == {"v": 1}
+        assert await cache.get_or_load("k", load, should_cache=ok) == {"v": 1}
+        assert await cache.get_or_load("k", load, should_cache=ok, refresh=True) == {"v": 2}
+        assert cache.get("k") == {"v": 2}
+
+    asyncio.run(run())
+
+
+def test_lru_bound_and_ttl_expiry():
+    cache = AsyncTTLCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    cache.set("d", 4, ttl_seconds=-1)
+    assert cache.get("d") is None
@@ -0,0 +1,122 @@
+import asyncio
+import sqlite3
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from app.core import cache_backends
+from app.core.cache import AsyncTTLCache
+from app.core.cache_backends import CacheBackend, MemoryBackend, SQLiteBackend
+from app.core.config import settings
+
+
+VALUE = {
+    "payload": {"data": {"events": [{"title": "Market", "latitude": 37.79, "start": None}]}},
+    "point": (37.7749, -122.4194, "2026-10-18"),
+    "by_id": {1: "a", (2, "b"): [1.5, None, True]},
+    "grid": np.arange(6, dtype=np.float32).reshape(2, 3),
+    "ordered": OrderedDict(x=1),
+    "tagged": {"__tuple__": [1]},
+}
+
+
+def _serializers():
+    yield "json"
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        return
+    yield "msgpack"
+
+
+def _assert_same(a, b):
+    assert type(a) is type(b) or (isinstance(a, dict) and isinstance(b, dict))
+    if isinstance(a, np.ndarray):
+        assert a.dtype == b.dtype and np.array_equal(a, b)
+    elif isinstance(a, dict):
+        assert list(a) == list(b)
+        for k in a:
+            _assert_same(a[k], b[k])
+    elif isinstance(a, (list, tuple)):
+        assert len(a) == len(b)
+        for x, y in zip(a, b):
+            _assert_same(x, y)
+    else:
+        assert a == b
+
+
+@pytest.mark.parametrize("serializer", list(_serializers()))
+def test_values_round_trip_exactly(serializer, monkeypatch):
+    monkeypatch.setattr(settings, "cache_serializer", serializer)
+    data = cache_backends.dumps(VALUE)
+    assert data[:1] == (b"m" if serializer == "msgpack" else b"j")
+    _assert_same(cache_backends.loads(data), VALUE)
+    assert cache_backends.loads(cache_backends.dumps(np.float64(2.5))) == 2.5
+
+
+@pytest.mark.parametrize("serializer", list(_serializers()))
+def test_unsupported_types_are_rejected(serializer, monkeypatch):
+    monkeypatch.setattr(settings, "cache_serializer", serializer)
+    with pytest.raises(TypeError):
+        cache_backends.dumps({"when": object()})
+
+
+def test_backend_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+@pytest.mark.parametrize("make", [lambda tmp: MemoryBackend(100), lambda tmp: SQLiteBackend(str(tmp / "cache.sqlite3"))])
+def test_backends_store_with_ttl(make, tmp_path):
+    async def run():
+        backend = make(tmp_path)
+        await backend.set_many({"a": b"1", "b": b"2"}, ttl_seconds=60)
+        await backend.set_many({"gone": b"3"}, ttl_seconds=-1)
+        found = await backend.get_many(["a", "b", "gone", "missing"])
+        assert {k: v for k, (v, _) in found.items()} == {"a": b"1", "b": b"2"}
+        assert 59 < found["a"][1] <= 60
+        await backend.close()
+
+    asyncio.run(run())
+
+
+def test_workers_share_loads_through_sqlite(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_backend", "sqlite")
+    monkeypatch.setattr(settings, "cache_sqlite_path", str(tmp_path / "cache.sqlite3"))
+
+    async def run():
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            return {"temps": np.array([12.5, 13.0]), "cell": (37.77, -122.42)}
+
+        # Two caches with the same name stand in for two workers' copies
+        first, second = AsyncTTLCache(60, 10, name="forecast"), AsyncTTLCache(60, 10, name="forecast")
+        await first.get_or_load("k", load)
+        await first.flush()
+        value = await second.get_or_load("k", load)
+        assert calls == 1
+        _assert_same(value, {"temps": np.array([12.5, 13.0]), "cell": (37.77, -122.42)})
+        assert second.stats()["shared_hits"] == 1
+        # Unnamed caches stay process-local
+        local = AsyncTTLCache(60, 10)
+        await local.get_or_load("k", load)
+        assert calls == 2
+        await cache_backends.close_cache_backend()
+
+    asyncio.run(run())
+
+
+def test_failed_sqlite_write_does_not_block_later_writes(tmp_path):
+    async def run():
+        backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+        with pytest.raises(sqlite3.Error):
+            await backend.set_many({"bad": object()}, ttl_seconds=60)
+        await backend.set_many({"a": b"1"}, ttl_seconds=60)
+        assert list(await backend.get_many(["a", "bad"])) == ["a"]
+        await backend.close()
+
+    asyncio.run(run())
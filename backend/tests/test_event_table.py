@@ -0,0 +1,41 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.event_table import EventTable
+from app.services.events_service import fetch_local_events
+
+
+EVENTS = [
+    {"latitude": 37.8065, "longitude": -122.43, "attendance": None, "start": "2026-10-18T17:00", "end": "2026-10-18T22:00"},
+    {"latitude": 37.7955, "longitude": -122.3937, "attendance": 5000, "start": "2026-10-18T08:00", "end": "2026-10-18T13:00"},
+    {"latitude": None, "longitude": None, "attendance": 200, "start": None, "end": None},
+    {"latitude": 37.77, "longitude": -122.42, "attendance": "n/a", "start": None, "end": None},
+]
+
+
+@pytest.mark.parametrize("slot", [None, "2026-10-18T18:00", "2026-10-18T09:30", "2026-10-19T03:00"])
+def test_single_point_loop_matches_the_vectorized_modifiers(slot):
+    from datetime import datetime
+
+    slot = datetime.fromisoformat(slot) if slot else None
+    table = EventTable.from_records(EVENTS)
+    rng = np.random.default_rng(0)
+    lats, lngs = 37.7 + rng.random(50) * 0.15, -122.5 + rng.random(50) * 0.15
+    expected = table.modifiers(lats, lngs, slot)
+    assert [table.modifier(lat, lng, slot) for lat, lng in zip(lats, lngs)] == pytest.approx(expected, abs=1e-12)
+
+
+def test_no_events_is_neutral():
+    assert EventTable.from_records([]).modifier(37.77, -122.42) == 1.0
+
+
+def test_mock_events_are_a_fresh_copy_per_call(monkeypatch):
+    monkeypatch.setattr(settings, "serpapi_api_key", "")
+    first = asyncio.run(fetch_local_events("market"))
+    first["data"]["events"][0]["title"] = "changed"
+    first["data"]["events"].pop()
+    again = asyncio.run(fetch_local_events("market"))
+    assert [e["title"] for e in again["data"]["events"]] == ["Street Food Festival", "Farmers Market"]
@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import heatmap, place_store
+from app.services.place_store import PlaceStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "heatmap_path", str(tmp_path / "heatmap.npy"))
+    monkeypatch.setattr(settings, "heatmap_sw_lat", 37.70)
+    monkeypatch.setattr(settings, "heatmap_sw_lng", -122.50)
+    monkeypatch.setattr(settings, "heatmap_ne_lat", 37.80)
+    monkeypatch.setattr(settings, "heatmap_ne_lng", -122.40)
+    monkeypatch.setattr(settings, "heatmap_cell_deg", 0.005)
+    monkeypatch.setattr(heatmap, "_raster", None)
+    monkeypatch.setattr(heatmap, "_meta", None)
+    monkeypatch.setattr(heatmap, "_loaded_mtime", None)
+    monkeypatch.setattr(heatmap, "_checked_at", 0.0)
+    s = PlaceStore(str(tmp_path / "places.sqlite3"))
+    monkeypatch.setattr(place_store, "_store", s)
+    yield s
+    s.close()
+
+
+def _add_place(store, place_id, lat, lng, busyness):
+    hist = np.full((7, 24), busyness, dtype=np.uint8)
+    store.put_query(place_id, {"place_id": place_id, "name": place_id, "coordinates": {"lat": lat, "lng": lng}, "histogram": hist})
+
+
+def test_build_writes_raster_and_sidecar(store, tmp_path):
+    _add_place(store, "a", 37.751, -122.451, 80)
+    meta = heatmap.build_heatmap()
+    assert (meta["rows"], meta["cols"], meta["places"]) == (20, 20, 1)
+    raster = np.load(settings.heatmap_path)
+    assert raster.shape == (7, 24, 20, 20) and raster.dtype == np.uint8
+    # Hottest cell is the place's own, and it holds the place's busyness
+    r, c = np.unravel_index(np.argmax(raster[0, 12]), raster.shape[2:])
+    assert (r, c) == (9, 9)
+    assert raster[0, 12, r, c] == 80
+    assert raster[0, 12, 0, 0] == 0
+    # Temp files and the build lock are gone
+    assert sorted(p.name for p in tmp_path.iterdir() if "heatmap" in p.name) == ["heatmap.json", "heatmap.npy"]
+    with open(tmp_path / "heatmap.json") as f:
+        assert json.load(f)["store_version"] == store.version()
+
+
+def test_crop_returns_a_view_with_its_edges(store):
+    _add_place(store, "a", 37.751, -122.451, 80)
+    heatmap.build_heatmap()
+    view, (s, w, n, e) = heatmap.crop(37.7412, -122.4588, 37.7588, -122.4412, dow=0, hour=12)
+    assert view.shape == (4, 4)
+    assert (s, w, n, e) == pytest.approx((37.74, -122.46, 37.76, -122.44))
+    assert view.max() == 80
+    # Strided down to at most max_side cells a side
+    view, edges = heatmap.crop(37.70, -122.50, 37.80, -122.40, dow=0, hour=12, max_side=5)
+    assert view.shape == (5, 5)
+    assert edges == pytest.approx((37.70, -122.50, 37.80, -122.40))
+    # Boxes outside the grid are clipped to it
+    view, _ = heatmap.crop(38.0, -121.0, 38.1, -120.9, dow=0, hour=12)
+    assert view.size == 0
+
+
+def test_crop_before_any_build(store):
+    assert heatmap.crop(37.74, -122.46, 37.76, -122.44, dow=0, hour=12) is None
+
+
+def test_ensure_rebuilds_when_the_store_changes(store):
+    assert heatmap.ensure_heatmap()["places"] == 0
+    assert heatmap.ensure_heatmap() is None
+    _add_place(store, "a", 37.751, -122.451, 80)
+    assert heatmap.ensure_heatmap()["places"] == 1
+
+
+def test_build_skips_while_another_process_holds_the_lock(store):
+    open(settings.heatmap_path + ".lock", "w").close()
+    assert heatmap.build_heatmap() is None
@@ -0,0 +1,97 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.services import histograms, place_index, place_store
+from app.services.foot_traffic_service import _aggregate_series, _series_from_histogram
+from app.services.place_index import PlaceIndex, _tiles_at, get_place_index
+from app.services.place_store import PlaceStore
+
+
+def _place(place_id, lat, lng, busyness=50):
+    hist = np.full((7, 24), busyness, dtype=np.uint8)
+    return {"place_id": place_id, "name": place_id, "coordinates": {"lat": lat, "lng": lng}, "histogram": hist}
+
+
+def _random_places(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "place_id": f"p{i}",
+            "name": f"p{i}",
+            "coordinates": {"lat": 37.7 + rng.random() * 0.1, "lng": -122.5 + rng.random() * 0.1},
+            "histogram": rng.integers(0, 101, (7, 24)).astype(np.uint8),
+        }
+        for i in range(n)
+    ]
+
+
+def _everything(index):
+    return index.query(37.0, -123.0, 38.0, -122.0, dow=2, hour=13, limit=10_000)
+
+
+def test_incremental_adds_match_a_bulk_load():
+    places = _random_places(300)
+    moved = dict(places[3], coordinates={"lat": 37.75, "lng": -122.45})
+
+    incremental = PlaceIndex()
+    incremental.add_many(places[:200])
+    for place in places[200:]:
+        incremental.add(place)
+    incremental.add(moved)
+    incremental.remove("p7")
+
+    bulk = PlaceIndex()
+    bulk.add_many([moved if p["place_id"] == "p3" else p for p in places if p["place_id"] != "p7"])
+    assert len(incremental) == len(bulk) == 299
+    assert _everything(incremental) == _everything(bulk)
+
+
+def test_a_change_only_invalidates_the_tiles_around_it():
+    index = PlaceIndex()
+    index.add_many([_place("a", 37.75, -122.45)])
+    here = next(k for k in _tiles_at(37.75, -122.45) if k[0] == 14)
+    elsewhere = next(k for k in _tiles_at(37.80, -122.40) if k[0] == 14)
+    assert index.tile_version(*here) == index.tile_version(*elsewhere) == 0
+
+    index.add(_place("b", 37.7501, -122.4501))
+    assert index.tile_version(*here) > 0
+    assert index.tile_version(*elsewhere) == 0
+    # Coarse tiles cover both places
+    assert index.tile_version(0, 0, 0) == index.version
+
+
+def test_single_place_series_matches_the_stacked_path():
+    hist = np.random.default_rng(1).integers(0, 101, (7, 24)).astype(np.uint8)
+    hist[3] = histograms.NO_DATA
+    for dow, hour in [(0, 12), (3, 12), (None, None)]:
+        assert _series_from_histogram(hist, dow, hour) == _aggregate_series(hist[None], dow, hour)
+
+
+def test_bucket_parsing_is_the_same_on_both_paths():
+    numeric = histograms.from_days([["12.5"] * 24] + [None] * 6)
+    mixed = histograms.from_days([["12.5"] * 23 + ["n/a"]] + [None] * 6)
+    assert numeric[0, 0] == mixed[0, 0] == 12
+    assert mixed[0, 23] == 0
+
+
+def test_concurrent_first_calls_share_one_index(monkeypatch):
+    store = PlaceStore(":memory:")
+    store.put_nearby("a", [_place("p0", 37.77, -122.42)])
+    calls = 0
+    all_places = store.all_places
+
+    def slow_all_places():
+        nonlocal calls
+        calls += 1
+        time.sleep(0.05)
+        return all_places()
+
+    monkeypatch.setattr(store, "all_places", slow_all_places)
+    monkeypatch.setattr(place_store, "_store", store)
+    monkeypatch.setattr(place_index, "_index", None)
+    with ThreadPoolExecutor(4) as pool:
+        indexes = list(pool.map(lambda _: get_place_index(), range(4)))
+    assert calls == 1 and all(idx is indexes[0] for idx in indexes)
+    assert len(indexes[0]) == 1
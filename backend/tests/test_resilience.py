@@ -0,0 +1,165 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.resilience import CircuitBreaker, Upstream, UpstreamUnavailable
+
+
+def _breaker(cooldown=60.0):
+    return CircuitBreaker(window=10, failure_ratio=0.5, min_calls=4, cooldown_seconds=cooldown)
+
+
+def _upstream(breaker=None, hedge_delay=0.05, max_concurrency=4, queue_timeout=0.05, deadline=1.0):
+    return Upstream(
+        "test",
+        max_concurrency=max_concurrency,
+        queue_timeout=queue_timeout,
+        hedge_delay=hedge_delay,
+        deadline=deadline,
+        breaker=breaker or _breaker(),
+    )
+
+
+def test_breaker_opens_on_failure_ratio_and_recovers_through_one_probe():
+    breaker = _breaker(cooldown=0.05)
+    for success in (True, False, True):
+        breaker.record(breaker.allow(), success)
+    assert breaker.state == "closed"
+    breaker.record(breaker.allow(), False)
+    assert breaker.state == "open" and breaker.allow() is None
+
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    probe = breaker.allow()
+    assert probe is not None
+    assert breaker.allow() is None  # only one probe at a time
+    breaker.record(probe, False)
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    breaker.record(breaker.allow(), True)
+    assert breaker.state == "closed"
+    assert breaker.as_dict()["recent_calls"] == 0
+    assert breaker.times_opened == 1
+
+
+def test_calls_started_before_the_breaker_opened_are_ignored():
+    breaker = _breaker(cooldown=0.05)
+    early = [breaker.allow() for _ in range(5)]
+    for token in early[:4]:
+        breaker.record(token, False)
+    assert breaker.state == "open"
+    # A late success must not close the breaker without a probe
+    breaker.record(early[4], True)
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    probe = breaker.allow()
+    # Nor may a late failure reset the cooldown or free the probe slot
+    breaker.record(early[0], False)
+    breaker.cancel_probe(early[0])
+    assert breaker.state == "half_open" and breaker.allow() is None
+    breaker.record(probe, True)
+    assert breaker.state == "closed"
+    # Outcomes from before the breaker reopened don't count in the new window
+    breaker.record(early[1], False)
+    assert breaker.as_dict()["recent_calls"] == 0
+
+
+def test_slow_endpoint_is_hedged_and_the_first_answer_wins():
+    async def run():
+        upstream = _upstream(hedge_delay=0.02)
+        started = []
+
+        async def attempt(endpoint):
+            started.append(endpoint)
+            await asyncio.sleep(1.0 if endpoint == "slow" else 0.01)
+            return endpoint
+
+        t = time.perf_counter()
+        assert await upstream.call(["slow", "fast"], attempt) == "fast"
+        assert time.perf_counter() - t < 0.5
+        assert started == ["slow", "fast"]
+        assert upstream.breaker.as_dict()["recent_failures"] == 0
+
+    asyncio.run(run())
+
+
+def test_failed_endpoint_starts_the_next_without_waiting_for_the_hedge_delay():
+    async def run():
+        upstream = _upstream(hedge_delay=5.0)
+
+        async def attempt(endpoint):
+            if endpoint == "broken":
+                raise RuntimeError("502")
+            return "ok"
+
+        t = time.perf_counter()
+        assert await upstream.call(["broken", "good"], attempt) == "ok"
+        assert time.perf_counter() - t < 1.0
+        assert upstream.stats()["endpoints"]["broken"]["errors"] == 1
+
+    asyncio.run(run())
+
+
+def test_none_is_an_answer_but_all_failures_raise_and_count_against_the_breaker():
+    async def run():
+        upstream = _upstream()
+
+        async def empty(endpoint):
+            return None
+
+        assert await upstream.call(["a", "b"], empty) is None
+
+        async def broken(endpoint):
+            raise RuntimeError("down")
+
+        for _ in range(3):
+            with pytest.raises(UpstreamUnavailable):
+                await upstream.call(["a", "b"], broken)
+        assert upstream.breaker.state == "open"
+        # Fails fast while open, without calling the endpoints
+        calls = 0
+
+        async def counted(endpoint):
+            nonlocal calls
+            calls += 1
+            return "ok"
+
+        with pytest.raises(UpstreamUnavailable, match="circuit open"):
+            await upstream.call(["a"], counted)
+        assert calls == 0 and upstream.rejected == 1
+
+    asyncio.run(run())
+
+
+def test_saturated_upstream_rejects_without_tripping_the_breaker():
+    async def run():
+        upstream = _upstream(max_concurrency=1, queue_timeout=0.01)
+        release = asyncio.Event()
+
+        async def slow(endpoint):
+            await release.wait()
+            return "ok"
+
+        first = asyncio.create_task(upstream.call(["a"], slow))
+        await asyncio.sleep(0)
+        with pytest.raises(UpstreamUnavailable, match="too many"):
+            await upstream.call(["a"], slow)
+        release.set()
+        assert await first == "ok"
+        assert upstream.breaker.as_dict()["recent_failures"] == 0
+
+    asyncio.run(run())
+
+
+def test_errors_without_a_message_are_named_by_type():
+    async def run():
+        async def timeout(endpoint):
+            raise TimeoutError()
+
+        with pytest.raises(UpstreamUnavailable, match="^test: TimeoutError$"):
+            await _upstream().call(["a"], timeout)
+
+    asyncio.run(run())
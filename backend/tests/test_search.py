@@ -0,0 +1,24 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.search_service import _parse_window
+
+
+def test_mixed_offsets_share_the_start_wall_clock():
+    assert _parse_window("2026-10-18T10:00:00-07:00", "2026-10-18T13:00:00") == (
+        datetime(2026, 10, 18, 10), datetime(2026, 10, 18, 13)
+    )
+    assert _parse_window("2026-10-18T10:00:00Z", "2026-10-18T06:00:00-07:00") == (
+        datetime(2026, 10, 18, 10), datetime(2026, 10, 18, 13)
+    )
+
+
+def test_default_end_is_one_hour_after_start():
+    assert _parse_window("2026-10-18T10:30:00Z", None) == (datetime(2026, 10, 18, 10, 30), datetime(2026, 10, 18, 11, 30))
+
+
+@pytest.mark.parametrize("start, end", [("2026-10-18T10:00:00", "2026-10-18T08:00:00"), ("not a date", None)])
+def test_bad_windows_raise_value_error(start, end):
+    with pytest.raises(ValueError):
+        _parse_window(start, end)
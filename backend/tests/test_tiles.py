@@ -0,0 +1,110 @@
+import struct
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes.foot_traffic import router
+from app.services import place_index, place_store, tiles
+from app.services.place_index import PlaceIndex, _tiles_at
+from app.services.place_store import PlaceStore
+
+# Ferry Building, inside tile 14/2621/6331
+LAT, LNG = 37.7955, -122.3937
+Z, X, Y = 14, 2621, 6331
+
+
+@pytest.fixture
+def index(monkeypatch):
+    idx = PlaceIndex()
+    hist = np.arange(168, dtype=np.uint16).reshape(7, 24).clip(0, 100).astype(np.uint8)
+    hist[2] = 255
+    idx.add_many([{"place_id": "ferry", "name": "Ferry Building Marketplace", "coordinates": {"lat": LAT, "lng": LNG}, "histogram": hist}])
+    monkeypatch.setattr(place_index, "_index", idx)
+    tiles._tiles.clear()
+    return idx
+
+
+def _decode(body):
+    magic, count, slots, _ = tiles.HEADER.unpack_from(body)
+    coords = np.frombuffer(body, "<u2", count * 2, tiles.HEADER.size).reshape(count, 2)
+    offset = tiles.HEADER.size + count * 4
+    values = np.frombuffer(body, np.uint8, count * slots, offset).reshape(count, slots)
+    offset += count * slots
+    names = []
+    for _ in range(count):
+        n = body[offset]
+        names.append(body[offset + 1:offset + 1 + n].decode())
+        offset += 1 + n
+    assert offset == len(body)
+    return magic, coords, values, names
+
+
+def test_tile_layout_round_trips(index):
+    assert (Z, X, Y) in _tiles_at(LAT, LNG)
+    magic, coords, values, names = _decode(tiles.build_tile(Z, X, Y))
+    assert magic == b"FTT1" and names == ["Ferry Building Marketplace"]
+    assert values.shape == (1, 168)
+    assert values[0, 2 * 24] == 255 and values[0, 5] == 5
+    # Quantized position maps back to the place within a few meters
+    sw_lat, sw_lng, ne_lat, ne_lng = tiles.tile_bounds(Z, X, Y)
+    lng = sw_lng + coords[0, 0] / tiles.EXTENT * (ne_lng - sw_lng)
+    assert lng == pytest.approx(LNG, abs=1e-4)
+    assert sw_lat <= LAT < ne_lat
+
+    _, _, single, _ = _decode(tiles.build_tile(Z, X, Y, dow=0, hour=5))
+    assert single.tolist() == [[5]]
+    _, _, empty, names = _decode(tiles.build_tile(Z, X + 1, Y))
+    assert empty.shape == (0, 168) and names == []
+
+
+def test_tiles_are_cached_until_a_place_inside_changes(index):
+    body, etag = tiles.get_tile(Z, X, Y)
+    assert tiles.get_tile(Z, X, Y) == (body, etag)
+    index.add({"place_id": "far", "name": "Far", "coordinates": {"lat": 37.70, "lng": -122.50}, "histogram": np.zeros((7, 24), np.uint8)})
+    assert tiles.get_tile(Z, X, Y)[1] == etag
+    index.add({"place_id": "near", "name": "Near", "coordinates": {"lat": LAT + 1e-4, "lng": LNG}, "histogram": np.full((7, 24), 100, np.uint8)})
+    assert tiles.get_tile(Z, X, Y)[1] != etag
+
+
+def test_route_serves_etag_and_304(index):
+    app = FastAPI()
+    app.include_router(router, prefix="/api/foot-traffic")
+    client = TestClient(app)
+    res = client.get(f"/api/foot-traffic/tiles/{Z}/{X}/{Y}.bin")
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/octet-stream"
+    assert "max-age" in res.headers["cache-control"]
+    etag = res.headers["etag"]
+    assert client.get(f"/api/foot-traffic/tiles/{Z}/{X}/{Y}.bin", headers={"If-None-Match": etag}).status_code == 304
+    for header in (f'"other", W/{etag}', "*"):
+        assert client.get(f"/api/foot-traffic/tiles/{Z}/{X}/{Y}.bin", headers={"If-None-Match": header}).status_code == 304
+    # Only whole entries match, not a prefix or suffix of the current ETag
+    for header in ('"other"', etag[:-3] + '"', '"' + etag[4:], etag + "x", f'W/"v2{etag[1:]}'):
+        assert client.get(f"/api/foot-traffic/tiles/{Z}/{X}/{Y}.bin", headers={"If-None-Match": header}).status_code == 200
+    assert client.get("/api/foot-traffic/tiles/3/8/0.bin").status_code == 404
+
+
+def test_index_picks_up_places_other_workers_store(tmp_path, monkeypatch):
+    store = PlaceStore(str(tmp_path / "places.sqlite3"))
+    monkeypatch.setattr(place_store, "_store", store)
+    monkeypatch.setattr(place_index, "_index", None)
+    monkeypatch.setattr(place_index, "_REFRESH_CHECK_SECONDS", 0.0)
+    tiles._tiles.clear()
+    hist = np.full((7, 24), 60, np.uint8)
+    store.put_nearby("a", [{"place_id": "ferry", "name": "Ferry", "coordinates": {"lat": LAT, "lng": LNG}, "histogram": hist}])
+    _, etag = tiles.get_tile(Z, X, Y)
+
+    # Another worker stores a place in the same tile
+    other = PlaceStore(str(tmp_path / "places.sqlite3"))
+    other.put_nearby("b", [{"place_id": "near", "name": "Near", "coordinates": {"lat": LAT - 0.005, "lng": LNG - 0.01}, "histogram": hist}])
+    body, new_etag = tiles.get_tile(Z, X, Y)
+    assert new_etag != etag and sorted(_decode(body)[3]) == ["Ferry", "Near"]
+
+    # A fresh worker builds the same bytes, so the ETags agree
+    monkeypatch.setattr(place_index, "_index", None)
+    tiles._tiles.clear()
+    assert tiles.get_tile(Z, X, Y) == (body, new_etag)
+    other.close()
+    store.close()
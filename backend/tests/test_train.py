@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.models.prediction_model import TrafficModel, latest_artifact
+from app.models.train import train
+
+
+def _rows(path, seed):
+    rng = np.random.default_rng(seed)
+    n = 50
+    df = pd.DataFrame({
+        "historical_baseline": rng.random(n),
+        "weather_modifier": 0.7 + 0.6 * rng.random(n),
+        "event_modifier": 1.0 + 0.5 * rng.random(n),
+    })
+    df["observed"] = (0.6 * df["historical_baseline"] + 0.2 * rng.random(n)).clip(0, 1)
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_runs_in_the_same_second_write_distinct_artifacts(tmp_path):
+    out = str(tmp_path / "models")
+    paths = [train(_rows(tmp_path / f"rows{i}.csv", seed=i), out) for i in range(3)]
+    assert len(set(paths)) == 3 and all(os.path.exists(p) for p in paths)
+    versions = {TrafficModel.load(p).version for p in paths}
+    assert len(versions) == 3
+    assert latest_artifact(out) in paths
+    # Retraining the same data fits the same weights, so it may reuse the artifact
+    again = train(str(tmp_path / "rows0.csv"), out)
+    assert os.path.basename(again).split("-")[-1] == os.path.basename(paths[0]).split("-")[-1]
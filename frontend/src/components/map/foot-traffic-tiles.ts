@@ -0,0 +1,102 @@
+// Client for the binary foot-traffic tiles served at /api/foot-traffic/tiles/{z}/{x}/{y}.bin
+// (layout documented in backend/app/services/tiles.py). Tiles carry the whole week, so
+// changing the day/hour only re-reads cached tiles, and panning hits the HTTP cache.
+
+const MAGIC = "FTT1";
+const EXTENT = 65535;
+const NO_DATA = 255;
+const HOURS = 24;
+
+export interface TileCoord {
+  z: number;
+  x: number;
+  y: number;
+}
+
+export interface FootTrafficTile {
+  lng: Float64Array;
+  lat: Float64Array;
+  values: Uint8Array; // count x slots
+  slots: number; // 168 (whole week) or 1
+  names: string[];
+}
+
+export function tilesForBounds(bounds: [[number, number], [number, number]], z: number): TileCoord[] {
+  const [[west, south], [east, north]] = bounds;
+  const n = 2 ** z;
+  const clamp = (v: number) => Math.min(n - 1, Math.max(0, v));
+  const x0 = clamp(Math.floor(lngToTileX(west, n)));
+  const x1 = clamp(Math.floor(lngToTileX(east, n)));
+  const y0 = clamp(Math.floor(latToTileY(north, n)));
+  const y1 = clamp(Math.floor(latToTileY(south, n)));
+  const tiles: TileCoord[] = [];
+  for (let x = x0; x <= x1; x++) {
+    for (let y = y0; y <= y1; y++) tiles.push({ z, x, y });
+  }
+  return tiles;
+}
+
+export async function fetchTile(base: string, { z, x, y }: TileCoord): Promise<FootTrafficTile | null> {
+  // Default cache mode: the browser revalidates with the ETag once max-age runs out
+  const res = await fetch(`${base}/api/foot-traffic/tiles/${z}/${x}/${y}.bin`);
+  if (!res.ok) return null;
+  return decodeTile(await res.arrayBuffer(), { z, x, y });
+}
+
+export function decodeTile(buf: ArrayBuffer, { z, x, y }: TileCoord): FootTrafficTile {
+  const view = new DataView(buf);
+  const magic = String.fromCharCode(...new Uint8Array(buf, 0, 4));
+  if (magic !== MAGIC) throw new Error(`Unexpected tile format ${magic}`);
+  const count = view.getUint32(4, true);
+  const slots = view.getUint16(8, true);
+  const n = 2 ** z;
+
+  const lng = new Float64Array(count);
+  const lat = new Float64Array(count);
+  for (let i = 0; i < count; i++) {
+    const qx = view.getUint16(12 + i * 4, true) / EXTENT;
+    const qy = view.getUint16(14 + i * 4, true) / EXTENT;
+    lng[i] = ((x + qx) / n) * 360 - 180;
+    lat[i] = (Math.atan(Math.sinh(Math.PI * (1 - (2 * (y + qy)) / n))) * 180) / Math.PI;
+  }
+
+  let offset = 12 + count * 4;
+  const values = new Uint8Array(buf, offset, count * slots);
+  offset += count * slots;
+
+  const decoder = new TextDecoder();
+  const bytes = new Uint8Array(buf);
+  const names: string[] = [];
+  for (let i = 0; i < count; i++) {
+    const len = bytes[offset];
+    names.push(decoder.decode(bytes.subarray(offset + 1, offset + 1 + len)));
+    offset += 1 + len;
+  }
+  return { lng, lat, values, slots, names };
+}
+
+// Busyness at (dow, hour), or the weekly average when that weekday has no data,
+// matching the JSON bounds endpoint
+export function busynessAt(tile: FootTrafficTile, i: number, dow: number, hour: number): number {
+  const row = tile.values.subarray(i * tile.slots, (i + 1) * tile.slots);
+  if (tile.slots === 1) return row[0] === NO_DATA ? 0 : row[0];
+  const v = row[dow * HOURS + hour];
+  if (v !== NO_DATA) return v;
+  let total = 0;
+  let count = 0;
+  for (let d = 0; d < 7; d++) {
+    if (row[d * HOURS] === NO_DATA) continue;
+    for (let h = 0; h < HOURS; h++) total += row[d * HOURS + h];
+    count += HOURS;
+  }
+  return count ? total / count : 0;
+}
+
+function lngToTileX(lng: number, n: number): number {
+  return ((lng + 180) / 360) * n;
+}
+
+function latToTileY(lat: number, n: number): number {
+  const rad = (lat * Math.PI) / 180;
+  return ((1 - Math.asinh(Math.tan(rad)) / Math.PI) / 2) * n;
+}
@@ -6,15 +6,17 @@ import "mapbox-gl/dist/mapbox-gl.css";
 import { useEffect, useMemo, useRef, useState } from "react";
 import type { MapRef, LngLatBounds, MapLayerMouseEvent } from "react-map-gl";
 import { useAppState } from "@/lib/app-state";
-import { useQuery } from "@tanstack/react-query";
+import { useQueries } from "@tanstack/react-query";
 import { useTheme } from "next-themes";
 import { MapControls } from "./map-controls";
 import { MapLegend } from "./map-legend";
 import { FloatingControls } from "@/features/filters/floating-controls";
 import { useDebounce } from "@/lib/use-debounce";
+import { busynessAt, fetchTile, tilesForBounds } from "./foot-traffic-tiles";
 
 const SF_CENTER = { longitude: -122.44, latitude: 37.7749, zoom: 12.5 };
 const MIN_ZOOM_FOR_DATA = 12;
+const API_BASE = process.env.NEXT_PUBLIC_API_BASE ?? "http://localhost:8000";
 // Rough San Francisco city bounds (SW and NE corners)
 const SF_BOUNDS: [[number, number], [number, number]] = [
   [-122.58, 37.70], // SW (lng, lat)
@@ -40,45 +42,42 @@ export default function MapView() {
 
   const debouncedBounds = useDebounce(bounds, 500); // Debounce bounds to avoid excessive refetching
 
-  const traffic = useQuery({
-    queryKey: ["foot-traffic-bounds", debouncedBounds?.toArray(), heatmapDay, heatmapHour],
-    queryFn: async () => {
-      if (!debouncedBounds) return { places: [] };
+  // One query per z/x/y tile: tiles hold the whole week, so the day/hour slider
+  // re-renders from cache and panning only fetches tiles not seen yet
+  const tiles = useMemo(() => {
+    if (!debouncedBounds || viewState.zoom < MIN_ZOOM_FOR_DATA) return [];
+    return tilesForBounds(debouncedBounds.toArray() as [[number, number], [number, number]], Math.floor(viewState.zoom));
+  }, [debouncedBounds, viewState.zoom]);
 
-      const [sw, ne] = debouncedBounds.toArray();
-      const qs = new URLSearchParams({
-        sw_lat: String(sw[1]),
-        sw_lng: String(sw[0]),
-        ne_lat: String(ne[1]),
-        ne_lng: String(ne[0]),
-        dow: String(heatmapDay),
-        hour: String(heatmapHour)
-      });
-      
-      const res = await fetch(`${process.env.NEXT_PUBLIC_API_BASE ?? "http://localhost:8000"}/api/foot-traffic?${qs.toString()}`);
-      if (!res.ok) return { places: [] };
-      const json = await res.json();
-      return json.data || { places: [] };
-    },
-    enabled: !!debouncedBounds && viewState.zoom >= MIN_ZOOM_FOR_DATA,
-    staleTime: 60 * 1000, // 1 minute
+  const tileQueries = useQueries({
+    queries: tiles.map((tile) => ({
+      queryKey: ["foot-traffic-tile", tile.z, tile.x, tile.y],
+      queryFn: () => fetchTile(API_BASE, tile),
+      staleTime: 60 * 60 * 1000, // 1 hour; the HTTP cache revalidates with ETags
+    })),
   });
 
   const geojson = useMemo(() => {
-    const places = traffic.data?.places || [];
-    const features = places.map((place: any) => ({
-      type: "Feature",
-      properties: {
-        name: place.name,
-        avg_busyness: place.avg_busyness,
-      },
-      geometry: {
-        type: "Point",
-        coordinates: [place.coordinates.lng, place.coordinates.lat],
-      },
-    }));
+    const features: any[] = [];
+    for (const { data: tile } of tileQueries) {
+      if (!tile) continue;
+      for (let i = 0; i < tile.names.length; i++) {
+        features.push({
+          type: "Feature",
+          properties: {
+            name: tile.names[i],
+            avg_busyness: busynessAt(tile, i, heatmapDay, heatmapHour),
+          },
+          geometry: {
+            type: "Point",
+            coordinates: [tile.lng[i], tile.lat[i]],
+          },
+        });
+      }
+    }
     return { type: "FeatureCollection", features };
-  }, [traffic.data]);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [tiles, tileQueries.map((q) => q.dataUpdatedAt).join(","), heatmapDay, heatmapHour]);
 
   useEffect(() => {
     if (coords && mapRef.current) {
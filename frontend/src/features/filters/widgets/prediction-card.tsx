@@ -1,6 +1,6 @@
 "use client";
 
-import { useQuery } from "@tanstack/react-query";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
 import { useAppState } from "@/lib/app-state";
 import { motion } from "framer-motion";
 import { TrendingUpIcon, TrendingDownIcon, MinusIcon, SparklesIcon, LoaderIcon } from "lucide-react";
@@ -46,19 +46,46 @@ export function PredictionCard({
   location: string;
 }) {
   const { coords } = useAppState();
+  const queryClient = useQueryClient();
+  const queryKey = ["predict", location, coords?.latitude, coords?.longitude, date?.toISOString().slice(0, 10)];
   const query = useQuery<PredictResponse>({
-    queryKey: ["predict", location, coords?.latitude, coords?.longitude, date?.toISOString().slice(0, 10)],
+    queryKey,
     queryFn: async () => {
-      const qs = new URLSearchParams();
+      // Only the score and label are rendered; skip the raw upstream payloads
+      const qs = new URLSearchParams({ fields: "score,label" });
       if (location) qs.set("place_query", location);
       if (date) qs.set("date_iso", date.toISOString());
       if (coords) {
         qs.set("latitude", String(coords.latitude));
         qs.set("longitude", String(coords.longitude));
       }
-      const res = await fetch(`${process.env.NEXT_PUBLIC_API_BASE ?? "http://localhost:8000"}/api/predict-llm?${qs.toString()}`);
-      if (!res.ok) throw new Error("Prediction failed");
-      return res.json();
+      // NDJSON stream: show the score as soon as it lands, then grow the summary
+      const res = await fetch(`${process.env.NEXT_PUBLIC_API_BASE ?? "http://localhost:8000"}/api/predict-llm/stream?${qs.toString()}`);
+      if (!res.ok || !res.body) throw new Error("Prediction failed");
+      const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+      let result: PredictResponse | null = null;
+      let buffered = "";
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffered += value;
+        const lines = buffered.split("\n");
+        buffered = lines.pop() ?? "";
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const event = JSON.parse(line);
+          if (event.type === "prediction") {
+            result = { score: event.score, label: event.label };
+          } else if (event.type === "summary_delta" && result) {
+            result = { ...result, summary: (result.summary ?? "") + event.text };
+          } else if (event.type === "done" && result) {
+            result = { ...result, summary: event.summary };
+          }
+          if (result) queryClient.setQueryData(queryKey, result);
+        }
+      }
+      if (!result) throw new Error("Prediction failed");
+      return result;
     },
     enabled: Boolean((location || coords) && date)
   });